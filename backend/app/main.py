@@ -1,9 +1,35 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import os
+from .middleware.conditional_get import ConditionalGetMiddleware
 from .routers import courses, students, coursework, submissions, users, health, auth, teachers, reports
-from .services.base import DataDriverFactory
+from .services.driver_registry import driver_registry
+from .services.google_auth import credential_manager
+from .services.reports_service import reports_service
+from .services.report_executor import report_executor
+from .services.report_warmer import report_warmer
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Ciclo de vida: construir drivers al iniciar y cerrarlos al apagar"""
+    data_driver = await driver_registry.startup()
+    if os.getenv("DATA_DRIVER", "mock") == "google":
+        # Refresco anticipado del token OAuth compartido (sólo con el driver GOOGLE)
+        credential_manager.start_background_refresh()
+    if reports_service.demo_mode == "google":
+        # Reportes con datos reales: una lectura de entregas por curso
+        await reports_service.refresh_from_driver(data_driver)
+    # Precalcular dashboards al iniciar, tras cada sync y periódicamente
+    report_warmer.start()
+    yield
+    await report_warmer.stop()
+    report_executor.shutdown()
+    credential_manager.stop_background_refresh()
+    await driver_registry.shutdown()
+
 
 # Crear aplicación FastAPI
 app = FastAPI(
@@ -11,9 +37,13 @@ app = FastAPI(
     description="API para integración con Google Classroom",
     version="0.1.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
+# GET condicional (ETag/304); se registra antes que CORS para que CORS la envuelva
+app.add_middleware(ConditionalGetMiddleware)
+
 # Configurar CORS
 frontend_url = os.getenv("FRONTEND_URL", "http://localhost:3000")
 app.add_middleware(
@@ -40,16 +70,13 @@ app.include_router(auth.router, prefix="/api/v1", tags=["auth"])
 app.include_router(teachers.router, prefix="/api/v1", tags=["teachers"])
 app.include_router(reports.router, prefix="/api/v1", tags=["reports"])
 
-# Crear driver de datos global
-data_driver = DataDriverFactory.create_driver()
-
 @app.get("/")
 async def root():
     """Endpoint raíz"""
     return {
         "message": "Semillero Dashboard API",
         "version": "0.1.0",
-        "driver": data_driver.driver_type,
+        "driver": driver_registry.get_driver().driver_type,
         "docs": "/docs"
     }
 
@@ -57,5 +84,8 @@ async def root():
 # LECCIÓN APRENDIDA: FastAPI con configuración Docker-First
 # - CORS configurado para frontend
 # - Documentación automática en /docs
-# - Driver de datos global configurado
+# - Driver de datos compartido vía registro ligado al lifespan
+# - ETag fuerte (ámbito + cuerpo, igual en todos los workers) + 304 en lecturas versionadas (datos en vivo: no-cache)
+# - Reportes calculados en un pool de hilos, fuera del event loop
+# - Dashboards precalculados en segundo plano (arranque, sync e intervalo)
 # - Routers organizados por funcionalidad
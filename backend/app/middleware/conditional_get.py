@@ -0,0 +1,132 @@
+"""
+Conditional GET middleware: strong ETags, If-None-Match and Cache-Control
+Compatible with FastAPI 0.104.0+ (Starlette middleware)
+"""
+
+import hashlib
+import os
+import re
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from ..services.driver_registry import driver_registry
+from ..services.reports_service import reports_service
+
+API_PREFIX = "/api/v1/"
+
+# Never conditional: health, driver admin, OAuth and streamed export endpoints
+EXCLUDED_PATHS = re.compile(r"^/api/v1/(health|driver|auth|reports/health|reports/export)(/|$)")
+
+# Endpoints answered from ReportsService data (versioned by reports_service.data_version)
+REPORT_PATHS = re.compile(r"^/api/v1/(reports/|(students|teachers)/[^/]+/dashboard$)")
+
+NO_CACHE = "no-cache"
+
+# ETags remembered per (local data version, request scope)
+ETAG_MEMO_SIZE = 1024
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag (RFC 9110)"""
+    if if_none_match.strip() == "*":
+        return True
+    tags = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+class ConditionalGetMiddleware(BaseHTTPMiddleware):
+    """Answer unchanged GET polls with 304, before the endpoint runs when possible
+
+    The ETag hashes the request scope and the response body, so every worker
+    serving the same data agrees on it. Data versions are per process and
+    only key a memo of the last ETag per scope: an If-None-Match matching the
+    memo for the current version is answered without running the endpoint.
+    """
+
+    def __init__(self, app, max_age: Optional[int] = None):
+        super().__init__(app)
+        self.max_age = int(os.getenv("HTTP_CACHE_MAX_AGE", "0")) if max_age is None else max_age
+        self._etags: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+
+    @staticmethod
+    def data_version(path: str) -> Optional[str]:
+        """Local version of the data behind a path (None when it cannot be versioned)"""
+        if REPORT_PATHS.match(path):
+            return f"reports:{reports_service.data_version}"
+        # Not get_driver(): polls must not count as driver reuses
+        driver = driver_registry.current_driver()
+        version = driver.get_data_version() if driver is not None else None
+        return f"driver:{version}" if version is not None else None
+
+    @staticmethod
+    def request_scope(request: Request) -> str:
+        """What the response depends on besides the data: path, query and user"""
+        return "\n".join((
+            request.url.path,
+            # Same parameters in any order share the ETag
+            "&".join(sorted(f"{key}={value}" for key, value in request.query_params.multi_items())),
+            request.headers.get("X-User-Email", ""),
+        ))
+
+    @staticmethod
+    def compute_etag(scope: str, body: bytes) -> str:
+        """Strong ETag over request scope and response body"""
+        digest = hashlib.sha256(scope.encode())
+        digest.update(b"\0")
+        digest.update(body)
+        return '"' + digest.hexdigest()[:32] + '"'
+
+    def _remember(self, key: Tuple[str, str], etag: str) -> None:
+        self._etags[key] = etag
+        self._etags.move_to_end(key)
+        while len(self._etags) > ETAG_MEMO_SIZE:
+            self._etags.popitem(last=False)
+
+    def _headers(self, etag: str) -> dict:
+        return {
+            "ETag": etag,
+            "Cache-Control": f"private, max-age={self.max_age}, must-revalidate",
+            "Vary": "X-User-Email",
+        }
+
+    async def dispatch(self, request: Request, call_next) -> Response:
+        path = request.url.path
+        if request.method not in ("GET", "HEAD") or not path.startswith(API_PREFIX) or EXCLUDED_PATHS.match(path):
+            return await call_next(request)
+
+        version = self.data_version(path)
+        if version is None:
+            # Live data (e.g. Google without snapshot): always revalidate the full body
+            response = await call_next(request)
+            response.headers.setdefault("Cache-Control", NO_CACHE)
+            return response
+
+        scope = self.request_scope(request)
+        key = (version, scope)
+        if_none_match = request.headers.get("If-None-Match")
+        known = self._etags.get(key)
+        if if_none_match and known and _matches(if_none_match, known):
+            return Response(status_code=304, headers=self._headers(known))
+
+        response = await call_next(request)
+        if response.status_code != 200:
+            response.headers.setdefault("Cache-Control", NO_CACHE)
+            return response
+
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        etag = self.compute_etag(scope, body)
+        # A version that moved during the request may not describe this body
+        if self.data_version(path) == version:
+            self._remember(key, etag)
+        headers = self._headers(etag)
+        if if_none_match and _matches(if_none_match, etag):
+            # Another worker (or an earlier version) produced the same body
+            return Response(status_code=304, headers=headers)
+
+        tagged = Response(content=body, status_code=200, headers=dict(response.headers), media_type=response.media_type)
+        tagged.headers.update(headers)
+        return tagged
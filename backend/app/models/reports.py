@@ -153,6 +153,40 @@ class StudentProgress(BaseModel):
     averageGrade: float = Field(..., description="Average grade")
     status: str = Field(..., description="Student status")
 
+class GradeHistogramBucket(BaseModel):
+    """Model for one equal-width grade bucket"""
+    lower: float = Field(..., description="Lower bound (inclusive)")
+    upper: float = Field(..., description="Upper bound (exclusive, inclusive for the last bucket)")
+    count: int = Field(..., description="Graded submissions in the bucket (estimated for large sets)")
+
+
+class GradePercentiles(BaseModel):
+    """Model for grade percentiles of one course or coursework"""
+    id: str = Field(..., description="Course or coursework identifier")
+    name: str = Field(..., description="Course or coursework name")
+    count: int = Field(..., description="Graded submissions")
+    mean: Optional[float] = Field(None, description="Mean grade")
+    p10: Optional[float] = Field(None, description="10th percentile grade")
+    p50: Optional[float] = Field(None, description="Median grade")
+    p90: Optional[float] = Field(None, description="90th percentile grade")
+
+
+class GradeDistribution(BaseModel):
+    """Model for a grade distribution at institution, cohort, course or coursework level"""
+    scope: str = Field(..., description="institution, cohort, course or coursework")
+    scope_id: Optional[str] = Field(None, description="Identifier of the cohort, course or coursework")
+    count: int = Field(..., description="Graded submissions")
+    mean: Optional[float] = Field(None, description="Mean grade (exact)")
+    min: Optional[float] = Field(None, description="Lowest grade (exact)")
+    max: Optional[float] = Field(None, description="Highest grade (exact)")
+    p10: Optional[float] = Field(None, description="10th percentile grade")
+    p50: Optional[float] = Field(None, description="Median grade")
+    p90: Optional[float] = Field(None, description="90th percentile grade")
+    is_approximate: bool = Field(..., description="Percentiles come from a compacted sketch")
+    histogram: List[GradeHistogramBucket] = Field(..., description="Equal-width buckets from min to max")
+    breakdown: List[GradePercentiles] = Field(..., description="Percentiles per course (or per coursework for a course)")
+
+
 class CoordinatorDashboard(BaseModel):
     """Model for coordinator dashboard response"""
     coordinator_id: str = Field(..., description="Coordinator identifier")
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, HTTPException, Query
-from ..services.google_auth import GoogleAuthService
+from ..services.google_auth import GoogleAuthService, credential_manager
 from ..middleware.role_auth import RoleAuthMiddleware
 from pydantic import BaseModel
 from typing import Optional
@@ -93,13 +93,13 @@ async def get_auth_status():
     service = auth_service.get_service()
     
     if service:
-        return {"status": "authenticated", "message": "Google Classroom API connected"}
+        return {"status": "authenticated", "message": "Google Classroom API connected", "auth": credential_manager.get_stats()}
     else:
-        return {"status": "not_authenticated", "message": "Google Classroom API not connected"}
+        return {"status": "not_authenticated", "message": "Google Classroom API not connected", "auth": credential_manager.get_stats()}
 
 
 # LECCIÓN APRENDIDA: Endpoints de autenticación OAuth 2.0
 # - Flujo completo de autorización
 # - Callback para intercambio de código
-# - Estado de autenticación
+# - Estado de autenticación (con métricas del gestor de credenciales)
 # - Manejo de errores específicos
@@ -35,9 +35,26 @@ async def get_course(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching course: {str(e)}")
 
+@router.get("/courses/{course_id}/bundle")
+async def get_course_bundle(
+    course_id: str,
+    data_driver: BaseDataDriver = Depends(get_data_driver)
+):
+    """Obtener curso con estudiantes, trabajos y entregas en una sola respuesta"""
+    try:
+        bundle = await data_driver.get_course_bundle(course_id)
+        if bundle is None:
+            raise HTTPException(status_code=404, detail="Course not found")
+        return bundle
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching course bundle: {str(e)}")
+
 
 # LECCIÓN APRENDIDA: Endpoints RESTful con validación
 # - Validación de parámetros con Query
 # - Manejo de errores HTTP específicos
 # - Modelos Pydantic para validación de respuesta
 # - Dependency injection para driver de datos
+# - Bundle de curso: una respuesta armada con lecturas en paralelo
@@ -1,11 +1,13 @@
-from ..services.base import DataDriverFactory, BaseDataDriver
+from ..services.base import BaseDataDriver
+from ..services.driver_registry import driver_registry
 
 def get_data_driver() -> BaseDataDriver:
-    """Dependency para obtener driver de datos"""
-    return DataDriverFactory.create_driver()
+    """Dependency para obtener driver de datos compartido"""
+    return driver_registry.get_driver()
 
 
 # LECCIÓN APRENDIDA: Dependency injection para drivers
 # - Fácil testing con mocks
 # - Configuración centralizada
 # - Reutilización en múltiples endpoints
+# - Driver compartido desde el registro (no se construye por request)
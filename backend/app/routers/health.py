@@ -1,6 +1,12 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Optional
 from .dependencies import get_data_driver
 from ..services.base import BaseDataDriver
+from ..services.caching_driver import CachingDataDriver
+from ..services.reports_service import reports_service
+from ..services.report_warmer import report_warmer
+from ..services.snapshot_sync import run_snapshot_sync
+from ..services.driver_registry import driver_registry
 import os
 
 router = APIRouter()
@@ -55,6 +61,74 @@ async def driver_info():
         }
 
 
+@router.get("/driver/stats")
+async def driver_stats():
+    """Estadísticas de construcción y reutilización de drivers"""
+    return driver_registry.get_stats()
+
+@router.post("/driver/reload")
+async def reload_driver():
+    """Recargar explícitamente el driver de datos activo"""
+    try:
+        data_driver = await driver_registry.reload()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error reloading driver: {str(e)}")
+    
+    return {
+        "status": "reloaded",
+        "driver_type": data_driver.driver_type,
+        "registry": driver_registry.get_stats()
+    }
+
+
+@router.post("/driver/cache/invalidate")
+async def invalidate_driver_cache(
+    course_id: Optional[str] = Query(None, description="Invalidar entradas de un curso"),
+    user_id: Optional[str] = Query(None, description="Invalidar entradas de un usuario")
+):
+    """Invalidar la caché del driver por curso, usuario o completa"""
+    data_driver = get_data_driver()
+    if not isinstance(data_driver, CachingDataDriver):
+        raise HTTPException(status_code=400, detail="Driver cache is not enabled")
+    
+    invalidated = 0
+    if course_id:
+        invalidated += data_driver.invalidate_course(course_id)
+    if user_id:
+        invalidated += data_driver.invalidate_user(user_id)
+    if not course_id and not user_id:
+        invalidated = data_driver.invalidate_all()
+    
+    return {"status": "invalidated", "entries": invalidated}
+
+
+@router.post("/driver/snapshot/sync")
+async def sync_snapshot(
+    mode: str = Query("incremental", pattern="^(full|incremental)$", description="Sincronización completa o incremental")
+):
+    """Sincronizar el snapshot SQLite desde el driver de origen (SNAPSHOT_SOURCE)"""
+    try:
+        result = await run_snapshot_sync(mode=mode)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error syncing snapshot: {str(e)}")
+    
+    # Invalidar la caché sólo para los cursos modificados
+    data_driver = get_data_driver()
+    if isinstance(data_driver, CachingDataDriver):
+        if result["mode"] == "full":
+            data_driver.invalidate_all()
+        else:
+            for course_id in result["changed_courses"]:
+                data_driver.invalidate_course(course_id)
+    
+    if reports_service.demo_mode == "google":
+        await reports_service.refresh_from_driver(data_driver)
+    # Precalcular los dashboards con los datos nuevos
+    report_warmer.trigger("sync")
+    
+    return {"status": "synced", **result}
+
+
 # LECCIÓN APRENDIDA: Health checks para monitoreo
 # - Endpoint básico para load balancers
 # - Health check detallado con estado del driver
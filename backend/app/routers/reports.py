@@ -3,28 +3,37 @@ Reports router for cohort progress endpoints
 Compatible with FastAPI 0.104.0+ and Pydantic 2.4.0+
 """
 
-from typing import Optional
+from datetime import date
+from typing import List, Optional
 from fastapi import APIRouter, Request, HTTPException, status, Query
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 import logging
 
 from ..models.reports import (
     ReportCohortProgressResponse, RoleAuthResponse, KPIResponse,
-    CoordinatorDashboard, AdminDashboard, OverviewStats
+    CoordinatorDashboard, AdminDashboard, OverviewStats, TrendsData, GradeDistribution
 )
 from ..services.reports_service import reports_service
+from ..services.report_executor import report_executor
+from ..services.report_export import EXPORT_COLUMNS, EXPORT_FORMATS, stream_rows
+from ..services.report_warmer import report_warmer
 from ..middleware.role_auth import role_auth
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/reports", tags=["reports"])
 
+# Roles allowed to export: names assigned by the default whitelist and their Spanish forms
+EXPORT_ROLES = ("coordinator", "admin", "coordinador", "administrador")
+
 
 @router.get("/health", response_model=dict)
 async def reports_health():
     """Health check for reports service"""
     try:
         health_status = reports_service.get_health_status()
+        health_status["executor"] = report_executor.get_stats()
+        health_status["warmer"] = report_warmer.get_status()
         return health_status
     except Exception as e:
         logger.error(f"Reports health check error: {e}")
@@ -53,9 +62,14 @@ async def get_reports_stats():
 async def get_overview_stats():
     """Obtener estadísticas generales del sistema para overview"""
     try:
-        overview_stats = reports_service.get_overview_stats()
+        overview_stats = await report_executor.run(reports_service.get_overview_stats)
         logger.info("Generated overview stats successfully")
         return overview_stats
+    except TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Report computation timed out"
+        )
     except Exception as e:
         logger.error(f"Error generating overview stats: {e}")
         raise HTTPException(
@@ -102,11 +116,8 @@ async def get_cohort_progress(
                 )
         
         # Get cohort progress data
-        cohort_progress = reports_service.get_cohort_progress(
-            cohort_id=cohort_id,
-            course_id=course_id,
-            page_size=pageSize,
-            page_token=pageToken
+        cohort_progress = await report_executor.run(
+            reports_service.get_cohort_progress, cohort_id, course_id, pageSize, pageToken
         )
         
         logger.info(f"Generated cohort progress report for user {user['email']} with role {user['role']}")
@@ -115,6 +126,11 @@ async def get_cohort_progress(
         
     except HTTPException:
         raise
+    except TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Report computation timed out"
+        )
     except ValueError as e:
         if "Invalid page token" in str(e):
             raise HTTPException(
@@ -187,7 +203,7 @@ async def get_global_kpis(request: Request):
                 )
 
         # Calculate and return KPIs
-        kpis = reports_service.calculate_global_kpis()
+        kpis = await report_executor.run(reports_service.calculate_global_kpis)
 
         if user:
             logger.info(f"Generated KPIs for user {user['email']} with role {user['role']}")
@@ -198,6 +214,11 @@ async def get_global_kpis(request: Request):
 
     except HTTPException:
         raise
+    except TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Report computation timed out"
+        )
     except Exception as e:
         logger.error(f"Error generating KPIs: {e}")
         raise HTTPException(
@@ -206,6 +227,130 @@ async def get_global_kpis(request: Request):
         )
 
 
+@router.get("/trends", response_model=List[TrendsData])
+async def get_trends(
+    request: Request,
+    granularity: str = Query("month", description="Bucket size: day, week (ISO) or month"),
+    course_id: Optional[str] = Query(None, description="Filter by specific course ID"),
+    start: Optional[date] = Query(None, description="First day included (YYYY-MM-DD)"),
+    end: Optional[date] = Query(None, description="Last day included (YYYY-MM-DD)")
+):
+    """
+    Get on-time / late submission trends from the pre-aggregated rollups
+    Requires authentication but available to all roles
+    """
+    try:
+        user = await role_auth.authenticate_user(request)
+        if not user:
+            # Allow unauthenticated access in MOCK mode
+            if reports_service.demo_mode != "mock":
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Authentication required"
+                )
+
+        return await report_executor.run(reports_service.get_trends, granularity, (course_id,) if course_id else None, start, end)
+    except HTTPException:
+        raise
+    except TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Report computation timed out"
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error generating trends: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to generate trends"
+        )
+
+
+@router.get("/grade-distribution", response_model=GradeDistribution)
+async def get_grade_distribution(
+    request: Request,
+    cohort_id: Optional[str] = Query(None, description="Filter by specific cohort ID"),
+    course_id: Optional[str] = Query(None, description="Filter by specific course ID"),
+    assignment_id: Optional[str] = Query(None, description="Filter by coursework (requires course_id)"),
+    bins: int = Query(10, ge=1, le=50, description="Number of histogram buckets")
+):
+    """
+    Get grade percentiles (p10/p50/p90) and histogram from the quantile sketches
+    Requires authentication but available to all roles
+    """
+    try:
+        user = await role_auth.authenticate_user(request)
+        if not user:
+            # Allow unauthenticated access in MOCK mode
+            if reports_service.demo_mode != "mock":
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Authentication required"
+                )
+
+        return await report_executor.run(reports_service.get_grade_distribution, cohort_id, course_id, assignment_id, bins)
+    except HTTPException:
+        raise
+    except TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Report computation timed out"
+        )
+    except ValueError as e:
+        if "not found" in str(e).lower():
+            raise HTTPException(status_code=404, detail=str(e))
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error generating grade distribution: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to generate grade distribution"
+        )
+
+@router.get("/export/{dataset}")
+async def export_report(
+    dataset: str,
+    request: Request,
+    format: str = Query("csv", description="Export format: csv or ndjson"),
+    cohort_id: Optional[str] = Query(None, description="Filter by specific cohort ID (cohort-progress)"),
+    course_id: Optional[str] = Query(None, description="Filter by specific course ID")
+):
+    """
+    Stream every row of cohort progress, student progress or submissions as CSV / NDJSON
+    Requires authentication and appropriate role permissions
+    """
+    user = await role_auth.authenticate_user(request)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Authentication required"
+        )
+    if user["role"] not in EXPORT_ROLES:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied. Required roles: coordinator, admin"
+        )
+    if dataset not in EXPORT_COLUMNS:
+        raise HTTPException(status_code=404, detail=f"Unknown export dataset: {dataset}")
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown export format: {format}")
+
+    # Generators only: rows are computed while the response streams, on Starlette's thread pool
+    if dataset == "cohort-progress":
+        rows = reports_service.iter_cohort_rows(cohort_id, course_id)
+    elif dataset == "students":
+        rows = reports_service.iter_student_rows(course_id)
+    else:
+        rows = reports_service.iter_submission_rows(course_id)
+
+    logger.info(f"Streaming {dataset} export ({format}) for user {user['email']}")
+    return StreamingResponse(
+        stream_rows(rows, dataset, format),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{dataset}.{format}"'}
+    )
+
 @router.get("/coordinators/{coordinator_id}/dashboard", response_model=CoordinatorDashboard)
 async def get_coordinator_dashboard(coordinator_id: str, request: Request):
     """Get comprehensive dashboard data for a coordinator"""
@@ -220,7 +365,7 @@ async def get_coordinator_dashboard(coordinator_id: str, request: Request):
                     detail="Authentication required"
                 )
 
-        dashboard = reports_service.get_coordinator_dashboard(coordinator_id)
+        dashboard = await report_executor.run(reports_service.get_coordinator_dashboard, coordinator_id)
 
         if user:
             logger.info(f"Generated coordinator dashboard for user {user['email']}")
@@ -228,6 +373,8 @@ async def get_coordinator_dashboard(coordinator_id: str, request: Request):
             logger.info("Generated coordinator dashboard for unauthenticated access (MOCK mode)")
 
         return dashboard
+    except TimeoutError:
+        raise HTTPException(status_code=504, detail="Report computation timed out")
     except ValueError as e:
         if "not found" in str(e).lower():
             raise HTTPException(status_code=404, detail=str(e))
@@ -251,7 +398,7 @@ async def get_admin_dashboard(request: Request, admin_id: str = "admin_001"):
                     detail="Authentication required"
                 )
 
-        dashboard = reports_service.get_admin_dashboard(admin_id)
+        dashboard = await report_executor.run(reports_service.get_admin_dashboard, admin_id)
 
         if user:
             logger.info(f"Generated admin dashboard for user {user['email']}")
@@ -259,6 +406,8 @@ async def get_admin_dashboard(request: Request, admin_id: str = "admin_001"):
             logger.info("Generated admin dashboard for unauthenticated access (MOCK mode)")
 
         return dashboard
+    except TimeoutError:
+        raise HTTPException(status_code=504, detail="Report computation timed out")
     except ValueError as e:
         if "not found" in str(e).lower():
             raise HTTPException(status_code=404, detail=str(e))
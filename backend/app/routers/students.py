@@ -5,9 +5,15 @@ from .dependencies import get_data_driver
 from ..models.student import StudentListResponse, Student
 from ..models.reports import StudentDashboard
 from ..services.reports_service import reports_service
+from ..services.report_executor import report_executor
 
 router = APIRouter()
 
+# Proyecciones pedidas al driver (sólo los campos que usan estos endpoints)
+COURSE_FIELDS = ("id", "name")
+STUDENT_FIELDS = ("user_id", "course_id", "profile")
+PROGRESS_SUBMISSION_FIELDS = ("user_id", "state", "late", "assigned_grade")
+
 @router.get("/students", response_model=StudentListResponse)
 async def get_all_students(
     page_size: int = Query(10, ge=1, le=100, description="Número de estudiantes por página"),
@@ -20,11 +26,9 @@ async def get_all_students(
     try:
         # Para el driver mock, obtenemos todos los estudiantes de todos los cursos
         all_students = []
-        courses_result = await data_driver.get_courses(page_size=100)
         
-        for course in courses_result.get("courses", []):
-            students_result = await data_driver.get_students(course["id"], page_size=100)
-            for student in students_result.get("students", []):
+        async for course in data_driver.iter_courses(prefetch=True, fields=COURSE_FIELDS):
+            async for student in data_driver.iter_students(course["id"], prefetch=True, fields=STUDENT_FIELDS):
                 # Agregar información del curso al estudiante
                 student["courseId"] = course["id"]
                 student["courseName"] = course["name"]
@@ -83,11 +87,8 @@ async def get_student(
     """Obtener un estudiante específico por ID"""
     try:
         # Buscar el estudiante en todos los cursos
-        courses_result = await data_driver.get_courses(page_size=100)
-        
-        for course in courses_result.get("courses", []):
-            students_result = await data_driver.get_students(course["id"], page_size=100)
-            for student in students_result.get("students", []):
+        async for course in data_driver.iter_courses(prefetch=True, fields=("id",)):
+            async for student in data_driver.iter_students(course["id"], fields=STUDENT_FIELDS):
                 if student.get("user_id") == student_id:
                     return Student(**student)
         
@@ -107,11 +108,9 @@ async def get_student_progress(
         # Buscar el estudiante
         student = None
         course_id = None
-        courses_result = await data_driver.get_courses(page_size=100)
         
-        for course in courses_result.get("courses", []):
-            students_result = await data_driver.get_students(course["id"], page_size=100)
-            for s in students_result.get("students", []):
+        async for course in data_driver.iter_courses(prefetch=True, fields=("id",)):
+            async for s in data_driver.iter_students(course["id"], fields=("user_id",)):
                 if s.get("user_id") == student_id:
                     student = s
                     course_id = course["id"]
@@ -122,33 +121,25 @@ async def get_student_progress(
         if not student:
             raise HTTPException(status_code=404, detail="Student not found")
         
-        # Obtener submissions del estudiante
-        coursework_result = await data_driver.get_coursework(course_id, page_size=100)
-        total_assignments = len(coursework_result.get("courseWork", []))
+        # Obtener submissions del estudiante (stream único por curso en lugar de una llamada por trabajo)
+        total_assignments = len([cw async for cw in data_driver.iter_coursework(course_id, fields=("id",))])
         
         completed_assignments = 0
         late_submissions = 0
         total_grade = 0
         graded_count = 0
         
-        for assignment in coursework_result.get("courseWork", []):
-            submissions_result = await data_driver.get_submissions(
-                course_id, 
-                assignment["id"], 
-                page_size=100
-            )
-            
-            for submission in submissions_result.get("studentSubmissions", []):
-                if submission.get("user_id") == student_id:
-                    if submission.get("state") == "TURNED_IN":
-                        completed_assignments += 1
-                        if submission.get("late"):
-                            late_submissions += 1
-                        
-                        # Calcular promedio de calificaciones
-                        if "assignedGrade" in submission and submission["assignedGrade"] is not None:
-                            total_grade += submission["assignedGrade"]
-                            graded_count += 1
+        async for submission in data_driver.iter_submissions(course_id, prefetch=True, fields=PROGRESS_SUBMISSION_FIELDS):
+            if submission.get("user_id") == student_id:
+                if submission.get("state") == "TURNED_IN":
+                    completed_assignments += 1
+                    if submission.get("late"):
+                        late_submissions += 1
+                    
+                    # Calcular promedio de calificaciones
+                    if submission.get("assigned_grade") is not None:
+                        total_grade += submission["assigned_grade"]
+                        graded_count += 1
         
         average_grade = total_grade / graded_count if graded_count > 0 else 0
         completion_rate = (completed_assignments / total_assignments * 100) if total_assignments > 0 else 0
@@ -186,8 +177,10 @@ async def get_students_by_course(
 async def get_student_dashboard(student_id: str):
     """Get comprehensive dashboard data for a specific student"""
     try:
-        dashboard = reports_service.get_student_dashboard(student_id)
+        dashboard = await report_executor.run(reports_service.get_student_dashboard, student_id)
         return dashboard
+    except TimeoutError:
+        raise HTTPException(status_code=504, detail="Report computation timed out")
     except ValueError as e:
         if "not found" in str(e).lower():
             raise HTTPException(status_code=404, detail=str(e))
@@ -200,3 +193,4 @@ async def get_student_dashboard(student_id: str):
 # - Ruta /courses/{course_id}/students para relación curso-estudiantes
 # - Validación de parámetros de ruta y query
 # - Manejo consistente de errores
+# - Proyecciones de campos declaradas por endpoint
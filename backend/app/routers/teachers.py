@@ -5,6 +5,7 @@ from ..services.base import BaseDataDriver
 from .dependencies import get_data_driver
 from ..models.reports import TeacherDashboard
 from ..services.reports_service import reports_service
+from ..services.report_executor import report_executor
 
 router = APIRouter()
 
@@ -126,10 +127,11 @@ async def get_teacher_courses(
         course_ids = teacher_info["courses"]
         
         # Obtener información detallada de los cursos
-        courses_result = await data_driver.get_courses(page_size=100)
         teacher_courses = []
         
-        for course in courses_result.get("courses", []):
+        async for course in data_driver.iter_courses(
+            prefetch=True, fields=("id", "name", "section", "description", "course_state")
+        ):
             if course["id"] in course_ids:
                 teacher_courses.append({
                     "id": course["id"],
@@ -161,8 +163,10 @@ async def identify_teacher_google(
 async def get_teacher_dashboard(teacher_id: str):
     """Get comprehensive dashboard data for a specific teacher"""
     try:
-        dashboard = reports_service.get_teacher_dashboard(teacher_id)
+        dashboard = await report_executor.run(reports_service.get_teacher_dashboard, teacher_id)
         return dashboard
+    except TimeoutError:
+        raise HTTPException(status_code=504, detail="Report computation timed out")
     except ValueError as e:
         if "not found" in str(e).lower():
             raise HTTPException(status_code=404, detail=str(e))
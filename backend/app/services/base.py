@@ -1,6 +1,11 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+import asyncio
 import os
+from .projection import FieldMask
+
+# Lecturas en paralelo al armar bundles de cursos
+BUNDLE_MAX_CONCURRENCY = max(1, int(os.getenv('DRIVER_BUNDLE_CONCURRENCY', '8')))
 
 
 class BaseDataDriver(ABC):
@@ -10,56 +15,265 @@ class BaseDataDriver(ABC):
         self.driver_type = self.__class__.__name__.lower().replace('driver', '')
     
     @abstractmethod
-    async def get_courses(self, page_size: int = 10, page_token: Optional[str] = None) -> Dict[str, Any]:
+    async def get_courses(self, page_size: int = 10, page_token: Optional[str] = None, fields: FieldMask = None) -> Dict[str, Any]:
         """Obtener lista de cursos"""
         pass
     
     @abstractmethod
-    async def get_course(self, course_id: str) -> Dict[str, Any]:
+    async def get_course(self, course_id: str, fields: FieldMask = None) -> Dict[str, Any]:
         """Obtener un curso específico"""
         pass
     
     @abstractmethod
-    async def get_students(self, course_id: str, page_size: int = 10, page_token: Optional[str] = None) -> Dict[str, Any]:
+    async def get_students(self, course_id: str, page_size: int = 10, page_token: Optional[str] = None, fields: FieldMask = None) -> Dict[str, Any]:
         """Obtener estudiantes de un curso"""
         pass
     
     @abstractmethod
-    async def get_coursework(self, course_id: str, page_size: int = 10, page_token: Optional[str] = None) -> Dict[str, Any]:
+    async def get_coursework(self, course_id: str, page_size: int = 10, page_token: Optional[str] = None, fields: FieldMask = None) -> Dict[str, Any]:
         """Obtener trabajos de curso"""
         pass
     
     @abstractmethod
-    async def get_submissions(self, course_id: str, coursework_id: str, page_size: int = 10, page_token: Optional[str] = None) -> Dict[str, Any]:
+    async def get_submissions(self, course_id: str, coursework_id: str, page_size: int = 10, page_token: Optional[str] = None, fields: FieldMask = None) -> Dict[str, Any]:
         """Obtener entregas de estudiantes"""
         pass
     
     @abstractmethod
-    async def get_user_profile(self, user_id: str) -> Dict[str, Any]:
+    async def get_user_profile(self, user_id: str, fields: FieldMask = None) -> Dict[str, Any]:
         """Obtener perfil de usuario"""
         pass
 
+    async def get_submissions_batch(self, course_id: str, coursework_ids: List[str], page_size: int = 100, fields: FieldMask = None) -> Dict[str, List[Dict[str, Any]]]:
+        """Obtener todas las entregas de varios trabajos de un curso, agrupadas por trabajo"""
+        results = {}
+        for coursework_id in coursework_ids:
+            results[coursework_id] = [
+                submission async for submission in self.iter_submissions(course_id, coursework_id, page_size=page_size, fields=fields)
+            ]
+        return results
+    
+    async def list_course_submissions(self, course_id: str, page_size: int = 10, page_token: Optional[str] = None, fields: FieldMask = None) -> Dict[str, Any]:
+        """Obtener todas las entregas de un curso como un único stream paginado"""
+        # Implementación genérica: recorre los trabajos y pagina el resultado combinado
+        coursework_ids = [cw['id'] async for cw in self.iter_coursework(course_id, fields=('id',))]
+        
+        grouped = await self.get_submissions_batch(course_id, coursework_ids, page_size=100, fields=fields)
+        course_submissions = [s for coursework_id in coursework_ids for s in grouped.get(coursework_id, [])]
+        
+        start_index = int(page_token) if page_token and page_token.isdigit() else 0
+        end_index = start_index + page_size
+        return {
+            'student_submissions': course_submissions[start_index:end_index],
+            'next_page_token': str(end_index) if end_index < len(course_submissions) else None,
+            'total_items': len(course_submissions)
+        }
+    
+    async def _iter_pages(
+        self,
+        fetch_page: Callable[[Optional[str]], Awaitable[Dict[str, Any]]],
+        items_key: str,
+        prefetch: bool = False
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Recorrer páginas siguiendo next_page_token de forma perezosa"""
+        page = await fetch_page(None)
+        while True:
+            next_page_token = page.get('next_page_token')
+            # Pre-cargar la siguiente página mientras se consume la actual
+            next_page = asyncio.ensure_future(fetch_page(next_page_token)) if prefetch and next_page_token else None
+            try:
+                for item in page.get(items_key, []):
+                    yield item
+            except BaseException:
+                if next_page is not None:
+                    next_page.cancel()
+                raise
+            
+            if not next_page_token:
+                return
+            page = await next_page if next_page is not None else await fetch_page(next_page_token)
+    
+    def iter_courses(self, page_size: int = 100, prefetch: bool = False, fields: FieldMask = None) -> AsyncIterator[Dict[str, Any]]:
+        """Iterar todos los cursos siguiendo la paginación"""
+        return self._iter_pages(
+            lambda token: self.get_courses(page_size=page_size, page_token=token, fields=fields),
+            'courses', prefetch
+        )
+    
+    def iter_students(self, course_id: str, page_size: int = 100, prefetch: bool = False, fields: FieldMask = None) -> AsyncIterator[Dict[str, Any]]:
+        """Iterar todos los estudiantes de un curso siguiendo la paginación"""
+        return self._iter_pages(
+            lambda token: self.get_students(course_id, page_size=page_size, page_token=token, fields=fields),
+            'students', prefetch
+        )
+    
+    def iter_coursework(self, course_id: str, page_size: int = 100, prefetch: bool = False, fields: FieldMask = None) -> AsyncIterator[Dict[str, Any]]:
+        """Iterar todos los trabajos de un curso siguiendo la paginación"""
+        return self._iter_pages(
+            lambda token: self.get_coursework(course_id, page_size=page_size, page_token=token, fields=fields),
+            'course_work', prefetch
+        )
+    
+    def iter_submissions(self, course_id: str, coursework_id: Optional[str] = None, page_size: int = 100, prefetch: bool = False, fields: FieldMask = None) -> AsyncIterator[Dict[str, Any]]:
+        """Iterar entregas de un trabajo, o de todo el curso si no se indica trabajo"""
+        if coursework_id is None:
+            fetch_page = lambda token: self.list_course_submissions(course_id, page_size=page_size, page_token=token, fields=fields)
+        else:
+            fetch_page = lambda token: self.get_submissions(course_id, coursework_id, page_size=page_size, page_token=token, fields=fields)
+        return self._iter_pages(fetch_page, 'student_submissions', prefetch)
+    
+    async def get_course_bundle(
+        self,
+        course_id: str,
+        fields: Optional[Dict[str, FieldMask]] = None,
+        semaphore: Optional[asyncio.Semaphore] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Obtener curso, estudiantes, trabajos y entregas en paralelo como una sola estructura"""
+        fields = fields or {}
+        semaphore = semaphore or asyncio.Semaphore(BUNDLE_MAX_CONCURRENCY)
+        
+        async def bounded(fetch: Callable[[], Awaitable[Any]]) -> Any:
+            async with semaphore:
+                return await fetch()
+        
+        async def collect(items: AsyncIterator[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            return [item async for item in items]
+        
+        # Las cuatro lecturas son independientes: el tiempo total es el de la más lenta
+        course, students, course_work, submissions = await asyncio.gather(
+            bounded(lambda: self.get_course(course_id, fields=fields.get('course'))),
+            bounded(lambda: collect(self.iter_students(course_id, prefetch=True, fields=fields.get('students')))),
+            bounded(lambda: collect(self.iter_coursework(course_id, prefetch=True, fields=fields.get('course_work')))),
+            bounded(lambda: collect(self.iter_submissions(course_id, prefetch=True, fields=fields.get('student_submissions'))))
+        )
+        if course is None:
+            return None
+        
+        return {
+            'course': course,
+            'students': students,
+            'course_work': course_work,
+            'student_submissions': submissions
+        }
+    
+    async def get_course_bundles(
+        self,
+        course_ids: List[str],
+        fields: Optional[Dict[str, FieldMask]] = None,
+        max_concurrency: Optional[int] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """Obtener bundles de varios cursos en paralelo con un límite global de llamadas en curso"""
+        semaphore = asyncio.Semaphore(max_concurrency or BUNDLE_MAX_CONCURRENCY)
+        bundles = await asyncio.gather(*(
+            self.get_course_bundle(course_id, fields=fields, semaphore=semaphore) for course_id in course_ids
+        ))
+        return {course_id: bundle for course_id, bundle in zip(course_ids, bundles) if bundle is not None}
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Métricas propias del driver (vacío por defecto)"""
+        return {}
+    
+    def get_data_version(self) -> Optional[str]:
+        """Versión de los datos servidos (None = datos en vivo, no versionables)"""
+        return None
+    
+    async def close(self) -> None:
+        """Liberar recursos del driver (conexiones, pools)"""
+        return None
+
+
+class DataDriverWrapper(BaseDataDriver):
+    """Driver que delega en otro driver (base para capas intermedias)"""
+    
+    def __init__(self, inner: BaseDataDriver):
+        super().__init__()
+        self.inner = inner
+        # Se reporta el tipo del driver de origen (mock, google, ...)
+        self.driver_type = inner.driver_type
+    
+    @staticmethod
+    def _copy(value: Any) -> Any:
+        """Copia superficial de páginas para que los llamadores no alteren resultados compartidos"""
+        if isinstance(value, dict):
+            return {
+                key: [dict(item) if isinstance(item, dict) else item for item in items] if isinstance(items, list) else items
+                for key, items in value.items()
+            }
+        return value
+    
+    async def get_courses(self, page_size: int = 10, page_token: Optional[str] = None, fields: FieldMask = None) -> Dict[str, Any]:
+        return await self.inner.get_courses(page_size=page_size, page_token=page_token, fields=fields)
+    
+    async def get_course(self, course_id: str, fields: FieldMask = None) -> Dict[str, Any]:
+        return await self.inner.get_course(course_id, fields=fields)
+    
+    async def get_students(self, course_id: str, page_size: int = 10, page_token: Optional[str] = None, fields: FieldMask = None) -> Dict[str, Any]:
+        return await self.inner.get_students(course_id, page_size=page_size, page_token=page_token, fields=fields)
+    
+    async def get_coursework(self, course_id: str, page_size: int = 10, page_token: Optional[str] = None, fields: FieldMask = None) -> Dict[str, Any]:
+        return await self.inner.get_coursework(course_id, page_size=page_size, page_token=page_token, fields=fields)
+    
+    async def get_submissions(self, course_id: str, coursework_id: str, page_size: int = 10, page_token: Optional[str] = None, fields: FieldMask = None) -> Dict[str, Any]:
+        return await self.inner.get_submissions(course_id, coursework_id, page_size=page_size, page_token=page_token, fields=fields)
+    
+    async def get_user_profile(self, user_id: str, fields: FieldMask = None) -> Dict[str, Any]:
+        return await self.inner.get_user_profile(user_id, fields=fields)
+    
+    async def get_submissions_batch(self, course_id: str, coursework_ids: List[str], page_size: int = 100, fields: FieldMask = None) -> Dict[str, List[Dict[str, Any]]]:
+        return await self.inner.get_submissions_batch(course_id, coursework_ids, page_size=page_size, fields=fields)
+    
+    async def list_course_submissions(self, course_id: str, page_size: int = 10, page_token: Optional[str] = None, fields: FieldMask = None) -> Dict[str, Any]:
+        return await self.inner.list_course_submissions(course_id, page_size=page_size, page_token=page_token, fields=fields)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return self.inner.get_stats()
+    
+    def get_data_version(self) -> Optional[str]:
+        return self.inner.get_data_version()
+    
+    async def close(self) -> None:
+        await self.inner.close()
+
 
 class DataDriverFactory:
     """Factory para crear drivers de datos"""
     
     @staticmethod
-    def create_driver(driver_type: str = None) -> BaseDataDriver:
-        """Crear driver de datos según el tipo especificado"""
+    def create_driver(driver_type: str = None, wrap: bool = True) -> BaseDataDriver:
+        """Crear driver de datos según el tipo especificado (wrap=False omite capas intermedias)"""
         if driver_type is None:
             driver_type = os.getenv('DATA_DRIVER', 'mock')
         
         if driver_type == 'mock':
             from .mock_driver import MockDataDriver
-            return MockDataDriver()
+            driver = MockDataDriver()
         elif driver_type == 'google':
             from .google_driver import GoogleDataDriver
-            return GoogleDataDriver()
+            driver = GoogleDataDriver()
+        elif driver_type == 'snapshot':
+            from .snapshot_driver import SnapshotDataDriver
+            driver = SnapshotDataDriver()
         else:
             raise ValueError(f"Driver type '{driver_type}' not supported")
+        
+        # Coalescencia opcional: llamadas idénticas concurrentes comparten una sola llamada
+        if wrap and os.getenv('DRIVER_COALESCE', 'false').lower() == 'true':
+            from .coalescing_driver import CoalescingDataDriver
+            driver = CoalescingDataDriver(driver)
+        
+        # Capa de caché opcional delante del driver de origen
+        if wrap and os.getenv('DRIVER_CACHE', 'false').lower() == 'true':
+            from .caching_driver import CachingDataDriver
+            driver = CachingDataDriver(driver)
+        
+        return driver
 
 
 # LECCIÓN APRENDIDA: Patrón Factory para drivers de datos
 # - Abstracción clara entre MOCK y GOOGLE
 # - Fácil extensión para nuevos drivers
 # - Configuración via variable de entorno
+# - Wrappers (DataDriverWrapper) para componer capas: caché(coalescencia(origen))
+# - Iteradores asíncronos que siguen next_page_token (con prefetch opcional)
+# - Proyección de campos (fields) declarada por cada llamador
+# - Bundles de curso: lecturas independientes en paralelo con límite de concurrencia
@@ -0,0 +1,244 @@
+"""
+Driver con caché read-through (TTL por método y desalojo LRU)
+"""
+
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .base import BaseDataDriver, DataDriverWrapper
+from .projection import FieldMask, normalize_fields
+
+
+class _CacheEntry:
+    """Valor cacheado con vencimiento, tamaño estimado y etiquetas de invalidación"""
+
+    __slots__ = ('value', 'expires_at', 'size', 'course_id', 'user_id')
+
+    def __init__(self, value: Any, expires_at: float, size: int, course_id: Optional[str], user_id: Optional[str]):
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+        self.course_id = course_id
+        self.user_id = user_id
+
+
+class CachingDataDriver(DataDriverWrapper):
+    """Caché read-through delante de cualquier BaseDataDriver"""
+
+    # TTL en segundos: los cursos cambian poco, las entregas cambian seguido
+    DEFAULT_TTLS = {
+        'get_courses': 600,
+        'get_course': 600,
+        'get_students': 300,
+        'get_coursework': 300,
+        'get_submissions': 60,
+        'get_submissions_batch': 60,
+        'list_course_submissions': 60,
+        'get_user_profile': 3600,
+    }
+
+    def __init__(
+        self,
+        inner: BaseDataDriver,
+        ttls: Optional[Dict[str, float]] = None,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None
+    ):
+        super().__init__(inner)
+        self.ttls = {**self.DEFAULT_TTLS, **self._parse_ttls(os.getenv('DRIVER_CACHE_TTLS', '')), **(ttls or {})}
+        self.max_entries = max_entries or int(os.getenv('DRIVER_CACHE_MAX_ENTRIES', '2048'))
+        self.max_bytes = max_bytes or int(os.getenv('DRIVER_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+
+        self._entries: 'OrderedDict[Tuple, _CacheEntry]' = OrderedDict()
+        self._keys_by_course: Dict[str, set] = {}
+        self._keys_by_user: Dict[str, set] = {}
+        self._bytes = 0
+        self._counters = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0}
+
+    @staticmethod
+    def _parse_ttls(value: str) -> Dict[str, float]:
+        """Parsear TTLs con formato 'get_courses=600,get_submissions=30'"""
+        ttls = {}
+        for item in value.split(','):
+            if '=' in item:
+                method, seconds = item.split('=', 1)
+                ttls[method.strip()] = float(seconds)
+        return ttls
+
+    @staticmethod
+    def _estimate_size(value: Any) -> int:
+        """Tamaño aproximado en bytes (serialización JSON)"""
+        return len(json.dumps(value, default=str))
+
+    async def _cached(
+        self,
+        method: str,
+        args: Tuple,
+        loader: Callable,
+        course_id: Optional[str] = None,
+        user_id: Optional[str] = None
+    ) -> Any:
+        """Servir desde caché o cargar desde el driver interno"""
+        key = (method,) + args
+        now = time.monotonic()
+        entry = self._entries.get(key)
+
+        if entry is not None:
+            if entry.expires_at > now:
+                self._entries.move_to_end(key)
+                self._counters['hits'] += 1
+                return self._copy(entry.value)
+            self._remove(key)
+            self._counters['expirations'] += 1
+
+        self._counters['misses'] += 1
+        value = await loader()
+        self._store(key, value, now + self.ttls.get(method, 60), course_id, user_id)
+        return self._copy(value)
+
+    def _store(self, key: Tuple, value: Any, expires_at: float, course_id: Optional[str], user_id: Optional[str]) -> None:
+        """Guardar entrada y desalojar las menos usadas si se supera el presupuesto"""
+        if key in self._entries:
+            self._remove(key)
+
+        size = self._estimate_size(value)
+        if size > self.max_bytes:
+            return
+
+        self._entries[key] = _CacheEntry(value, expires_at, size, course_id, user_id)
+        self._bytes += size
+        if course_id is not None:
+            self._keys_by_course.setdefault(course_id, set()).add(key)
+        if user_id is not None:
+            self._keys_by_user.setdefault(user_id, set()).add(key)
+
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self._counters['evictions'] += 1
+
+    def _remove(self, key: Tuple) -> None:
+        """Eliminar entrada y sus etiquetas"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry.size
+        if entry.course_id is not None:
+            self._keys_by_course.get(entry.course_id, set()).discard(key)
+        if entry.user_id is not None:
+            self._keys_by_user.get(entry.user_id, set()).discard(key)
+
+    def invalidate_course(self, course_id: str) -> int:
+        """Invalidar todas las entradas de un curso (y los listados de cursos)"""
+        keys = set(self._keys_by_course.pop(course_id, set()))
+        keys.update(key for key in self._entries if key[0] == 'get_courses')
+        for key in keys:
+            self._remove(key)
+        self._counters['invalidations'] += len(keys)
+        return len(keys)
+
+    def invalidate_user(self, user_id: str) -> int:
+        """Invalidar todas las entradas de un usuario"""
+        keys = self._keys_by_user.pop(user_id, set())
+        for key in list(keys):
+            self._remove(key)
+        self._counters['invalidations'] += len(keys)
+        return len(keys)
+
+    def invalidate_all(self) -> int:
+        """Vaciar la caché"""
+        count = len(self._entries)
+        self._entries.clear()
+        self._keys_by_course.clear()
+        self._keys_by_user.clear()
+        self._bytes = 0
+        self._counters['invalidations'] += count
+        return count
+
+    async def get_courses(self, page_size: int = 10, page_token: Optional[str] = None, fields: FieldMask = None) -> Dict[str, Any]:
+        """Obtener lista de cursos (cacheada)"""
+        return await self._cached(
+            'get_courses', (page_size, page_token, normalize_fields(fields)),
+            lambda: self.inner.get_courses(page_size=page_size, page_token=page_token, fields=fields)
+        )
+
+    async def get_course(self, course_id: str, fields: FieldMask = None) -> Dict[str, Any]:
+        """Obtener un curso específico (cacheado)"""
+        return await self._cached(
+            'get_course', (course_id, normalize_fields(fields)),
+            lambda: self.inner.get_course(course_id, fields=fields),
+            course_id=course_id
+        )
+
+    async def get_students(self, course_id: str, page_size: int = 10, page_token: Optional[str] = None, fields: FieldMask = None) -> Dict[str, Any]:
+        """Obtener estudiantes de un curso (cacheado)"""
+        return await self._cached(
+            'get_students', (course_id, page_size, page_token, normalize_fields(fields)),
+            lambda: self.inner.get_students(course_id, page_size=page_size, page_token=page_token, fields=fields),
+            course_id=course_id
+        )
+
+    async def get_coursework(self, course_id: str, page_size: int = 10, page_token: Optional[str] = None, fields: FieldMask = None) -> Dict[str, Any]:
+        """Obtener trabajos de curso (cacheado)"""
+        return await self._cached(
+            'get_coursework', (course_id, page_size, page_token, normalize_fields(fields)),
+            lambda: self.inner.get_coursework(course_id, page_size=page_size, page_token=page_token, fields=fields),
+            course_id=course_id
+        )
+
+    async def get_submissions(self, course_id: str, coursework_id: str, page_size: int = 10, page_token: Optional[str] = None, fields: FieldMask = None) -> Dict[str, Any]:
+        """Obtener entregas de un trabajo (cacheado)"""
+        return await self._cached(
+            'get_submissions', (course_id, coursework_id, page_size, page_token, normalize_fields(fields)),
+            lambda: self.inner.get_submissions(course_id, coursework_id, page_size=page_size, page_token=page_token, fields=fields),
+            course_id=course_id
+        )
+
+    async def get_submissions_batch(self, course_id: str, coursework_ids: List[str], page_size: int = 100, fields: FieldMask = None) -> Dict[str, List[Dict[str, Any]]]:
+        """Obtener entregas de varios trabajos (cacheado)"""
+        return await self._cached(
+            'get_submissions_batch', (course_id, tuple(coursework_ids), page_size, normalize_fields(fields)),
+            lambda: self.inner.get_submissions_batch(course_id, coursework_ids, page_size=page_size, fields=fields),
+            course_id=course_id
+        )
+
+    async def list_course_submissions(self, course_id: str, page_size: int = 10, page_token: Optional[str] = None, fields: FieldMask = None) -> Dict[str, Any]:
+        """Obtener todas las entregas de un curso (cacheado)"""
+        return await self._cached(
+            'list_course_submissions', (course_id, page_size, page_token, normalize_fields(fields)),
+            lambda: self.inner.list_course_submissions(course_id, page_size=page_size, page_token=page_token, fields=fields),
+            course_id=course_id
+        )
+
+    async def get_user_profile(self, user_id: str, fields: FieldMask = None) -> Dict[str, Any]:
+        """Obtener perfil de usuario (cacheado)"""
+        return await self._cached(
+            'get_user_profile', (user_id, normalize_fields(fields)),
+            lambda: self.inner.get_user_profile(user_id, fields=fields),
+            user_id=user_id
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Métricas de la caché y del driver interno"""
+        lookups = self._counters['hits'] + self._counters['misses']
+        return {
+            **self.inner.get_stats(),
+            'cache': {
+                **self._counters,
+                'hit_ratio': round(self._counters['hits'] / lookups, 3) if lookups else 0.0,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+            }
+        }
+
+
+# LECCIÓN APRENDIDA: Caché read-through delante del driver
+# - TTL por método según frecuencia de cambio de cada recurso
+# - Presupuesto LRU por cantidad de entradas y bytes estimados
+# - Invalidación explícita por curso o usuario
+# - La proyección (fields) forma parte de la clave
@@ -0,0 +1,124 @@
+"""
+Driver con coalescencia de llamadas (single-flight)
+Llamadas idénticas concurrentes comparten una sola llamada al driver interno
+"""
+
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .base import BaseDataDriver, DataDriverWrapper
+from .projection import FieldMask, normalize_fields
+
+
+class CoalescingDataDriver(DataDriverWrapper):
+    """Single-flight delante de cualquier BaseDataDriver"""
+
+    def __init__(self, inner: BaseDataDriver):
+        super().__init__(inner)
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    def _release(self, key: Tuple, future: asyncio.Future) -> None:
+        """Quitar la llamada en curso al terminar"""
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        # Marcar la excepción como leída aunque todos los llamadores hayan cancelado
+        if not future.cancelled():
+            future.exception()
+
+    async def _coalesced(self, method: str, args: Tuple, loader: Callable) -> Any:
+        """Unirse a la llamada en curso con la misma clave o iniciar una nueva"""
+        key = (method,) + args
+        counters = self._counters.setdefault(method, {'calls': 0, 'upstream_calls': 0, 'coalesced': 0})
+        counters['calls'] += 1
+
+        future = self._inflight.get(key)
+        if future is None:
+            counters['upstream_calls'] += 1
+            future = asyncio.ensure_future(loader())
+            self._inflight[key] = future
+            future.add_done_callback(lambda done: self._release(key, done))
+        else:
+            counters['coalesced'] += 1
+
+        # shield: si un llamador cancela, la llamada compartida sigue para los demás
+        result = await asyncio.shield(future)
+        return self._copy(result)
+
+    async def get_courses(self, page_size: int = 10, page_token: Optional[str] = None, fields: FieldMask = None) -> Dict[str, Any]:
+        """Obtener lista de cursos (coalescida)"""
+        return await self._coalesced(
+            'get_courses', (page_size, page_token, normalize_fields(fields)),
+            lambda: self.inner.get_courses(page_size=page_size, page_token=page_token, fields=fields)
+        )
+
+    async def get_course(self, course_id: str, fields: FieldMask = None) -> Dict[str, Any]:
+        """Obtener un curso específico (coalescido)"""
+        return await self._coalesced('get_course', (course_id, normalize_fields(fields)), lambda: self.inner.get_course(course_id, fields=fields))
+
+    async def get_students(self, course_id: str, page_size: int = 10, page_token: Optional[str] = None, fields: FieldMask = None) -> Dict[str, Any]:
+        """Obtener estudiantes de un curso (coalescido)"""
+        return await self._coalesced(
+            'get_students', (course_id, page_size, page_token, normalize_fields(fields)),
+            lambda: self.inner.get_students(course_id, page_size=page_size, page_token=page_token, fields=fields)
+        )
+
+    async def get_coursework(self, course_id: str, page_size: int = 10, page_token: Optional[str] = None, fields: FieldMask = None) -> Dict[str, Any]:
+        """Obtener trabajos de curso (coalescido)"""
+        return await self._coalesced(
+            'get_coursework', (course_id, page_size, page_token, normalize_fields(fields)),
+            lambda: self.inner.get_coursework(course_id, page_size=page_size, page_token=page_token, fields=fields)
+        )
+
+    async def get_submissions(self, course_id: str, coursework_id: str, page_size: int = 10, page_token: Optional[str] = None, fields: FieldMask = None) -> Dict[str, Any]:
+        """Obtener entregas de un trabajo (coalescido)"""
+        return await self._coalesced(
+            'get_submissions', (course_id, coursework_id, page_size, page_token, normalize_fields(fields)),
+            lambda: self.inner.get_submissions(course_id, coursework_id, page_size=page_size, page_token=page_token, fields=fields)
+        )
+
+    async def get_submissions_batch(self, course_id: str, coursework_ids: List[str], page_size: int = 100, fields: FieldMask = None) -> Dict[str, List[Dict[str, Any]]]:
+        """Obtener entregas de varios trabajos (coalescido)"""
+        return await self._coalesced(
+            'get_submissions_batch', (course_id, tuple(coursework_ids), page_size, normalize_fields(fields)),
+            lambda: self.inner.get_submissions_batch(course_id, coursework_ids, page_size=page_size, fields=fields)
+        )
+
+    async def list_course_submissions(self, course_id: str, page_size: int = 10, page_token: Optional[str] = None, fields: FieldMask = None) -> Dict[str, Any]:
+        """Obtener todas las entregas de un curso (coalescido)"""
+        return await self._coalesced(
+            'list_course_submissions', (course_id, page_size, page_token, normalize_fields(fields)),
+            lambda: self.inner.list_course_submissions(course_id, page_size=page_size, page_token=page_token, fields=fields)
+        )
+
+    async def get_user_profile(self, user_id: str, fields: FieldMask = None) -> Dict[str, Any]:
+        """Obtener perfil de usuario (coalescido)"""
+        return await self._coalesced('get_user_profile', (user_id, normalize_fields(fields)), lambda: self.inner.get_user_profile(user_id, fields=fields))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Métricas de coalescencia por método y del driver interno"""
+        calls = sum(counters['calls'] for counters in self._counters.values())
+        coalesced = sum(counters['coalesced'] for counters in self._counters.values())
+        return {
+            **self.inner.get_stats(),
+            'coalescing': {
+                'calls': calls,
+                'upstream_calls': calls - coalesced,
+                'coalesced': coalesced,
+                'coalescing_ratio': round(coalesced / calls, 3) if calls else 0.0,
+                'in_flight': len(self._inflight),
+                'methods': {
+                    method: {
+                        **counters,
+                        'coalescing_ratio': round(counters['coalesced'] / counters['calls'], 3) if counters['calls'] else 0.0,
+                    }
+                    for method, counters in self._counters.items()
+                },
+            }
+        }
+
+
+# LECCIÓN APRENDIDA: Coalescencia de llamadas (single-flight)
+# - Clave = método + argumentos (incluida la proyección); los llamadores concurrentes esperan el mismo future
+# - La entrada se libera al terminar: no es una caché, sólo deduplica lo que está en vuelo
+# - Copia superficial del resultado para que nadie altere lo que reciben los demás
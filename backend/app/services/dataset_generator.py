@@ -0,0 +1,321 @@
+"""
+Generador determinista de datasets MOCK a escala configurable
+Escribe los mismos archivos que data/mock (un registro JSON por línea) sin retener el dataset en memoria
+
+Uso:
+    python -m app.services.dataset_generator --out data/generated --courses 500 --students 100000 --submissions 5000000
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+
+DEFAULT_MOCK_DATA_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'mock')
+MANIFEST_FILE = 'manifest.json'
+
+GIVEN_NAMES = [
+    'Juan', 'María', 'Carlos', 'Ana', 'Luis', 'Lucía', 'Jorge', 'Sofía', 'Diego', 'Valentina',
+    'Martín', 'Camila', 'Pedro', 'Florencia', 'Pablo', 'Julieta', 'Tomás', 'Agustina', 'Mateo', 'Paula'
+]
+FAMILY_NAMES = [
+    'Pérez', 'González', 'Rodríguez', 'Fernández', 'López', 'Martínez', 'García', 'Sánchez', 'Romero', 'Díaz',
+    'Álvarez', 'Torres', 'Ruiz', 'Ramírez', 'Flores', 'Acosta', 'Benítez', 'Medina', 'Herrera', 'Suárez'
+]
+COURSE_TOPICS = [
+    'Ecommerce', 'Marketing Digital', 'Desarrollo Web', 'Análisis de Datos', 'Diseño UX',
+    'Programación Python', 'Gestión de Proyectos', 'Redes Sociales', 'Logística', 'Finanzas'
+]
+
+
+def mock_data_dir() -> str:
+    """Directorio de fixtures MOCK (configurable con MOCK_DATA_DIR)"""
+    return os.getenv('MOCK_DATA_DIR') or DEFAULT_MOCK_DATA_DIR
+
+
+def load_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Leer un archivo de fixtures registro a registro
+
+    Los archivos generados tienen un registro por línea y se leen en streaming;
+    los fixtures escritos a mano (JSON indentado) se leen completos.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        if f.readline().strip() != '[':
+            f.seek(0)
+            yield from json.load(f)
+            return
+
+        for line_number, line in enumerate(f):
+            line = line.strip().rstrip(',')
+            if not line or line == ']':
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                if line_number > 0:
+                    raise
+                # JSON indentado: no es un registro por línea
+                f.seek(0)
+                yield from json.load(f)
+                return
+            yield record
+
+
+def is_generated_dataset(data_dir: str) -> bool:
+    """Indica si el directorio fue escrito por este generador"""
+    return os.path.exists(os.path.join(data_dir, MANIFEST_FILE))
+
+
+def _iso(moment: datetime) -> str:
+    """Timestamp RFC 3339 como los de Classroom"""
+    return moment.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _write_records(path: str, records: Iterable[Dict[str, Any]]) -> int:
+    """Escribir un arreglo JSON con un registro por línea (streaming)"""
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('[\n')
+        for record in records:
+            if count:
+                f.write(',\n')
+            f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')))
+            count += 1
+        f.write('\n]\n' if count else ']\n')
+    return count
+
+
+class DatasetGenerator:
+    """Generador de fixtures con la misma forma que data/mock"""
+
+    def __init__(
+        self,
+        courses: int = 10,
+        students: int = 1000,
+        submissions: int = 20000,
+        teachers: Optional[int] = None,
+        late_rate: float = 0.12,
+        missing_rate: float = 0.15,
+        seed: int = 42,
+        start_date: str = '2024-01-15'
+    ):
+        if courses < 1 or students < 1:
+            raise ValueError("courses and students must be at least 1")
+        if not 0 <= late_rate <= 1 or not 0 <= missing_rate <= 1:
+            raise ValueError("late_rate and missing_rate must be between 0 and 1")
+
+        self.courses = courses
+        self.students = students
+        self.submissions = max(0, submissions)
+        self.teachers = teachers or max(1, math.ceil(courses / 4))
+        self.late_rate = late_rate
+        self.missing_rate = missing_rate
+        self.seed = seed
+        self.start = datetime.fromisoformat(start_date).replace(hour=10, tzinfo=timezone.utc)
+
+        # Una entrega por (estudiante, tarea), incluida con probabilidad fija para aproximar el total pedido
+        self.coursework_per_course = max(1, math.ceil(self.submissions / self.students)) if self.submissions else 0
+        pairs = self.students * self.coursework_per_course
+        self.submission_probability = self.submissions / pairs if pairs else 0.0
+
+    def _rng(self, stream: str) -> random.Random:
+        """Generador independiente por archivo: cada archivo es reproducible por sí solo"""
+        return random.Random(f"{self.seed}:{stream}")
+
+    def _course_students(self, course_index: int) -> range:
+        """Índices de estudiantes de un curso (asignación round-robin, sin tablas en memoria)"""
+        return range(course_index, self.students, self.courses)
+
+    def _course_created(self, course_index: int) -> datetime:
+        return self.start + timedelta(days=(course_index * 7) % 180)
+
+    def _coursework_due(self, course_index: int, work_index: int) -> datetime:
+        created = self._course_created(course_index) + timedelta(days=7 * work_index + 14)
+        return created.replace(hour=23, minute=59, second=59)
+
+    def iter_courses(self) -> Iterator[Dict[str, Any]]:
+        for c in range(self.courses):
+            topic = COURSE_TOPICS[c % len(COURSE_TOPICS)]
+            created = _iso(self._course_created(c))
+            course_id = f"course_{c + 1}"
+            yield {
+                'id': course_id,
+                'name': f"{topic} {c // len(COURSE_TOPICS) + 1}",
+                'section': f"Cohorte {self._course_created(c).year}-{c % 2 + 1}",
+                'description': f"Curso de {topic}",
+                'room': 'Aula Virtual',
+                'owner_id': f"teacher_{c % self.teachers + 1}",
+                'creation_time': created,
+                'update_time': created,
+                'course_state': 'ACTIVE',
+                'alternate_link': f"https://classroom.google.com/c/{course_id}",
+            }
+
+    def iter_students(self) -> Iterator[Dict[str, Any]]:
+        rng = self._rng('students')
+        for c in range(self.courses):
+            for s in self._course_students(c):
+                given_name = rng.choice(GIVEN_NAMES)
+                family_name = rng.choice(FAMILY_NAMES)
+                user_id = f"student_{s + 1}"
+                yield {
+                    'user_id': user_id,
+                    'course_id': f"course_{c + 1}",
+                    'profile': {
+                        'id': user_id,
+                        'name': {
+                            'given_name': given_name,
+                            'family_name': family_name,
+                            'full_name': f"{given_name} {family_name}"
+                        },
+                        'email_address': f"{user_id}@example.com",
+                        'photo_url': None,
+                        'verified_teacher': False
+                    }
+                }
+
+    def iter_coursework(self) -> Iterator[Dict[str, Any]]:
+        for c in range(self.courses):
+            for w in range(self.coursework_per_course):
+                due = self._coursework_due(c, w)
+                created = _iso(due - timedelta(days=14))
+                yield {
+                    'id': f"coursework_{c * self.coursework_per_course + w + 1}",
+                    'course_id': f"course_{c + 1}",
+                    'title': f"Trabajo {w + 1}",
+                    'state': 'PUBLISHED',
+                    'creation_time': created,
+                    'update_time': created,
+                    'due_date': _iso(due),
+                    'due_time': '23:59',
+                    'max_points': 100.0,
+                    'work_type': 'ASSIGNMENT',
+                    'creator_user_id': f"teacher_{c % self.teachers + 1}",
+                }
+
+    def iter_submissions(self) -> Iterator[Dict[str, Any]]:
+        rng = self._rng('submissions')
+        submission_number = 0
+        for c in range(self.courses):
+            course_id = f"course_{c + 1}"
+            # Dificultad por curso: algunos cursos tienen notas más bajas
+            course_mean = rng.gauss(78, 6)
+            for w in range(self.coursework_per_course):
+                coursework_id = f"coursework_{c * self.coursework_per_course + w + 1}"
+                due = self._coursework_due(c, w)
+                created = _iso(due - timedelta(days=14))
+                for s in self._course_students(c):
+                    if rng.random() >= self.submission_probability:
+                        continue
+                    submission_number += 1
+
+                    if rng.random() < self.missing_rate:
+                        state, late, grade, updated = 'CREATED', False, None, created
+                    else:
+                        late = rng.random() < self.late_rate
+                        # Entregas a tiempo: días/horas antes del vencimiento; tardías: hasta 5 días después
+                        offset = timedelta(hours=rng.uniform(1, 120))
+                        updated = _iso(due + offset if late else due - offset)
+                        state = 'RETURNED' if rng.random() < 0.7 else 'TURNED_IN'
+                        grade = None
+                        if state == 'RETURNED':
+                            grade = round(min(100.0, max(0.0, rng.gauss(course_mean - (8 if late else 0), 12))), 1)
+
+                    yield {
+                        'id': f"submission_{submission_number}",
+                        'course_id': course_id,
+                        'course_work_id': coursework_id,
+                        'user_id': f"student_{s + 1}",
+                        'creation_time': created,
+                        'update_time': updated,
+                        'state': state,
+                        'late': late,
+                        'draft_grade': None,
+                        'assigned_grade': grade,
+                        'course_work_type': 'ASSIGNMENT',
+                    }
+
+    def iter_user_profiles(self) -> Iterator[Dict[str, Any]]:
+        rng = self._rng('teachers')
+        for t in range(self.teachers):
+            given_name = rng.choice(GIVEN_NAMES)
+            family_name = rng.choice(FAMILY_NAMES)
+            yield {
+                'id': f"teacher_{t + 1}",
+                'name': {
+                    'given_name': given_name,
+                    'family_name': family_name,
+                    'full_name': f"{given_name} {family_name}"
+                },
+                'email_address': f"teacher_{t + 1}@instituto.edu",
+                'photo_url': None,
+                'verified_teacher': True,
+                'permissions': [{'permission': 'CREATE_COURSE', 'role': 'TEACHER'}]
+            }
+
+    def write(self, out_dir: str) -> Dict[str, Any]:
+        """Escribir el dataset completo y su manifiesto"""
+        os.makedirs(out_dir, exist_ok=True)
+        start = time.perf_counter()
+        counts = {
+            'courses': _write_records(os.path.join(out_dir, 'courses.json'), self.iter_courses()),
+            'students': _write_records(os.path.join(out_dir, 'students.json'), self.iter_students()),
+            'coursework': _write_records(os.path.join(out_dir, 'coursework.json'), self.iter_coursework()),
+            'submissions': _write_records(os.path.join(out_dir, 'submissions.json'), self.iter_submissions()),
+            'user_profiles': _write_records(os.path.join(out_dir, 'user_profiles.json'), self.iter_user_profiles()),
+        }
+        manifest = {
+            'seed': self.seed,
+            'parameters': {
+                'courses': self.courses,
+                'students': self.students,
+                'submissions': self.submissions,
+                'teachers': self.teachers,
+                'late_rate': self.late_rate,
+                'missing_rate': self.missing_rate,
+            },
+            'counts': counts,
+            'duration_ms': round((time.perf_counter() - start) * 1000, 2),
+        }
+        with open(os.path.join(out_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generar un dataset MOCK determinista a escala")
+    parser.add_argument('--out', required=True, help="Directorio de salida (usar luego como MOCK_DATA_DIR)")
+    parser.add_argument('--courses', type=int, default=10, help="Cantidad de cursos")
+    parser.add_argument('--students', type=int, default=1000, help="Cantidad de estudiantes")
+    parser.add_argument('--submissions', type=int, default=20000, help="Cantidad aproximada de entregas")
+    parser.add_argument('--teachers', type=int, default=None, help="Cantidad de profesores (por defecto cursos / 4)")
+    parser.add_argument('--late-rate', type=float, default=0.12, help="Proporción de entregas tardías")
+    parser.add_argument('--missing-rate', type=float, default=0.15, help="Proporción de trabajos sin entregar")
+    parser.add_argument('--seed', type=int, default=42, help="Semilla (mismo valor = mismo dataset)")
+    args = parser.parse_args()
+
+    generator = DatasetGenerator(
+        courses=args.courses,
+        students=args.students,
+        submissions=args.submissions,
+        teachers=args.teachers,
+        late_rate=args.late_rate,
+        missing_rate=args.missing_rate,
+        seed=args.seed
+    )
+    print(json.dumps(generator.write(args.out), indent=2))
+
+
+if __name__ == '__main__':
+    main()
+
+
+# LECCIÓN APRENDIDA: Datos de prueba a escala real
+# - Semilla fija y un generador aleatorio por archivo: datasets reproducibles
+# - Escritura en streaming (un registro por línea): memoria constante aunque haya millones de entregas
+# - Mismo formato que data/mock: MOCK_DATA_DIR apunta el driver MOCK y los reportes al dataset generado
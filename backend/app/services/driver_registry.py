@@ -0,0 +1,121 @@
+"""
+Registro de drivers de datos con ciclo de vida de proceso
+Los drivers se construyen una sola vez y se comparten entre requests
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from .base import BaseDataDriver, DataDriverFactory
+
+logger = logging.getLogger(__name__)
+
+
+class DriverRegistry:
+    """Registro process-wide de drivers de datos"""
+
+    def __init__(self):
+        self._drivers: Dict[str, BaseDataDriver] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.started = False
+
+    def _resolve_type(self, driver_type: Optional[str]) -> str:
+        """Resolver tipo de driver desde parámetro o variable de entorno"""
+        return driver_type or os.getenv('DATA_DRIVER', 'mock')
+
+    def _build(self, driver_type: str) -> BaseDataDriver:
+        """Construir driver y registrar tiempo de construcción (requiere lock)"""
+        start = time.perf_counter()
+        driver = DataDriverFactory.create_driver(driver_type)
+        build_time_ms = (time.perf_counter() - start) * 1000
+
+        stats = self._stats.setdefault(driver_type, {
+            "builds": 0,
+            "reuses": 0,
+            "total_build_time_ms": 0.0,
+        })
+        stats["builds"] += 1
+        stats["last_build_time_ms"] = round(build_time_ms, 2)
+        stats["total_build_time_ms"] = round(stats["total_build_time_ms"] + build_time_ms, 2)
+        stats["built_at"] = time.time()
+
+        self._drivers[driver_type] = driver
+        logger.info(f"Built data driver '{driver_type}' in {build_time_ms:.1f} ms")
+        return driver
+
+    def get_driver(self, driver_type: Optional[str] = None) -> BaseDataDriver:
+        """Obtener driver compartido, construyéndolo la primera vez"""
+        driver_type = self._resolve_type(driver_type)
+        with self._lock:
+            driver = self._drivers.get(driver_type)
+            if driver is None:
+                return self._build(driver_type)
+            self._stats[driver_type]["reuses"] += 1
+            return driver
+
+    def current_driver(self, driver_type: Optional[str] = None) -> Optional[BaseDataDriver]:
+        """Driver ya construido, sin construirlo ni contarlo como reutilización (None si no existe)"""
+        return self._drivers.get(self._resolve_type(driver_type))
+
+    async def startup(self, driver_type: Optional[str] = None) -> BaseDataDriver:
+        """Construir el driver por defecto al iniciar la aplicación"""
+        driver = await asyncio.to_thread(self.get_driver, driver_type)
+        self.started = True
+        return driver
+
+    async def reload(self, driver_type: Optional[str] = None) -> BaseDataDriver:
+        """Reconstruir un driver de forma explícita y cerrar el anterior"""
+        driver_type = self._resolve_type(driver_type)
+
+        def _rebuild():
+            with self._lock:
+                # Si la construcción falla, el driver anterior sigue activo
+                previous = self._drivers.get(driver_type)
+                return previous, self._build(driver_type)
+
+        previous, driver = await asyncio.to_thread(_rebuild)
+        if previous is not None:
+            await self._close(driver_type, previous)
+        return driver
+
+    async def shutdown(self) -> None:
+        """Cerrar todos los drivers registrados"""
+        with self._lock:
+            drivers = list(self._drivers.items())
+            self._drivers.clear()
+
+        for driver_type, driver in drivers:
+            await self._close(driver_type, driver)
+        self.started = False
+
+    async def _close(self, driver_type: str, driver: BaseDataDriver) -> None:
+        """Cerrar un driver sin propagar errores"""
+        try:
+            await driver.close()
+        except Exception as e:
+            logger.error(f"Error closing data driver '{driver_type}': {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estadísticas de construcción y reutilización de drivers"""
+        with self._lock:
+            return {
+                "started": self.started,
+                "active_drivers": sorted(self._drivers.keys()),
+                "drivers": {name: dict(stats) for name, stats in self._stats.items()},
+                "driver_metrics": {name: driver.get_stats() for name, driver in self._drivers.items()},
+            }
+
+
+# Global instance
+driver_registry = DriverRegistry()
+
+
+# LECCIÓN APRENDIDA: Drivers con ciclo de vida de proceso
+# - Construcción única (fixtures y autenticación no se repiten por request)
+# - Recarga explícita y cierre ordenado en el lifespan de FastAPI
+# - Métricas de tiempo de construcción y reutilización
@@ -1,4 +1,9 @@
+import json
 import os
+import tempfile
+import threading
+import time
+from datetime import datetime
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import Flow
@@ -7,71 +12,229 @@ from googleapiclient.errors import HttpError
 from typing import Optional, Dict, Any
 
 
+CLASSROOM_SCOPES = [
+    'https://www.googleapis.com/auth/classroom.courses.readonly',
+    'https://www.googleapis.com/auth/classroom.rosters.readonly',
+    'https://www.googleapis.com/auth/classroom.coursework.me.readonly',
+    'https://www.googleapis.com/auth/classroom.profile.emails'
+]
+
+
+class GoogleCredentialManager:
+    """Gestor process-wide de credenciales y servicio de Google Classroom"""
+
+    def __init__(self, scopes: Optional[list] = None):
+        self.scopes = scopes or CLASSROOM_SCOPES
+        # Refrescar el token este margen de segundos antes de que expire
+        self.refresh_margin = int(os.getenv('GOOGLE_TOKEN_REFRESH_MARGIN', '300'))
+        self._credentials = None
+        self._service = None
+        self._last_written = None
+        self._lock = threading.RLock()
+        self._stop_event = threading.Event()
+        self._refresh_thread = None
+        self._metrics = {
+            'token_loads': 0,
+            'token_refreshes': 0,
+            'refresh_failures': 0,
+            'token_writes': 0,
+            'service_builds': 0,
+            'auth_time_ms': 0.0,
+        }
+
+    @property
+    def tokens_file(self) -> str:
+        return os.getenv('TOKENS_FILE', 'tokens.json')
+
+    @property
+    def credentials_file(self) -> str:
+        return os.getenv('GOOGLE_CREDENTIALS_FILE', 'credentials.json')
+
+    def _timed(self, metric: str, func, *args):
+        """Ejecutar una operación de auth acumulando su tiempo"""
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self._metrics[metric] += 1
+            self._metrics['auth_time_ms'] += (time.perf_counter() - start) * 1000
+
+    def get_credentials(self) -> Optional[Credentials]:
+        """Credenciales en memoria; se cargan del archivo y se refrescan sólo si hace falta"""
+        with self._lock:
+            if self._credentials is None and os.path.exists(self.tokens_file):
+                self._credentials = self._timed(
+                    'token_loads', Credentials.from_authorized_user_file, self.tokens_file, self.scopes
+                )
+                with open(self.tokens_file, 'r') as token:
+                    self._last_written = token.read()
+
+            creds = self._credentials
+            if creds and not creds.valid and creds.refresh_token:
+                self._refresh(creds)
+            return creds
+
+    @property
+    def current_credentials(self) -> Optional[Credentials]:
+        """Credenciales en memoria sin cargar ni refrescar (no espera al lock del refresco)"""
+        return self._credentials
+
+    def set_credentials(self, creds: Credentials) -> None:
+        """Reemplazar credenciales (p.ej. tras el callback OAuth) y persistirlas"""
+        with self._lock:
+            self._credentials = creds
+            self._service = None
+            self._persist(creds)
+
+    def _refresh(self, creds: Credentials) -> None:
+        """Refrescar el token y persistirlo (requiere lock)"""
+        try:
+            self._timed('token_refreshes', creds.refresh, Request())
+        except Exception:
+            self._metrics['refresh_failures'] += 1
+            raise
+        self._persist(creds)
+
+    def _persist(self, creds: Credentials) -> None:
+        """Escribir el archivo de tokens de forma atómica y sólo si cambió"""
+        data = creds.to_json()
+        if data == self._last_written:
+            return
+
+        directory = os.path.dirname(os.path.abspath(self.tokens_file))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tokens-', suffix='.json')
+        try:
+            with os.fdopen(fd, 'w') as token:
+                token.write(data)
+            os.replace(tmp_path, self.tokens_file)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._last_written = data
+        self._metrics['token_writes'] += 1
+
+    def get_service(self):
+        """Servicio de Classroom construido una sola vez con el discovery estático"""
+        with self._lock:
+            if self._service is None:
+                creds = self.get_credentials()
+                if not creds:
+                    return None
+                self._service = self._timed(
+                    'service_builds', lambda: build(
+                        'classroom', 'v1', credentials=creds, static_discovery=True, cache_discovery=False
+                    )
+                )
+            return self._service
+
+    def _seconds_until_refresh(self) -> float:
+        """Segundos hasta el próximo refresco anticipado"""
+        creds = self._credentials
+        if not creds or not creds.refresh_token or not creds.expiry:
+            return 60.0
+        remaining = (creds.expiry - datetime.utcnow()).total_seconds()
+        return max(0.0, remaining - self.refresh_margin)
+
+    def _refresh_loop(self) -> None:
+        """Hilo de fondo: refresca el token antes de su expiración"""
+        while not self._stop_event.wait(self._seconds_until_refresh()):
+            failed = False
+            with self._lock:
+                creds = self._credentials
+                if not creds or not creds.refresh_token or self._seconds_until_refresh() > 0:
+                    continue
+                try:
+                    self._refresh(creds)
+                except Exception as e:
+                    print(f"Error refreshing Google credentials: {e}")
+                    failed = True
+            if failed:
+                # Evitar reintentos en bucle inmediato, sin retener el lock durante la espera
+                self._stop_event.wait(30)
+
+    def start_background_refresh(self) -> None:
+        """Iniciar el refresco anticipado en segundo plano"""
+        if self._refresh_thread and self._refresh_thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._refresh_thread = threading.Thread(target=self._refresh_loop, name='google-token-refresh', daemon=True)
+        self._refresh_thread.start()
+
+    def stop_background_refresh(self) -> None:
+        """Detener el refresco en segundo plano"""
+        self._stop_event.set()
+        if self._refresh_thread:
+            self._refresh_thread.join(timeout=5)
+            self._refresh_thread = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Métricas de tiempo y operaciones de autenticación"""
+        creds = self._credentials
+        return {
+            **self._metrics,
+            'auth_time_ms': round(self._metrics['auth_time_ms'], 2),
+            'has_credentials': creds is not None,
+            'token_expiry': creds.expiry.isoformat() if creds and creds.expiry else None,
+            'background_refresh': bool(self._refresh_thread and self._refresh_thread.is_alive()),
+        }
+
+
+# Instancia compartida por todo el proceso
+credential_manager = GoogleCredentialManager()
+
+
 class GoogleAuthService:
     """Servicio de autenticación con Google Classroom API"""
-    
+
     def __init__(self):
-        self.scopes = [
-            'https://www.googleapis.com/auth/classroom.courses.readonly',
-            'https://www.googleapis.com/auth/classroom.rosters.readonly',
-            'https://www.googleapis.com/auth/classroom.coursework.me.readonly',
-            'https://www.googleapis.com/auth/classroom.profile.emails'
-        ]
+        self.scopes = CLASSROOM_SCOPES
         self.credentials_file = os.getenv('GOOGLE_CREDENTIALS_FILE', 'credentials.json')
         self.tokens_file = os.getenv('TOKENS_FILE', 'tokens.json')
         self.service = None
-    
+
     def authenticate(self) -> bool:
         """Autenticar con Google Classroom API"""
         try:
-            creds = None
-            
-            # Cargar credenciales existentes
-            if os.path.exists(self.tokens_file):
-                creds = Credentials.from_authorized_user_file(self.tokens_file, self.scopes)
-            
+            # Credenciales en memoria del gestor compartido
+            creds = credential_manager.get_credentials()
+
             # Si no hay credenciales válidas, autenticar
             if not creds or not creds.valid:
-                if creds and creds.expired and creds.refresh_token:
-                    creds.refresh(Request())
-                else:
-                    if not os.path.exists(self.credentials_file):
-                        print(f"Credentials file not found: {self.credentials_file}")
-                        return False
-                    
-                    flow = Flow.from_client_secrets_file(self.credentials_file, self.scopes)
-                    creds = flow.run_local_server(port=0)
-                
-                # Guardar credenciales para la próxima vez
-                with open(self.tokens_file, 'w') as token:
-                    token.write(creds.to_json())
-            
-            self.service = build('classroom', 'v1', credentials=creds)
-            return True
-            
+                if not os.path.exists(self.credentials_file):
+                    print(f"Credentials file not found: {self.credentials_file}")
+                    return False
+
+                flow = Flow.from_client_secrets_file(self.credentials_file, self.scopes)
+                creds = flow.run_local_server(port=0)
+                credential_manager.set_credentials(creds)
+
+            self.service = credential_manager.get_service()
+            return self.service is not None
+
         except Exception as e:
             print(f"Error authenticating with Google Classroom API: {e}")
             return False
-    
+
     def get_authorization_url(self) -> Optional[str]:
         """Obtener URL de autorización para OAuth"""
         try:
             if not os.path.exists(self.credentials_file):
                 return None
-            
+
             flow = Flow.from_client_secrets_file(
-                self.credentials_file, 
+                self.credentials_file,
                 self.scopes,
                 redirect_uri=os.getenv('GOOGLE_CLASSROOM_REDIRECT_URI', 'http://localhost:8000/api/v1/auth/google/callback')
             )
-            
+
             auth_url, _ = flow.authorization_url(prompt='consent')
             return auth_url
-            
+
         except Exception as e:
             print(f"Error getting authorization URL: {e}")
             return None
-    
+
     def exchange_code_for_token(self, code: str) -> Optional[Credentials]:
         """Intercambiar código de autorización por token"""
         try:
@@ -80,20 +243,19 @@ class GoogleAuthService:
                 self.scopes,
                 redirect_uri=os.getenv('GOOGLE_CLASSROOM_REDIRECT_URI', 'http://localhost:8000/api/v1/auth/google/callback')
             )
-            
+
             flow.fetch_token(code=code)
             creds = flow.credentials
-            
-            # Guardar credenciales
-            with open(self.tokens_file, 'w') as token:
-                token.write(creds.to_json())
-            
+
+            # Guardar credenciales (en memoria y archivo)
+            credential_manager.set_credentials(creds)
+
             return creds
-            
+
         except Exception as e:
             print(f"Error exchanging code for token: {e}")
             return None
-    
+
     def get_service(self):
         """Obtener servicio de Google Classroom API"""
         if not self.service:
@@ -107,3 +269,6 @@ class GoogleAuthService:
 # - Manejo de refresh tokens
 # - Persistencia de credenciales
 # - Manejo de errores robusto
+# - Credenciales en memoria con refresco anticipado en segundo plano
+# - Escritura atómica del archivo de tokens sólo cuando cambia
+# - Servicio construido una vez con el discovery estático
@@ -1,16 +1,24 @@
+import asyncio
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, List, Optional
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
+import httplib2
+import google_auth_httplib2
 from google_auth_oauthlib.flow import Flow
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from .base import BaseDataDriver
+from .google_auth import credential_manager
+from .projection import FieldMask, google_fields_mask
+from .rate_limiter import RetryPolicy, classroom_rate_limiter
 
 
 class GoogleDataDriver(BaseDataDriver):
     """Driver GOOGLE para Google Classroom API"""
     
+    # Máximo de llamadas por request batch recomendado para Classroom
+    BATCH_LIMIT = 50
+    
     def __init__(self):
         super().__init__()
         self.scopes = [
@@ -20,46 +28,137 @@ class GoogleDataDriver(BaseDataDriver):
             'https://www.googleapis.com/auth/classroom.profile.emails'
         ]
         self.service = None
+        self.credentials = None
+        # Cambia cuando el gestor entrega otras credenciales (invalida los transportes por hilo)
+        self._generation = 0
+        # Pool acotado para ejecutar las llamadas bloqueantes fuera del event loop
+        self.max_workers = max(1, int(os.getenv('GOOGLE_DRIVER_MAX_WORKERS', '8')))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='classroom')
+        self._thread_local = threading.local()
+        # Limitador compartido por todo el proceso y reintentos ante 429/5xx
+        self.rate_limiter = classroom_rate_limiter
+        self.retry_policy = RetryPolicy()
         self._authenticate()
     
     def _authenticate(self):
         """Autenticar con Google Classroom API"""
         try:
-            # Cargar credenciales desde archivo
-            credentials_file = os.getenv('GOOGLE_CREDENTIALS_FILE', 'credentials.json')
-            tokens_file = os.getenv('TOKENS_FILE', 'tokens.json')
-            
-            if os.path.exists(tokens_file):
-                creds = Credentials.from_authorized_user_file(tokens_file, self.scopes)
+            # Credenciales y servicio compartidos por todo el proceso
+            creds = credential_manager.get_credentials()
             
             if not creds or not creds.valid:
-                if creds and creds.expired and creds.refresh_token:
-                    creds.refresh(Request())
-                else:
-                    flow = Flow.from_client_secrets_file(credentials_file, self.scopes)
-                    creds = flow.run_local_server(port=0)
+                credentials_file = os.getenv('GOOGLE_CREDENTIALS_FILE', 'credentials.json')
+                flow = Flow.from_client_secrets_file(credentials_file, self.scopes)
+                creds = flow.run_local_server(port=0)
                 
                 # Guardar credenciales para la próxima vez
-                with open(tokens_file, 'w') as token:
-                    token.write(creds.to_json())
+                credential_manager.set_credentials(creds)
             
-            self.service = build('classroom', 'v1', credentials=creds)
+            self.credentials = creds
+            self.service = credential_manager.get_service()
             
         except Exception as e:
             print(f"Error authenticating with Google Classroom API: {e}")
             self.service = None
     
-    async def get_courses(self, page_size: int = 10, page_token: Optional[str] = None) -> Dict[str, Any]:
-        """Obtener lista de cursos desde Google Classroom API"""
+    def _sync_credentials(self):
+        """Tomar las credenciales vigentes del gestor (p.ej. tras un nuevo callback OAuth)"""
+        creds = credential_manager.current_credentials
+        if creds is not None and creds is not self.credentials:
+            self.credentials = creds
+            self.service = credential_manager.get_service()
+            self._generation += 1
+    
+    def _require_service(self):
+        """Servicio actual o error si no hay autenticación"""
+        self._sync_credentials()
         if not self.service:
             raise Exception("Google Classroom API not authenticated")
+        return self.service
+    
+    def _get_http(self) -> google_auth_httplib2.AuthorizedHttp:
+        """Transporte HTTP autorizado propio de cada hilo (httplib2 no es thread-safe)"""
+        cached = getattr(self._thread_local, 'http', None)
+        if cached is None or cached[0] != self._generation:
+            http = google_auth_httplib2.AuthorizedHttp(self.credentials, http=httplib2.Http())
+            cached = self._thread_local.http = (self._generation, http)
+        return cached[1]
+    
+    def _execute_sync(self, request):
+        """Ejecutar request en el hilo actual con su transporte propio"""
+        return request.execute(http=self._get_http())
+    
+    async def _execute(self, request):
+        """Ejecutar request en el pool respetando la cuota y reintentando errores transitorios"""
+        loop = asyncio.get_running_loop()
+        attempt = 0
+        while True:
+            await self.rate_limiter.acquire()
+            try:
+                response = await loop.run_in_executor(self._executor, self._execute_sync, request)
+            except HttpError as error:
+                if not await self._should_retry(error, attempt):
+                    raise
+                attempt += 1
+                continue
+            self.rate_limiter.on_success()
+            return response
+    
+    async def _should_retry(self, error: HttpError, attempt: int) -> bool:
+        """Decidir reintento, ajustar la tasa y esperar el backoff"""
+        status = error.resp.status
+        if not self.retry_policy.is_retryable(status, error.content) or attempt >= self.retry_policy.max_retries:
+            return False
+        if self.retry_policy.is_throttle(status, error.content):
+            self.rate_limiter.on_throttle()
+        await asyncio.sleep(self.retry_policy.backoff(attempt, error.resp.get('retry-after')))
+        return True
+    
+    def _execute_batch_sync(self, requests: List[tuple]):
+        """Ejecutar varias requests en un único batch HTTP en el hilo actual"""
+        responses = {}
+        errors = {}
+        
+        def callback(request_id, response, exception):
+            if exception is not None:
+                errors[request_id] = exception
+            else:
+                responses[request_id] = response
+        
+        batch = self.service.new_batch_http_request(callback=callback)
+        for request_id, request in requests:
+            batch.add(request, request_id=request_id)
+        batch.execute(http=self._get_http())
+        return responses, errors
+    
+    async def _execute_batch(self, requests: List[tuple]):
+        """Ejecutar un batch HTTP en el pool sin bloquear el event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._execute_batch_sync, requests)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Métricas de cuota y reintentos"""
+        return {
+            'rate_limiter': self.rate_limiter.get_stats(),
+            'retries': self.retry_policy.retries,
+            'max_workers': self.max_workers
+        }
+    
+    async def close(self) -> None:
+        """Cerrar el pool de ejecución"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+    
+    async def get_courses(self, page_size: int = 10, page_token: Optional[str] = None, fields: FieldMask = None) -> Dict[str, Any]:
+        """Obtener lista de cursos desde Google Classroom API"""
+        self._require_service()
         
         try:
             request = self.service.courses().list(
                 pageSize=page_size,
-                pageToken=page_token
+                pageToken=page_token,
+                fields=google_fields_mask(fields, 'courses')
             )
-            response = request.execute()
+            response = await self._execute(request)
             
             return {
                 'courses': response.get('courses', []),
@@ -70,13 +169,12 @@ class GoogleDataDriver(BaseDataDriver):
         except HttpError as error:
             raise Exception(f"Error fetching courses: {error}")
     
-    async def get_course(self, course_id: str) -> Dict[str, Any]:
+    async def get_course(self, course_id: str, fields: FieldMask = None) -> Dict[str, Any]:
         """Obtener un curso específico desde Google Classroom API"""
-        if not self.service:
-            raise Exception("Google Classroom API not authenticated")
+        self._require_service()
         
         try:
-            course = self.service.courses().get(id=course_id).execute()
+            course = await self._execute(self.service.courses().get(id=course_id, fields=google_fields_mask(fields)))
             return course
             
         except HttpError as error:
@@ -84,18 +182,18 @@ class GoogleDataDriver(BaseDataDriver):
                 return None
             raise Exception(f"Error fetching course: {error}")
     
-    async def get_students(self, course_id: str, page_size: int = 10, page_token: Optional[str] = None) -> Dict[str, Any]:
+    async def get_students(self, course_id: str, page_size: int = 10, page_token: Optional[str] = None, fields: FieldMask = None) -> Dict[str, Any]:
         """Obtener estudiantes de un curso desde Google Classroom API"""
-        if not self.service:
-            raise Exception("Google Classroom API not authenticated")
+        self._require_service()
         
         try:
             request = self.service.courses().students().list(
                 courseId=course_id,
                 pageSize=page_size,
-                pageToken=page_token
+                pageToken=page_token,
+                fields=google_fields_mask(fields, 'students')
             )
-            response = request.execute()
+            response = await self._execute(request)
             
             return {
                 'students': response.get('students', []),
@@ -108,18 +206,18 @@ class GoogleDataDriver(BaseDataDriver):
                 return {'students': [], 'next_page_token': None, 'total_items': 0}
             raise Exception(f"Error fetching students: {error}")
     
-    async def get_coursework(self, course_id: str, page_size: int = 10, page_token: Optional[str] = None) -> Dict[str, Any]:
+    async def get_coursework(self, course_id: str, page_size: int = 10, page_token: Optional[str] = None, fields: FieldMask = None) -> Dict[str, Any]:
         """Obtener trabajos de curso desde Google Classroom API"""
-        if not self.service:
-            raise Exception("Google Classroom API not authenticated")
+        self._require_service()
         
         try:
             request = self.service.courses().courseWork().list(
                 courseId=course_id,
                 pageSize=page_size,
-                pageToken=page_token
+                pageToken=page_token,
+                fields=google_fields_mask(fields, 'courseWork')
             )
-            response = request.execute()
+            response = await self._execute(request)
             
             return {
                 'course_work': response.get('courseWork', []),
@@ -132,19 +230,19 @@ class GoogleDataDriver(BaseDataDriver):
                 return {'course_work': [], 'next_page_token': None, 'total_items': 0}
             raise Exception(f"Error fetching coursework: {error}")
     
-    async def get_submissions(self, course_id: str, coursework_id: str, page_size: int = 10, page_token: Optional[str] = None) -> Dict[str, Any]:
+    async def get_submissions(self, course_id: str, coursework_id: str, page_size: int = 10, page_token: Optional[str] = None, fields: FieldMask = None) -> Dict[str, Any]:
         """Obtener entregas de estudiantes desde Google Classroom API"""
-        if not self.service:
-            raise Exception("Google Classroom API not authenticated")
+        self._require_service()
         
         try:
             request = self.service.courses().courseWork().studentSubmissions().list(
                 courseId=course_id,
                 courseWorkId=coursework_id,
                 pageSize=page_size,
-                pageToken=page_token
+                pageToken=page_token,
+                fields=google_fields_mask(fields, 'studentSubmissions')
             )
-            response = request.execute()
+            response = await self._execute(request)
             
             return {
                 'student_submissions': response.get('studentSubmissions', []),
@@ -157,13 +255,68 @@ class GoogleDataDriver(BaseDataDriver):
                 return {'student_submissions': [], 'next_page_token': None, 'total_items': 0}
             raise Exception(f"Error fetching submissions: {error}")
     
-    async def get_user_profile(self, user_id: str) -> Dict[str, Any]:
+    async def list_course_submissions(self, course_id: str, page_size: int = 10, page_token: Optional[str] = None, fields: FieldMask = None) -> Dict[str, Any]:
+        """Obtener todas las entregas de un curso usando el comodín "-" de courseWorkId"""
+        return await self.get_submissions(course_id, '-', page_size=page_size, page_token=page_token, fields=fields)
+    
+    async def get_submissions_batch(self, course_id: str, coursework_ids: List[str], page_size: int = 100, fields: FieldMask = None) -> Dict[str, List[Dict[str, Any]]]:
+        """Obtener entregas de varios trabajos combinando las llamadas en batch HTTP"""
+        self._require_service()
+        
+        results = {coursework_id: [] for coursework_id in coursework_ids}
+        # Cola de (trabajo, page_token, intento); páginas siguientes y reintentos van al próximo batch
+        pending = [(coursework_id, None, 0) for coursework_id in results]
+        fields_mask = google_fields_mask(fields, 'studentSubmissions')
+        
+        while pending:
+            chunk, pending = pending[:self.BATCH_LIMIT], pending[self.BATCH_LIMIT:]
+            requests = [
+                (coursework_id, self.service.courses().courseWork().studentSubmissions().list(
+                    courseId=course_id,
+                    courseWorkId=coursework_id,
+                    pageSize=page_size,
+                    pageToken=page_token,
+                    fields=fields_mask
+                ))
+                for coursework_id, page_token, _ in chunk
+            ]
+            # Cada llamada del batch consume cuota por separado
+            await self.rate_limiter.acquire(len(requests))
+            responses, errors = await self._execute_batch(requests)
+            
+            retry_attempt = None
+            for coursework_id, page_token, attempt in chunk:
+                error = errors.get(coursework_id)
+                if error is None:
+                    continue
+                if isinstance(error, HttpError) and error.resp.status == 404:
+                    continue
+                if isinstance(error, HttpError) and self.retry_policy.is_retryable(error.resp.status, error.content) \
+                        and attempt < self.retry_policy.max_retries:
+                    if self.retry_policy.is_throttle(error.resp.status, error.content):
+                        self.rate_limiter.on_throttle()
+                    pending.append((coursework_id, page_token, attempt + 1))
+                    retry_attempt = max(retry_attempt or 0, attempt)
+                    continue
+                raise Exception(f"Error fetching submissions: {error}")
+            
+            for coursework_id, response in responses.items():
+                self.rate_limiter.on_success()
+                results[coursework_id].extend(response.get('studentSubmissions', []))
+                if response.get('nextPageToken'):
+                    pending.append((coursework_id, response['nextPageToken'], 0))
+            
+            if retry_attempt is not None:
+                await asyncio.sleep(self.retry_policy.backoff(retry_attempt))
+        
+        return results
+    
+    async def get_user_profile(self, user_id: str, fields: FieldMask = None) -> Dict[str, Any]:
         """Obtener perfil de usuario desde Google Classroom API"""
-        if not self.service:
-            raise Exception("Google Classroom API not authenticated")
+        self._require_service()
         
         try:
-            profile = self.service.userProfiles().get(userId=user_id).execute()
+            profile = await self._execute(self.service.userProfiles().get(userId=user_id, fields=google_fields_mask(fields)))
             return profile
             
         except HttpError as error:
@@ -177,3 +330,9 @@ class GoogleDataDriver(BaseDataDriver):
 # - Manejo de errores HTTP específicos
 # - Paginación nativa de Google Classroom API
 # - Fallback a MOCK si falla autenticación
+# - Llamadas bloqueantes en pool acotado con transporte HTTP por hilo
+# - Batch HTTP para fan-out de entregas (evita N+1 contra la API)
+# - Token bucket compartido y reintentos con backoff ante 429/5xx
+# - Comodín courseWorkId="-" para listar todas las entregas de un curso
+# - Respuestas parciales con el parámetro fields (sólo los campos que se usan)
+# - Credenciales y servicio tomados del gestor compartido en cada llamada
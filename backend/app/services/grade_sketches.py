@@ -0,0 +1,310 @@
+"""
+Mergeable grade quantile sketches for report distributions
+A KLL sketch per coursework, merged on demand into course, cohort and institution sketches
+"""
+
+import math
+import os
+import random
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .submission_table import SubmissionTable
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional: grades are grouped with a Python loop
+    np = None
+
+# Compaction shrink factor between levels (from the KLL paper)
+LEVEL_FACTOR = 2 / 3
+
+
+def sketch_size() -> int:
+    """Items kept by the top level of each sketch (REPORTS_SKETCH_K); rank error is about 1.7 / k"""
+    return max(8, int(os.getenv("REPORTS_SKETCH_K", "200")))
+
+
+def is_graded(grade: Any) -> bool:
+    """Same rule as the counters: missing, NaN and zero grades are not graded"""
+    return grade is not None and grade == grade and grade != 0
+
+
+class KLLSketch:
+    """KLL quantile sketch (Karnin, Lang, Liberty 2016)
+
+    Level h holds items of weight 2**h. A full level is sorted and every other
+    item moves up, so total weight always equals the count. Sketches merge by
+    concatenating levels and compacting. Count, sum, min and max are exact;
+    quantiles are exact until the first compaction.
+    """
+
+    def __init__(self, k: Optional[int] = None, seed: int = 0):
+        self.k = k or sketch_size()
+        self.levels: List[List[float]] = [[]]
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._size = 0
+        self._max_size = self._capacity(0)
+        self._random: Optional[random.Random] = random.Random(seed)
+        self._sorted: Optional[List[Tuple[float, int]]] = None
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return int(math.ceil(self.k * LEVEL_FACTOR ** depth)) + 1
+
+    def _grow(self) -> None:
+        self.levels.append([])
+        self._max_size = sum(self._capacity(level) for level in range(len(self.levels)))
+
+    def _compress(self) -> None:
+        """Compact the lowest full level (and the ones it overflows)"""
+        for level in range(len(self.levels)):
+            items = self.levels[level]
+            if len(items) < self._capacity(level):
+                continue
+            if level + 1 == len(self.levels):
+                self._grow()
+            items.sort()
+            # An odd item out stays at this level so no weight is lost
+            kept = [items.pop()] if len(items) % 2 else []
+            if self._random is None:
+                self._random = random.Random(self.count)
+            self.levels[level + 1].extend(items[self._random.randint(0, 1)::2])
+            self.levels[level] = kept
+            self._size = sum(len(items) for items in self.levels)
+            if self._size < self._max_size:
+                break
+
+    def _added(self, values: List[float]) -> None:
+        self.count += len(values)
+        self.total += math.fsum(values)
+        self.min = min(self.min, min(values))
+        self.max = max(self.max, max(values))
+        self._size += len(values)
+        self._sorted = None
+        while self._size >= self._max_size:
+            self._compress()
+
+    def update(self, value: float) -> None:
+        self.levels[0].append(value)
+        self._added([value])
+
+    def extend(self, values: Iterable[float]) -> None:
+        """Add many values at once (one sort per compaction instead of one per item)"""
+        values = list(values)
+        if values:
+            self.levels[0].extend(values)
+            self._added(values)
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        """Fold another sketch into this one"""
+        if not other.count:
+            return self
+        while len(self.levels) < len(other.levels):
+            self._grow()
+        for level, items in enumerate(other.levels):
+            self.levels[level].extend(items)
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._size = sum(len(items) for items in self.levels)
+        self._sorted = None
+        while self._size >= self._max_size:
+            self._compress()
+        return self
+
+    def copy(self) -> "KLLSketch":
+        return KLLSketch(self.k).merge(self)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # The generator state (~2.5 KB) would dwarf small sketches sent back by pool workers
+        state = dict(self.__dict__)
+        del state["_random"], state["_sorted"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        # Seeded on the first compaction after transport
+        self._random = None
+        self._sorted = None
+
+    @property
+    def is_exact(self) -> bool:
+        """True until the first compaction"""
+        return len(self.levels[0]) == self.count
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    def weighted(self) -> List[Tuple[float, int]]:
+        """(value, weight) pairs in value order"""
+        if self._sorted is None:
+            self._sorted = sorted(
+                (value, 1 << level) for level, items in enumerate(self.levels) for value in items
+            )
+        return self._sorted
+
+    def quantiles(self, fractions: Iterable[float]) -> List[Optional[float]]:
+        """Nearest-rank quantiles: the smallest value whose rank reaches fraction * count"""
+        if not self.count:
+            return [None for _ in fractions]
+        items = self.weighted()
+        results = []
+        for fraction in fractions:
+            target = max(1, math.ceil(fraction * self.count))
+            rank = 0
+            for value, weight in items:
+                rank += weight
+                if rank >= target:
+                    break
+            results.append(value)
+        return results
+
+    def quantile(self, fraction: float) -> Optional[float]:
+        return self.quantiles([fraction])[0]
+
+    def histogram(self, bins: int) -> List[Dict[str, float]]:
+        """Equal-width buckets from min to max with (estimated) counts summing to count"""
+        if not self.count:
+            return []
+        width = (self.max - self.min) / bins if self.max > self.min else 0
+        counts = [0] * bins
+        for value, weight in self.weighted():
+            bucket = int((value - self.min) / width) if width else 0
+            counts[min(bucket, bins - 1)] += weight
+        return [
+            {"lower": self.min + index * width, "upper": self.min + (index + 1) * width if width else self.max, "count": count}
+            for index, count in enumerate(counts)
+        ]
+
+
+class GradeSketches:
+    """Per-coursework grade sketches: sketches[course_id][assignment_id]
+
+    Sketches only grow, so added grades apply in place. A removed or changed
+    grade marks its coursework stale; stale courseworks are rebuilt from the
+    submission table on the next read. Merged course and institution sketches
+    are cached until one of their courseworks changes.
+    """
+
+    def __init__(self, k: Optional[int] = None):
+        self.k = k or sketch_size()
+        self.sketches: Dict[Optional[str], Dict[Optional[str], KLLSketch]] = {}
+        self.stale: set = set()
+        self._by_course: Dict[Optional[str], KLLSketch] = {}
+        self._institution: Optional[KLLSketch] = None
+
+    @classmethod
+    def build(cls, table: SubmissionTable, k: Optional[int] = None) -> "GradeSketches":
+        sketches = cls(k)
+        sketches._load(table)
+        return sketches
+
+    @classmethod
+    def from_sketches(cls, sketches: Dict[Optional[str], Dict[Optional[str], KLLSketch]]) -> "GradeSketches":
+        """Wrap prebuilt per-coursework sketches"""
+        grades = cls()
+        grades.sketches = sketches
+        return grades
+
+    def _load(self, table: SubmissionTable, only: Optional[set] = None) -> None:
+        """Add the graded submissions of the table (optionally only some (course, assignment) pairs)"""
+        for (course_id, assignment_id), grades in _group_grades(table, only).items():
+            self.sketches.setdefault(course_id, {}).setdefault(assignment_id, KLLSketch(self.k)).extend(grades)
+
+    def _invalidate(self, course_id: Optional[str]) -> None:
+        self._by_course.pop(course_id, None)
+        self._institution = None
+
+    def apply(self, record: Dict[str, Any], sign: int) -> None:
+        """Add (sign=1) or remove (sign=-1) one report-layout submission"""
+        grade = record.get("grade")
+        if not is_graded(grade):
+            return
+        course_id, assignment_id = record.get("course_id"), record.get("assignment_id")
+        if sign > 0 and (course_id, assignment_id) not in self.stale:
+            self.sketches.setdefault(course_id, {}).setdefault(assignment_id, KLLSketch(self.k)).update(float(grade))
+        else:
+            self.stale.add((course_id, assignment_id))
+        self._invalidate(course_id)
+
+    def refresh(self, table: SubmissionTable) -> None:
+        """Rebuild stale courseworks from the table"""
+        if not self.stale:
+            return
+        for course_id, assignment_id in self.stale:
+            by_assignment = self.sketches.get(course_id, {})
+            by_assignment.pop(assignment_id, None)
+            if not by_assignment:
+                self.sketches.pop(course_id, None)
+        self._load(table, self.stale)
+        self.stale = set()
+
+    def coursework(self, course_id: Optional[str], assignment_id: Optional[str]) -> KLLSketch:
+        return self.sketches.get(course_id, {}).get(assignment_id) or KLLSketch(self.k)
+
+    def course(self, course_id: Optional[str]) -> KLLSketch:
+        """All courseworks of a course, merged (cached)"""
+        merged = self._by_course.get(course_id)
+        if merged is None:
+            merged = KLLSketch(self.k)
+            for sketch in self.sketches.get(course_id, {}).values():
+                merged.merge(sketch)
+            self._by_course[course_id] = merged
+        return merged
+
+    def courses(self, course_ids: Iterable[Optional[str]]) -> KLLSketch:
+        """Several courses (a cohort), merged"""
+        merged = KLLSketch(self.k)
+        for course_id in course_ids:
+            merged.merge(self.course(course_id))
+        return merged
+
+    def institution(self) -> KLLSketch:
+        """Every course, merged (cached)"""
+        if self._institution is None:
+            self._institution = self.courses(list(self.sketches))
+        return self._institution
+
+
+def _group_grades(table: SubmissionTable, only: Optional[set] = None) -> Dict[Tuple[str, str], List[float]]:
+    """(course_id, assignment_id) -> graded values, optionally restricted to some pairs"""
+    wanted = None
+    if only is not None:
+        wanted = {
+            (table.courses.code_of(course_id), table.assignments.code_of(assignment_id))
+            for course_id, assignment_id in only
+        }
+
+    if np is not None and len(table):
+        columns = table.numpy_columns()
+        grade = columns["grade"]
+        stride = max(1, len(table.assignments))
+        keys = columns["course"].astype(np.int64) * stride + columns["assignment"]
+        mask = ~np.isnan(grade) & (grade != 0)
+        if wanted is not None:
+            mask &= np.isin(keys, [course * stride + assignment for course, assignment in wanted if course is not None and assignment is not None])
+        keys, values = keys[mask], grade[mask]
+        order = np.argsort(keys, kind="stable")
+        unique, starts = np.unique(keys[order], return_index=True)
+        return {
+            (table.courses.values[key // stride], table.assignments.values[key % stride]): group.tolist()
+            for key, group in zip(unique.tolist(), np.split(values[order], starts[1:]))
+        }
+
+    grouped: Dict[Tuple[int, int], List[float]] = {}
+    for course, assignment, grade in zip(table.course, table.assignment, table.grade):
+        # NaN != NaN: missing grades fail the first check
+        if grade != grade or grade == 0:
+            continue
+        if wanted is not None and (course, assignment) not in wanted:
+            continue
+        grouped.setdefault((course, assignment), []).append(grade)
+    return {
+        (table.courses.values[course], table.assignments.values[assignment]): grades
+        for (course, assignment), grades in grouped.items()
+    }
@@ -1,9 +1,12 @@
 import json
 import os
+import time
 from typing import Any, Dict, List, Optional
 from datetime import datetime, timedelta
 import random
 from .base import BaseDataDriver
+from .dataset_generator import load_records, mock_data_dir
+from .projection import FieldMask, project, project_items
 
 
 class MockDataDriver(BaseDataDriver):
@@ -11,31 +14,26 @@ class MockDataDriver(BaseDataDriver):
     
     def __init__(self):
         super().__init__()
-        self.data_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'mock')
+        self.data_dir = mock_data_dir()
         self._load_mock_data()
     
     def _load_mock_data(self):
         """Cargar datos MOCK desde archivos JSON"""
         try:
             # Cargar cursos
-            with open(os.path.join(self.data_dir, 'courses.json'), 'r', encoding='utf-8') as f:
-                self.courses = json.load(f)
+            self.courses = list(load_records(os.path.join(self.data_dir, 'courses.json')))
             
             # Cargar estudiantes
-            with open(os.path.join(self.data_dir, 'students.json'), 'r', encoding='utf-8') as f:
-                self.students = json.load(f)
+            self.students = list(load_records(os.path.join(self.data_dir, 'students.json')))
             
             # Cargar trabajos de curso
-            with open(os.path.join(self.data_dir, 'coursework.json'), 'r', encoding='utf-8') as f:
-                self.coursework = json.load(f)
+            self.coursework = list(load_records(os.path.join(self.data_dir, 'coursework.json')))
             
             # Cargar entregas
-            with open(os.path.join(self.data_dir, 'submissions.json'), 'r', encoding='utf-8') as f:
-                self.submissions = json.load(f)
+            self.submissions = list(load_records(os.path.join(self.data_dir, 'submissions.json')))
             
             # Cargar perfiles de usuario
-            with open(os.path.join(self.data_dir, 'user_profiles.json'), 'r', encoding='utf-8') as f:
-                self.user_profiles = json.load(f)
+            self.user_profiles = list(load_records(os.path.join(self.data_dir, 'user_profiles.json')))
                 
         except FileNotFoundError as e:
             print(f"Warning: Mock data file not found: {e}")
@@ -45,9 +43,55 @@ class MockDataDriver(BaseDataDriver):
             self.coursework = []
             self.submissions = []
             self.user_profiles = []
+        
+        # Los fixtures no cambian mientras el driver vive: la versión es el momento de carga
+        self._loaded_at = time.time_ns()
+        self._build_indexes()
     
-    async def get_courses(self, page_size: int = 10, page_token: Optional[str] = None) -> Dict[str, Any]:
-        """Obtener lista de cursos con paginación"""
+    def _build_indexes(self):
+        """Construir índices hash sobre los datos cargados"""
+        self._courses_by_id = {course['id']: course for course in self.courses}
+        self._profiles_by_id = {profile['id']: profile for profile in self.user_profiles}
+        
+        # Estudiantes agrupados por curso (ya mapeados al formato de los modelos)
+        self._students_by_course = {}
+        for student in self.students:
+            self._students_by_course.setdefault(student['course_id'], []).append(self._map_student(student))
+        
+        self._coursework_by_course = {}
+        for course_work in self.coursework:
+            self._coursework_by_course.setdefault(course_work['course_id'], []).append(course_work)
+        
+        # Entregas agrupadas por curso y por (curso, trabajo)
+        self._submissions_by_course = {}
+        self._submissions_by_coursework = {}
+        for submission in self.submissions:
+            key = (submission['course_id'], submission['course_work_id'])
+            self._submissions_by_course.setdefault(submission['course_id'], []).append(submission)
+            self._submissions_by_coursework.setdefault(key, []).append(submission)
+    
+    @staticmethod
+    def _map_student(student: Dict[str, Any]) -> Dict[str, Any]:
+        """Mapear campos para compatibilidad con modelos Pydantic"""
+        return {
+            'user_id': student['user_id'],
+            'course_id': student['course_id'],
+            'profile': {
+                'id': student['profile']['id'],
+                'name': {
+                    'given_name': student['profile']['name']['given_name'],
+                    'family_name': student['profile']['name']['family_name'],
+                    'full_name': student['profile']['name']['full_name']
+                },
+                'email_address': student['profile']['email_address'],
+                'photo_url': student['profile']['photo_url'],
+                'verified_teacher': student['profile']['verified_teacher']
+            }
+        }
+    
+    @staticmethod
+    def _paginate(items: List[Dict[str, Any]], page_size: int, page_token: Optional[str]):
+        """Obtener una página como slice de una lista pre-agrupada"""
         start_index = 0
         if page_token:
             try:
@@ -56,127 +100,81 @@ class MockDataDriver(BaseDataDriver):
                 start_index = 0
         
         end_index = start_index + page_size
-        courses_page = self.courses[start_index:end_index]
-        
-        next_page_token = None
-        if end_index < len(self.courses):
-            next_page_token = str(end_index)
+        next_page_token = str(end_index) if end_index < len(items) else None
+        return items[start_index:end_index], next_page_token
+    
+    async def get_courses(self, page_size: int = 10, page_token: Optional[str] = None, fields: FieldMask = None) -> Dict[str, Any]:
+        """Obtener lista de cursos con paginación"""
+        courses_page, next_page_token = self._paginate(self.courses, page_size, page_token)
         
         return {
-            'courses': courses_page,
+            'courses': project_items(courses_page, fields),
             'next_page_token': next_page_token,
             'total_items': len(self.courses)
         }
     
-    async def get_course(self, course_id: str) -> Dict[str, Any]:
+    async def get_course(self, course_id: str, fields: FieldMask = None) -> Dict[str, Any]:
         """Obtener un curso específico"""
-        for course in self.courses:
-            if course['id'] == course_id:
-                return course
-        return None
+        return project(self._courses_by_id.get(course_id), fields)
     
-    async def get_students(self, course_id: str, page_size: int = 10, page_token: Optional[str] = None) -> Dict[str, Any]:
+    async def get_students(self, course_id: str, page_size: int = 10, page_token: Optional[str] = None, fields: FieldMask = None) -> Dict[str, Any]:
         """Obtener estudiantes de un curso con paginación"""
-        course_students = [s for s in self.students if s['course_id'] == course_id]
-        
-        # Mapear campos para compatibilidad con modelos Pydantic
-        mapped_students = []
-        for student in course_students:
-            mapped_student = {
-                'user_id': student['user_id'],
-                'course_id': student['course_id'],
-                'profile': {
-                    'id': student['profile']['id'],
-                    'name': {
-                        'given_name': student['profile']['name']['given_name'],
-                        'family_name': student['profile']['name']['family_name'],
-                        'full_name': student['profile']['name']['full_name']
-                    },
-                    'email_address': student['profile']['email_address'],
-                    'photo_url': student['profile']['photo_url'],
-                    'verified_teacher': student['profile']['verified_teacher']
-                }
-            }
-            mapped_students.append(mapped_student)
-        
-        start_index = 0
-        if page_token:
-            try:
-                start_index = int(page_token)
-            except ValueError:
-                start_index = 0
-        
-        end_index = start_index + page_size
-        students_page = mapped_students[start_index:end_index]
-        
-        next_page_token = None
-        if end_index < len(mapped_students):
-            next_page_token = str(end_index)
+        course_students = self._students_by_course.get(course_id, [])
+        students_page, next_page_token = self._paginate(course_students, page_size, page_token)
         
         return {
-            'students': students_page,
+            # Copia superficial (o proyección): los routers agregan campos a cada estudiante
+            'students': project_items(students_page, fields) if fields else [dict(student) for student in students_page],
             'next_page_token': next_page_token,
-            'total_items': len(mapped_students)
+            'total_items': len(course_students)
         }
     
-    async def get_coursework(self, course_id: str, page_size: int = 10, page_token: Optional[str] = None) -> Dict[str, Any]:
+    async def get_coursework(self, course_id: str, page_size: int = 10, page_token: Optional[str] = None, fields: FieldMask = None) -> Dict[str, Any]:
         """Obtener trabajos de curso con paginación"""
-        course_work = [cw for cw in self.coursework if cw['course_id'] == course_id]
-        
-        start_index = 0
-        if page_token:
-            try:
-                start_index = int(page_token)
-            except ValueError:
-                start_index = 0
-        
-        end_index = start_index + page_size
-        coursework_page = course_work[start_index:end_index]
-        
-        next_page_token = None
-        if end_index < len(course_work):
-            next_page_token = str(end_index)
+        course_work = self._coursework_by_course.get(course_id, [])
+        coursework_page, next_page_token = self._paginate(course_work, page_size, page_token)
         
         return {
-            'course_work': coursework_page,
+            'course_work': project_items(coursework_page, fields),
             'next_page_token': next_page_token,
             'total_items': len(course_work)
         }
     
-    async def get_submissions(self, course_id: str, coursework_id: str, page_size: int = 10, page_token: Optional[str] = None) -> Dict[str, Any]:
+    async def get_submissions(self, course_id: str, coursework_id: str, page_size: int = 10, page_token: Optional[str] = None, fields: FieldMask = None) -> Dict[str, Any]:
         """Obtener entregas de estudiantes con paginación"""
-        course_submissions = [s for s in self.submissions if s['course_id'] == course_id and s['course_work_id'] == coursework_id]
+        course_submissions = self._submissions_by_coursework.get((course_id, coursework_id), [])
+        submissions_page, next_page_token = self._paginate(course_submissions, page_size, page_token)
         
-        start_index = 0
-        if page_token:
-            try:
-                start_index = int(page_token)
-            except ValueError:
-                start_index = 0
-        
-        end_index = start_index + page_size
-        submissions_page = course_submissions[start_index:end_index]
-        
-        next_page_token = None
-        if end_index < len(course_submissions):
-            next_page_token = str(end_index)
+        return {
+            'student_submissions': project_items(submissions_page, fields),
+            'next_page_token': next_page_token,
+            'total_items': len(course_submissions)
+        }
+    
+    async def list_course_submissions(self, course_id: str, page_size: int = 10, page_token: Optional[str] = None, fields: FieldMask = None) -> Dict[str, Any]:
+        """Obtener todas las entregas de un curso desde el índice por curso"""
+        course_submissions = self._submissions_by_course.get(course_id, [])
+        submissions_page, next_page_token = self._paginate(course_submissions, page_size, page_token)
         
         return {
-            'student_submissions': submissions_page,
+            'student_submissions': project_items(submissions_page, fields),
             'next_page_token': next_page_token,
             'total_items': len(course_submissions)
         }
     
-    async def get_user_profile(self, user_id: str) -> Dict[str, Any]:
+    async def get_user_profile(self, user_id: str, fields: FieldMask = None) -> Dict[str, Any]:
         """Obtener perfil de usuario"""
-        for profile in self.user_profiles:
-            if profile['id'] == user_id:
-                return profile
-        return None
+        return project(self._profiles_by_id.get(user_id), fields)
+    
+    def get_data_version(self) -> Optional[str]:
+        """Versión de los fixtures cargados"""
+        return f"mock:{self._loaded_at}"
 
 
 # LECCIÓN APRENDIDA: Driver MOCK con paginación realista
-# - Carga de datos desde archivos JSON
+# - Carga de datos desde archivos JSON (MOCK_DATA_DIR admite datasets generados)
 # - Paginación consistente con Google Classroom API
 # - Manejo de errores para archivos faltantes
 # - Filtrado por course_id para relaciones
+# - Índices hash construidos al cargar: búsquedas O(1) + tamaño de página
+# - Proyección local de campos con el mismo contrato que el driver GOOGLE
@@ -0,0 +1,250 @@
+"""
+Multi-core aggregate builds for large submission tables
+Rows are written once, grouped by course, to a memory-mapped file; each worker process maps it
+read-only and builds the aggregates of a contiguous run of courses, so no submission data is pickled per task
+"""
+
+import mmap
+import multiprocessing
+import os
+import tempfile
+import threading
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .report_aggregates import submission_parts
+from .submission_table import SubmissionTable, StringDictionary
+from .trend_rollups import GRANULARITIES
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional: rows are grouped by course with a Python loop
+    np = None
+
+# Columns submission_parts reads, in file order
+COLUMNS = ("course", "user", "assignment", "late", "state", "grade", "submitted_at")
+
+# Layout of the mapped file: column -> (byte offset, typecode, length)
+ColumnLayout = Dict[str, Tuple[int, str, int]]
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _context() -> multiprocessing.context.BaseContext:
+    """forkserver (or spawn): never fork the threaded server process itself"""
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(method)
+
+
+def get_process_pool(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """Process pool shared by the report layer (REPORTS_PROCESS_WORKERS, 0 = one per core)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = max_workers or int(os.getenv("REPORTS_PROCESS_WORKERS", "0")) or os.cpu_count() or 1
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=_context())
+        return _pool
+
+
+def shutdown_process_pool() -> None:
+    """Stop the shared process pool (recreated on next use)"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def course_order(table: SubmissionTable) -> Tuple[Sequence[int], List[int]]:
+    """Row positions sorted by course code (stable), and the row count of each course code"""
+    groups = len(table.courses)
+    if np is not None:
+        codes = table.numpy_columns()["course"]
+        return np.argsort(codes, kind="stable"), np.bincount(codes, minlength=groups).tolist()
+    buckets: List[List[int]] = [[] for _ in range(groups)]
+    for position, code in enumerate(table.course):
+        buckets[code].append(position)
+    return list(chain.from_iterable(buckets)), [len(bucket) for bucket in buckets]
+
+
+def partition_courses(course_rows: List[int], partitions: int) -> List[Tuple[int, int]]:
+    """Near-equal row ranges of the course-ordered rows, cut only between courses"""
+    total = sum(course_rows)
+    remaining = max(1, min(partitions, total))
+    bounds, start, seen = [], 0, 0
+    for rows in course_rows:
+        seen += rows
+        # Aim at an equal share of the rows still unassigned (a large course may overshoot)
+        if remaining > 1 and seen > start and seen - start >= (total - start) / remaining:
+            bounds.append((start, seen))
+            start = seen
+            remaining -= 1
+    if start < total or not bounds:
+        bounds.append((start, total))
+    return bounds
+
+
+class MappedColumns:
+    """Table columns copied once, in course order, into a temporary memory-mapped file"""
+
+    def __init__(self, table: SubmissionTable, order: Sequence[int]):
+        columns = table._columns()
+        self.layout: ColumnLayout = {}
+        # /dev/shm keeps the file in RAM where available
+        directory = "/dev/shm" if os.path.isdir("/dev/shm") else None
+        fd, self.path = tempfile.mkstemp(prefix="report-columns-", suffix=".bin", dir=directory)
+        with os.fdopen(fd, "wb") as handle:
+            offset = 0
+            for name in COLUMNS:
+                column = columns[name]
+                if np is not None:
+                    data = np.frombuffer(column, dtype=column.typecode)[order].tobytes()
+                else:
+                    data = array(column.typecode, map(column.__getitem__, order)).tobytes()
+                # 8-byte alignment so every column can be viewed with its own item size
+                padding = -offset % 8
+                handle.write(b"\0" * padding)
+                offset += padding
+                self.layout[name] = (offset, column.typecode, len(column))
+                handle.write(data)
+                offset += len(data)
+
+    def close(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __enter__(self) -> "MappedColumns":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _code_dictionary(size: int) -> StringDictionary:
+    """Stand-in dictionary for workers: every code decodes to itself"""
+    dictionary = StringDictionary()
+    dictionary.values = range(size)
+    return dictionary
+
+
+def _build_partition(path: str, layout: ColumnLayout, start: int, stop: int, sizes: Tuple[int, int, int]) -> Dict[str, Any]:
+    """Worker: submission_parts for rows [start, stop) of the course-ordered columns, keyed by codes"""
+    table = SubmissionTable()
+    table.courses, table.users, table.assignments = (_code_dictionary(size) for size in sizes)
+    with open(path, "rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        for name, (offset, typecode, _) in layout.items():
+            column = array(typecode)
+            column.frombytes(mapped[offset + start * column.itemsize:offset + stop * column.itemsize])
+            setattr(table, name, column)
+
+    parts = submission_parts(table)
+    # Only groups present in this partition travel back to the parent
+    for key in ("course_stats", "user_stats"):
+        parts[key] = {code: counters for code, counters in parts[key].items() if counters["total"]}
+    return parts
+
+
+def _zero_counters() -> Dict[str, float]:
+    return {"total": 0, "late": 0, "turned_in": 0, "graded": 0, "grade_sum": 0.0}
+
+
+def merge_parts(table: SubmissionTable, partials: List[Dict[str, Any]], sizes: Tuple[int, int, int]) -> Dict[str, Any]:
+    """Combine per-partition parts (keyed by codes) into submission_parts(table)
+
+    sizes are the dictionary sizes when the columns were copied (dictionaries only grow).
+    """
+    courses, users, assignments = (
+        dictionary.values[:size] for dictionary, size in zip((table.courses, table.users, table.assignments), sizes)
+    )
+
+    course_stats = [_zero_counters() for _ in courses]
+    user_stats: Dict[int, Dict[str, float]] = {}
+    merged: Dict[str, Any] = {
+        "totals": {"total": 0, "late": 0, "turned_in": 0},
+        "pair_counts": {},
+        "assignment_counts": {},
+        "trends": {granularity: {None: {}} for granularity in GRANULARITIES},
+        "grades": {},
+    }
+    for partial in partials:
+        # Partitions hold whole courses: only users (and totals) need summing
+        for code, counters in partial["course_stats"].items():
+            course_stats[code] = counters
+        for code, counters in partial["user_stats"].items():
+            totals = user_stats.get(code)
+            if totals is None:
+                user_stats[code] = counters
+                continue
+            for name, value in counters.items():
+                totals[name] += value
+        for name, value in partial["totals"].items():
+            merged["totals"][name] += value
+        merged["pair_counts"].update(((courses[c], users[u]), n) for (c, u), n in partial["pair_counts"].items())
+        merged["assignment_counts"].update(((courses[c], assignments[a]), n) for (c, a), n in partial["assignment_counts"].items())
+        for granularity, by_course in partial["trends"].items():
+            trends = merged["trends"][granularity]
+            for c, buckets in by_course.items():
+                if c is not None:
+                    trends[courses[c]] = buckets
+                    continue
+                # The all-courses totals (course key None) span partitions
+                for bucket, (on_time, late) in buckets.items():
+                    counters = trends[None].setdefault(bucket, [0, 0])
+                    counters[0] += on_time
+                    counters[1] += late
+        for c, by_assignment in partial["grades"].items():
+            merged["grades"][courses[c]] = {assignments[a]: sketch for a, sketch in by_assignment.items()}
+
+    for trends in merged["trends"].values():
+        if not trends[None]:
+            del trends[None]
+    merged["course_stats"] = dict(zip(courses, course_stats))
+    merged["user_stats"] = {user_id: user_stats.get(code) or _zero_counters() for code, user_id in enumerate(users)}
+    return merged
+
+
+class ParallelBuild:
+    """submission_parts(table) computed across a process pool
+
+    Construction copies the columns (call it under the lock that guards the
+    table); result() waits for the workers and needs no lock. Partitions are
+    contiguous runs of whole courses with near-equal row counts.
+    """
+
+    def __init__(self, table: SubmissionTable, pool: Optional[ProcessPoolExecutor] = None, partitions: Optional[int] = None):
+        self.table = table
+        self._lock = threading.Lock()
+        self._parts: Optional[Dict[str, Any]] = None
+        self._futures = []
+        self._mapped: Optional[MappedColumns] = None
+        if not len(table):
+            self._parts = submission_parts(table)
+            return
+
+        pool = pool or get_process_pool()
+        partitions = partitions or int(os.getenv("REPORTS_PROCESS_WORKERS", "0")) or os.cpu_count() or 1
+        order, course_rows = course_order(table)
+        self._mapped = MappedColumns(table, order)
+        self._sizes = sizes = (len(table.courses), len(table.users), len(table.assignments))
+        try:
+            self._futures = [
+                pool.submit(_build_partition, self._mapped.path, self._mapped.layout, start, stop, sizes)
+                for start, stop in partition_courses(course_rows, partitions)
+            ]
+        except Exception:
+            self._mapped.close()
+            raise
+
+    def result(self) -> Dict[str, Any]:
+        """Merged parts (waits for the workers once; later calls return the same dict)"""
+        with self._lock:
+            if self._parts is None:
+                try:
+                    partials = [future.result() for future in self._futures]
+                finally:
+                    self._mapped.close()
+                self._parts = merge_parts(self.table, partials, self._sizes)
+            return self._parts
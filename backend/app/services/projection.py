@@ -0,0 +1,90 @@
+"""
+Proyecciones de campos (field masks) para las respuestas de los drivers
+Los campos se declaran en snake_case con "." para anidar: ('user_id', 'profile.name.full_name')
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Proyección declarada por un llamador; None = recurso completo
+FieldMask = Optional[Sequence[str]]
+
+
+def to_camel(name: str) -> str:
+    """Convertir un nombre snake_case al camelCase de la API de Classroom"""
+    head, *rest = name.split('_')
+    return head + ''.join(part.title() for part in rest)
+
+
+def normalize_fields(fields: FieldMask) -> Optional[Tuple[str, ...]]:
+    """Forma canónica de una proyección (para claves de caché y coalescencia)"""
+    if not fields:
+        return None
+    return tuple(sorted(set(fields)))
+
+
+def google_fields_mask(fields: FieldMask, items_key: Optional[str] = None) -> Optional[str]:
+    """Máscara `fields` de Google; en listados envuelve los items y conserva nextPageToken"""
+    fields = normalize_fields(fields)
+    if fields is None:
+        return None
+    paths = ','.join('/'.join(to_camel(part) for part in field.split('.')) for field in fields)
+    if items_key:
+        return f"{items_key}({paths}),nextPageToken"
+    return paths
+
+
+def _field_tree(fields: Sequence[str]) -> Dict[str, Any]:
+    """Árbol de rutas: ('profile.id', 'user_id') -> {'profile': {'id': None}, 'user_id': None}"""
+    tree: Dict[str, Any] = {}
+    for field in fields:
+        node = tree
+        *parents, leaf = field.split('.')
+        for part in parents:
+            child = node.get(part)
+            if child is None:
+                # Si ya se pidió el objeto completo no se restringe
+                if part in node:
+                    break
+                child = node[part] = {}
+            node = child
+        else:
+            node[leaf] = None
+    return tree
+
+
+def _project(value: Any, tree: Dict[str, Any]) -> Any:
+    """Aplicar el árbol de rutas a un dict (o lista de dicts)"""
+    if isinstance(value, list):
+        return [_project(item, tree) for item in value]
+    if not isinstance(value, dict):
+        return value
+
+    result = {}
+    for key, subtree in tree.items():
+        # Los datos pueden venir en snake_case (mock) o camelCase (Google)
+        actual_key = key if key in value else to_camel(key)
+        if actual_key not in value:
+            continue
+        result[actual_key] = value[actual_key] if subtree is None else _project(value[actual_key], subtree)
+    return result
+
+
+def project(item: Optional[Dict[str, Any]], fields: FieldMask) -> Optional[Dict[str, Any]]:
+    """Proyectar un recurso a los campos pedidos"""
+    if item is None or not fields:
+        return item
+    return _project(item, _field_tree(fields))
+
+
+def project_items(items: List[Dict[str, Any]], fields: FieldMask) -> List[Dict[str, Any]]:
+    """Proyectar una lista de recursos (el árbol de rutas se arma una sola vez)"""
+    if not fields:
+        return items
+    tree = _field_tree(fields)
+    return [_project(item, tree) for item in items]
+
+
+# LECCIÓN APRENDIDA: Respuestas parciales
+# - Cada llamador declara sólo los campos que usa
+# - En Google se traduce al parámetro `fields` (menos bytes, parseo y memoria)
+# - En MOCK/SNAPSHOT se proyecta localmente para mantener el mismo contrato
@@ -0,0 +1,135 @@
+"""
+Limitador de tasa adaptativo y política de reintentos para la cuota de Google Classroom
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class AdaptiveRateLimiter:
+    """Token bucket compartido con ajuste AIMD según el throttling observado"""
+
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        burst: Optional[float] = None,
+        min_rate: float = 0.5
+    ):
+        self.max_rate = rate or float(os.getenv('GOOGLE_API_RATE', '10'))
+        self.rate = self.max_rate
+        self.min_rate = min(min_rate, self.max_rate)
+        self.burst = burst or float(os.getenv('GOOGLE_API_BURST', '20'))
+
+        self._tokens = self.burst
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._metrics = {
+            'acquired': 0,
+            'waited': 0,
+            'total_wait_s': 0.0,
+            'max_wait_s': 0.0,
+            'throttled': 0,
+            'max_queue_depth': 0,
+        }
+
+    def _refill(self, now: float) -> None:
+        """Reponer tokens según el tiempo transcurrido (requiere lock)"""
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self, tokens: int = 1) -> float:
+        """Reservar tokens y esperar su turno; devuelve los segundos esperados"""
+        with self._lock:
+            self._refill(time.monotonic())
+            # Reserva: el saldo negativo define el orden de espera de los llamadores
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            self._metrics['acquired'] += tokens
+            if wait > 0:
+                self._waiting += 1
+                self._metrics['max_queue_depth'] = max(self._metrics['max_queue_depth'], self._waiting)
+
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                with self._lock:
+                    self._waiting -= 1
+                    self._metrics['waited'] += 1
+                    self._metrics['total_wait_s'] += wait
+                    self._metrics['max_wait_s'] = max(self._metrics['max_wait_s'], wait)
+        return wait
+
+    def on_throttle(self) -> None:
+        """Reducción multiplicativa de la tasa ante un 429 / cuota excedida"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = min(self._tokens, 0.0)
+            self._metrics['throttled'] += 1
+
+    def on_success(self) -> None:
+        """Incremento aditivo de la tasa hasta el máximo configurado"""
+        if self.rate < self.max_rate:
+            with self._lock:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 50)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Métricas de cola, espera y tasa actual"""
+        with self._lock:
+            return {
+                **self._metrics,
+                'total_wait_s': round(self._metrics['total_wait_s'], 3),
+                'max_wait_s': round(self._metrics['max_wait_s'], 3),
+                'avg_wait_s': round(self._metrics['total_wait_s'] / self._metrics['waited'], 3) if self._metrics['waited'] else 0.0,
+                'queue_depth': self._waiting,
+                'rate': round(self.rate, 3),
+                'max_rate': self.max_rate,
+                'burst': self.burst,
+            }
+
+
+class RetryPolicy:
+    """Reintentos con backoff exponencial y jitter para errores 429/5xx"""
+
+    RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+    QUOTA_REASONS = (b'rateLimitExceeded', b'userRateLimitExceeded', b'RESOURCE_EXHAUSTED')
+
+    def __init__(self, max_retries: Optional[int] = None, base_delay: Optional[float] = None, max_delay: Optional[float] = None):
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv('GOOGLE_API_MAX_RETRIES', '5'))
+        self.base_delay = base_delay if base_delay is not None else float(os.getenv('GOOGLE_API_BACKOFF_BASE', '0.5'))
+        self.max_delay = max_delay if max_delay is not None else float(os.getenv('GOOGLE_API_BACKOFF_MAX', '32'))
+        self.retries = 0
+
+    def is_throttle(self, status: int, content: bytes = b'') -> bool:
+        """429, o 403 con motivo de cuota, indican throttling"""
+        if status == 429:
+            return True
+        return status == 403 and any(reason in (content or b'') for reason in self.QUOTA_REASONS)
+
+    def is_retryable(self, status: int, content: bytes = b'') -> bool:
+        """Errores transitorios que vale la pena reintentar"""
+        return status in self.RETRYABLE_STATUSES or self.is_throttle(status, content)
+
+    def backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Espera con full jitter; respeta Retry-After si el servidor lo envía"""
+        self.retries += 1
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        return delay
+
+
+# Instancia compartida por todas las llamadas a Classroom del proceso
+classroom_rate_limiter = AdaptiveRateLimiter()
+
+
+# LECCIÓN APRENDIDA: Cuota de Google Classroom
+# - Token bucket compartido en lugar de ráfagas sin control
+# - AIMD: la tasa baja a la mitad con cada 429 y se recupera gradualmente
+# - Backoff exponencial con jitter para no sincronizar los reintentos
@@ -0,0 +1,242 @@
+"""
+Aggregate index for report generation
+Built once per data version so dashboards answer without rescanning submissions,
+then kept current by applying submission deltas
+"""
+
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+from .grade_sketches import GradeSketches
+from .submission_table import SubmissionTable
+from .trend_rollups import TrendRollups
+
+# Completion thresholds used by the dashboards (percent)
+AT_RISK_COMPLETION = 50
+ATTENTION_COMPLETION = 60
+
+EMPTY_COUNTERS = {"total": 0, "late": 0, "turned_in": 0, "graded": 0, "grade_sum": 0.0}
+
+
+def _same(left: Any, right: Any) -> bool:
+    """Deep equality with a tolerance for floats (incremental sums drift slightly)"""
+    if isinstance(left, dict) and isinstance(right, dict):
+        return left.keys() == right.keys() and all(_same(left[key], right[key]) for key in left)
+    if isinstance(left, (list, tuple)) and isinstance(right, (list, tuple)):
+        return len(left) == len(right) and all(_same(a, b) for a, b in zip(left, right))
+    if isinstance(left, float) or isinstance(right, float):
+        return math.isclose(left, right, rel_tol=1e-9, abs_tol=1e-6)
+    return left == right
+
+
+def submission_parts(table: SubmissionTable) -> Dict[str, Any]:
+    """Everything the index derives from submissions, keyed by the table's IDs
+
+    Computed here for the whole table, or per course partition by parallel_cohorts.
+    """
+    return {
+        "course_stats": table.aggregate("course"),
+        "user_stats": table.aggregate("user"),
+        "totals": table.totals(),
+        "pair_counts": table.count_pairs("course", "user"),
+        "assignment_counts": table.count_pairs("course", "assignment"),
+        "trends": TrendRollups.build(table).counters,
+        "grades": GradeSketches.build(table).sketches,
+    }
+
+
+def _non_empty(stats: Dict[str, Dict[str, float]]) -> Dict[str, Dict[str, float]]:
+    """Drop groups whose submissions were all removed"""
+    return {key: counters for key, counters in stats.items() if counters["total"]}
+
+
+class ReportAggregates:
+    """Counters behind every report, keyed by course, student and (course, student)
+
+    Courses keep the first-seen order of the students file, which is the order
+    cohorts are listed in. Completion is computed per student record as
+    submissions in the course over distinct assignments in the course.
+    """
+
+    def __init__(self, data_version: int):
+        self.data_version = data_version
+        self.course_count = 0
+        self.courses_by_id: Dict[str, Dict[str, Any]] = {}
+        self.students_by_id: Dict[str, Dict[str, Any]] = {}
+        self.students_by_course: Dict[str, int] = {}
+        self.course_stats: Dict[str, Dict[str, float]] = {}
+        self.user_stats: Dict[str, Dict[str, float]] = {}
+        self.pair_counts: Dict[Tuple[str, str], int] = {}
+        self.assignment_counts: Dict[Tuple[str, str], int] = {}
+        self.expected_by_course: Dict[str, int] = {}
+        self.expected_by_user: Dict[str, int] = {}
+        self.totals: Dict[str, int] = {"total": 0, "late": 0, "turned_in": 0}
+        # One entry per student record: (course_id, user_id) and its completion rate
+        self.student_keys: List[Tuple[str, str]] = []
+        self.completion_rates: List[float] = []
+        self.completion_sum = 0.0
+        self.at_risk = 0
+        self.needs_attention = 0
+        # Student record positions, to find the rates a submission change affects
+        self.positions_by_pair: Dict[Tuple[str, str], List[int]] = {}
+        self.positions_by_course: Dict[str, List[int]] = {}
+        self.trends = TrendRollups()
+        self.grades = GradeSketches()
+        self.events_applied = 0
+
+    @classmethod
+    def build(
+        cls,
+        data: Dict[str, Any],
+        data_version: int,
+        parts: Optional[Dict[str, Any]] = None,
+    ) -> "ReportAggregates":
+        """Full build from report data ({students, courses, submissions})
+
+        parts (see submission_parts) may be precomputed elsewhere, e.g. across a process pool.
+        """
+        index = cls(data_version)
+        submissions: SubmissionTable = data["submissions"]
+
+        index.course_count = len(data["courses"])
+        for course in data["courses"]:
+            index.courses_by_id.setdefault(course.get("id"), course)
+
+        parts = parts if parts is not None else submission_parts(submissions)
+        index.course_stats = parts["course_stats"]
+        index.user_stats = parts["user_stats"]
+        index.totals = parts["totals"]
+        index.trends = TrendRollups.from_counters(parts["trends"])
+        index.grades = GradeSketches.from_sketches(parts["grades"])
+        index.pair_counts = parts["pair_counts"]
+        index.assignment_counts = parts["assignment_counts"]
+        for course_id, _ in index.assignment_counts:
+            index.expected_by_course[course_id] = index.expected_by_course.get(course_id, 0) + 1
+
+        for position, student in enumerate(data["students"]):
+            course_id, user_id = student.get("course_id"), student.get("user_id")
+            index.students_by_id.setdefault(user_id, student)
+            index.students_by_course[course_id] = index.students_by_course.get(course_id, 0) + 1
+            index.expected_by_user[user_id] = index.expected_by_user.get(user_id, 0) + index.expected_by_course.get(course_id, 0)
+            index.positions_by_pair.setdefault((course_id, user_id), []).append(position)
+            index.positions_by_course.setdefault(course_id, []).append(position)
+
+            rate = index.completion_rate(course_id, user_id)
+            index.student_keys.append((course_id, user_id))
+            index.completion_rates.append(rate)
+            index._count_rate(rate, 1)
+
+        return index
+
+    def completion_rate(self, course_id: Optional[str], user_id: Optional[str]) -> float:
+        """Percent of the course assignments the student has submitted"""
+        expected = self.expected_by_course.get(course_id, 0)
+        if not expected:
+            return 0
+        return self.pair_counts.get((course_id, user_id), 0) / expected * 100
+
+    def _count_rate(self, rate: float, sign: int) -> None:
+        """Add (sign=1) or remove (sign=-1) one completion rate from the summaries"""
+        self.completion_sum += sign * rate
+        if rate < AT_RISK_COMPLETION:
+            self.at_risk += sign
+        if rate < ATTENTION_COMPLETION:
+            self.needs_attention += sign
+
+    def course(self, course_id: Optional[str]) -> Dict[str, float]:
+        return self.course_stats.get(course_id, EMPTY_COUNTERS)
+
+    def user(self, user_id: Optional[str]) -> Dict[str, float]:
+        return self.user_stats.get(user_id, EMPTY_COUNTERS)
+
+    @property
+    def average_completion(self) -> float:
+        return self.completion_sum / len(self.completion_rates) if self.completion_rates else 0
+
+    def apply(self, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]) -> None:
+        """Apply one report-layout submission change
+
+        Added: old is None. Removed: new is None. Updated: both are given.
+        Cost is O(1) plus the student records of the affected (course, student);
+        only a course gaining or losing an assignment refreshes its whole roster.
+        """
+        if old is not None:
+            self._contribute(old, -1)
+        if new is not None:
+            self._contribute(new, 1)
+        self.events_applied += 1
+
+    def _contribute(self, record: Dict[str, Any], sign: int) -> None:
+        """Add (sign=1) or remove (sign=-1) one submission from every counter"""
+        course_id, user_id = record.get("course_id"), record.get("user_id")
+        grade = record.get("grade")
+        graded = grade is not None and grade == grade and grade != 0
+        late = sign if record.get("is_late") else 0
+        turned_in = sign if record.get("status") == "TURNED_IN" else 0
+
+        for stats, key in ((self.course_stats, course_id), (self.user_stats, user_id)):
+            counters = stats.setdefault(key, dict(EMPTY_COUNTERS))
+            counters["total"] += sign
+            counters["late"] += late
+            counters["turned_in"] += turned_in
+            if graded:
+                counters["graded"] += sign
+                counters["grade_sum"] += sign * float(grade)
+        self.totals["total"] += sign
+        self.totals["late"] += late
+        self.totals["turned_in"] += turned_in
+        self.trends.apply(record, sign)
+        self.grades.apply(record, sign)
+
+        pair = (course_id, user_id)
+        self.pair_counts[pair] = self.pair_counts.get(pair, 0) + sign
+        if not self.pair_counts[pair]:
+            del self.pair_counts[pair]
+
+        assignment = (course_id, record.get("assignment_id"))
+        count = self.assignment_counts.get(assignment, 0) + sign
+        if count:
+            self.assignment_counts[assignment] = count
+        else:
+            del self.assignment_counts[assignment]
+
+        if (sign > 0 and count == 1) or (sign < 0 and count == 0):
+            # The course gained or lost an assignment: every student's expectation moves
+            self.expected_by_course[course_id] = self.expected_by_course.get(course_id, 0) + sign
+            if not self.expected_by_course[course_id]:
+                del self.expected_by_course[course_id]
+            positions = self.positions_by_course.get(course_id, [])
+            for position in positions:
+                student_id = self.student_keys[position][1]
+                self.expected_by_user[student_id] = self.expected_by_user.get(student_id, 0) + sign
+        else:
+            positions = self.positions_by_pair.get(pair, [])
+        self._refresh_rates(positions)
+
+    def _refresh_rates(self, positions: List[int]) -> None:
+        """Recompute the completion rate of some student records and their summaries"""
+        for position in positions:
+            old_rate = self.completion_rates[position]
+            new_rate = self.completion_rate(*self.student_keys[position])
+            if new_rate != old_rate:
+                self._count_rate(old_rate, -1)
+                self._count_rate(new_rate, 1)
+                self.completion_rates[position] = new_rate
+
+    def diff(self, other: "ReportAggregates") -> List[str]:
+        """Names of the counters that differ from another index (empty when consistent)"""
+        checks = {
+            "course_stats": (_non_empty(self.course_stats), _non_empty(other.course_stats)),
+            "user_stats": (_non_empty(self.user_stats), _non_empty(other.user_stats)),
+            "totals": (self.totals, other.totals),
+            "pair_counts": (self.pair_counts, other.pair_counts),
+            "assignment_counts": (self.assignment_counts, other.assignment_counts),
+            "expected_by_course": (self.expected_by_course, other.expected_by_course),
+            "expected_by_user": (self.expected_by_user, other.expected_by_user),
+            "completion_rates": (self.completion_rates, other.completion_rates),
+            "completion_sum": (self.completion_sum, other.completion_sum),
+            "at_risk": (self.at_risk, other.at_risk),
+            "needs_attention": (self.needs_attention, other.needs_attention),
+            "trends": (self.trends.counters, other.trends.counters),
+        }
+        return [name for name, (mine, theirs) in checks.items() if not _same(mine, theirs)]
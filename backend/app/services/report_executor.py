@@ -0,0 +1,135 @@
+"""
+Report execution layer: runs CPU-bound report computations off the event loop
+Results are cached per data version so repeated answers return inline
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from .parallel_cohorts import get_process_pool, shutdown_process_pool
+from .reports_service import reports_service
+
+logger = logging.getLogger(__name__)
+
+
+class ReportExecutor:
+    """Thread pool for report methods, optional process pool for pure functions
+
+    Service methods read in-process state (the columnar table and the aggregate
+    index), so they run on threads. Picklable module-level functions can use
+    run_in_process() to spread CPU work across cores. Timeouts stop waiting for
+    a result; the worker itself finishes in the background.
+    """
+
+    def __init__(
+        self,
+        version: Callable[[], Hashable],
+        max_workers: Optional[int] = None,
+        process_workers: Optional[int] = None,
+        timeout: Optional[float] = None,
+        cache_size: Optional[int] = None,
+    ):
+        self.version = version
+        self.max_workers = max_workers or int(os.getenv("REPORTS_MAX_WORKERS", "4"))
+        self.process_workers = process_workers or int(os.getenv("REPORTS_PROCESS_WORKERS", "0")) or os.cpu_count() or 1
+        self.timeout = timeout if timeout is not None else float(os.getenv("REPORTS_TIMEOUT", "30"))
+        self.cache_size = cache_size if cache_size is not None else int(os.getenv("REPORTS_CACHE_SIZE", "256"))
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._cache: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self._cached_version: Hashable = None
+        self._lock = threading.Lock()
+        self._counters = {"inline_hits": 0, "offloaded": 0, "process_tasks": 0, "timeouts": 0, "errors": 0}
+
+    @property
+    def threads(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._threads is None:
+                self._threads = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="reports")
+            return self._threads
+
+    @property
+    def processes(self) -> ProcessPoolExecutor:
+        """Process pool shared with the parallel cohort counters"""
+        return get_process_pool(self.process_workers)
+
+    async def _submit(self, pool: Executor, func: Callable, args: Tuple, timeout: Optional[float]) -> Any:
+        """Run func(*args) on a pool and wait at most timeout seconds"""
+        loop = asyncio.get_running_loop()
+        limit = self.timeout if timeout is None else timeout
+        try:
+            return await asyncio.wait_for(loop.run_in_executor(pool, func, *args), timeout=limit or None)
+        except asyncio.TimeoutError:
+            self._counters["timeouts"] += 1
+            logger.warning(f"Report computation {getattr(func, '__name__', func)} timed out after {limit} s")
+            raise TimeoutError(f"Report computation timed out after {limit} seconds")
+        except Exception:
+            self._counters["errors"] += 1
+            raise
+
+    async def run(self, func: Callable, *args: Any, timeout: Optional[float] = None, cache: bool = True) -> Any:
+        """Run a report method on the thread pool; cached results for this data version return inline
+
+        The cache key is the function name and its (hashable) positional arguments.
+        """
+        version = self.version()
+        key = (version, getattr(func, "__qualname__", repr(func))) + args
+        if cache:
+            with self._lock:
+                if version != self._cached_version:
+                    # New data version: every cached answer is stale
+                    self._cache.clear()
+                    self._cached_version = version
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    self._counters["inline_hits"] += 1
+                    return self._cache[key]
+
+        self._counters["offloaded"] += 1
+        result = await self._submit(self.threads, func, args, timeout)
+
+        if cache and self.cache_size:
+            with self._lock:
+                if version != self._cached_version:
+                    return result
+                self._cache[key] = result
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return result
+
+    async def run_in_process(self, func: Callable, *args: Any, timeout: Optional[float] = None) -> Any:
+        """Run a picklable function on the process pool"""
+        self._counters["process_tasks"] += 1
+        return await self._submit(self.processes, func, args, timeout)
+
+    def invalidate(self) -> None:
+        """Drop cached results (they are also ignored once the data version moves)"""
+        with self._lock:
+            self._cache.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Pool sizing, timeouts and inline cache usage"""
+        return {
+            **self._counters,
+            "max_workers": self.max_workers,
+            "process_workers": self.process_workers,
+            "timeout_seconds": self.timeout,
+            "cached_results": len(self._cache),
+        }
+
+    def shutdown(self) -> None:
+        """Stop the pools (running computations are not cancelled)"""
+        with self._lock:
+            threads, self._threads = self._threads, None
+        if threads is not None:
+            threads.shutdown(wait=False, cancel_futures=True)
+        shutdown_process_pool()
+
+
+# Global instance keyed on the reports data version
+report_executor = ReportExecutor(lambda: reports_service.data_version)
@@ -0,0 +1,83 @@
+"""
+Streaming report exports: rows from the reports service encoded as CSV or NDJSON chunks
+Rows are pulled lazily, so memory stays flat and the header goes out before any row is computed
+"""
+
+import csv
+import io
+import json
+import os
+from typing import Any, Dict, Iterable, Iterator, Tuple
+
+# Media type per export format
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+# Column order per dataset
+EXPORT_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "cohort-progress": (
+        "cohort_id", "cohort_name", "course_id", "course_name", "total_students", "total_submissions",
+        "on_time_submissions", "late_submissions", "on_time_percentage", "late_percentage",
+    ),
+    "students": (
+        "user_id", "course_id", "course_name", "given_name", "family_name", "email",
+        "submissions", "expected_assignments", "completion_rate", "at_risk",
+    ),
+    "submissions": (
+        "id", "course_id", "user_id", "assignment_id", "submission_time", "status", "is_late", "grade",
+    ),
+}
+
+
+def chunk_rows() -> int:
+    """Rows encoded per chunk written to the socket (REPORTS_EXPORT_CHUNK_ROWS)"""
+    return max(1, int(os.getenv("REPORTS_EXPORT_CHUNK_ROWS", "500")))
+
+
+def stream_csv(rows: Iterable[Dict[str, Any]], columns: Tuple[str, ...], rows_per_chunk: int) -> Iterator[str]:
+    """Header first, then one chunk of CSV lines per rows_per_chunk rows"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore", lineterminator="\n")
+    writer.writeheader()
+    yield buffer.getvalue()
+
+    pending = 0
+    buffer.seek(0)
+    buffer.truncate()
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending == rows_per_chunk:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if pending:
+        yield buffer.getvalue()
+
+
+def stream_ndjson(rows: Iterable[Dict[str, Any]], columns: Tuple[str, ...], rows_per_chunk: int) -> Iterator[str]:
+    """One JSON object per line; the first line alone, then rows_per_chunk lines per chunk"""
+    lines = []
+    first = True
+    for row in rows:
+        lines.append(json.dumps({column: row.get(column) for column in columns}, ensure_ascii=False))
+        if first or len(lines) == rows_per_chunk:
+            first = False
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def stream_rows(rows: Iterable[Dict[str, Any]], dataset: str, export_format: str) -> Iterator[str]:
+    """Encode the rows of a dataset in the requested format"""
+    if dataset not in EXPORT_COLUMNS:
+        raise ValueError(f"Unknown export dataset: {dataset}")
+    if export_format == "csv":
+        return stream_csv(rows, EXPORT_COLUMNS[dataset], chunk_rows())
+    if export_format == "ndjson":
+        return stream_ndjson(rows, EXPORT_COLUMNS[dataset], chunk_rows())
+    raise ValueError(f"Unknown export format: {export_format}")
@@ -0,0 +1,203 @@
+"""
+Background report warmer: precomputes dashboards into the report executor cache
+Runs inside the FastAPI lifespan after startup, after each sync and on an interval
+"""
+
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..middleware.role_auth import role_auth
+from .report_executor import ReportExecutor, report_executor
+from .reports_service import ReportsService, reports_service
+
+logger = logging.getLogger(__name__)
+
+# Arguments the endpoints pass for their default views (cache keys must match)
+COHORT_PROGRESS_DEFAULT = (None, None, 10, None)
+ADMIN_DEFAULT_ID = "admin_001"
+
+# Job: (name, service method, positional arguments)
+WarmJob = Tuple[str, Callable, Tuple]
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class ReportWarmer:
+    """Precompute KPIs, cohort progress, overview stats and every coordinator/teacher dashboard
+
+    Results go through ReportExecutor.run, so they land in its per-version cache
+    and the first real request returns inline. A run starts on startup, when
+    trigger() is called (e.g. after a sync), when the reports data version moves,
+    and every `interval` seconds. At most `concurrency` jobs run at a time.
+    """
+
+    def __init__(
+        self,
+        executor: ReportExecutor,
+        service: ReportsService,
+        interval: Optional[float] = None,
+        concurrency: Optional[int] = None,
+        poll: Optional[float] = None,
+    ):
+        self.executor = executor
+        self.service = service
+        self.interval = interval if interval is not None else float(os.getenv("REPORTS_WARM_INTERVAL", "300"))
+        self.concurrency = concurrency or int(os.getenv("REPORTS_WARM_CONCURRENCY", "2"))
+        self.poll = poll if poll is not None else float(os.getenv("REPORTS_WARM_POLL", "5"))
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._pending_reason: Optional[str] = None
+        self._warmed_version: Any = None
+        self._last_started = 0.0
+        self._status: Dict[str, Any] = {"state": "stopped", "runs": 0, "last_run": None, "next_run_at": None}
+
+    def coordinator_ids(self) -> List[str]:
+        """REPORTS_WARM_COORDINATORS, or the coordinator emails of the role whitelist"""
+        configured = os.getenv("REPORTS_WARM_COORDINATORS", "")
+        if configured:
+            return [value.strip() for value in configured.split(",") if value.strip()]
+        whitelist = role_auth.roles_whitelist
+        return list(dict.fromkeys(whitelist.get("coordinador", []) + whitelist.get("coordinator", [])))
+
+    def teacher_ids(self) -> List[str]:
+        """Course owners of the report data (teacher dashboards are keyed by owner)"""
+        return list(dict.fromkeys(
+            course.get("owner_id") for course in self.service.mock_data["courses"] if course.get("owner_id")
+        ))
+
+    def jobs(self) -> List[WarmJob]:
+        service = self.service
+        jobs: List[WarmJob] = [
+            ("kpis", service.calculate_global_kpis, ()),
+            ("overview", service.get_overview_stats, ()),
+            ("cohort-progress", service.get_cohort_progress, COHORT_PROGRESS_DEFAULT),
+            ("admin", service.get_admin_dashboard, (ADMIN_DEFAULT_ID,)),
+        ]
+        jobs += [(f"coordinator:{value}", service.get_coordinator_dashboard, (value,)) for value in self.coordinator_ids()]
+        jobs += [(f"teacher:{value}", service.get_teacher_dashboard, (value,)) for value in self.teacher_ids()]
+        return jobs
+
+    async def warm(self, reason: str = "manual") -> Dict[str, Any]:
+        """Run every job once (bounded concurrency) and record the outcome"""
+        version = self.service.data_version
+        self._warmed_version = version
+        self._last_started = time.monotonic()
+        started_at = _now()
+        self._status["state"] = "running"
+        self._status["next_run_at"] = (
+            datetime.fromtimestamp(time.time() + self.interval, timezone.utc).isoformat() if self.interval else None
+        )
+        semaphore = asyncio.Semaphore(self.concurrency)
+        timings: Dict[str, float] = {}
+        errors: Dict[str, str] = {}
+
+        async def run(name: str, func: Callable, args: Tuple) -> None:
+            async with semaphore:
+                job_start = time.perf_counter()
+                try:
+                    await self.executor.run(func, *args)
+                except Exception as e:
+                    errors[name] = f"{type(e).__name__}: {e}"
+                timings[name] = round((time.perf_counter() - job_start) * 1000, 2)
+
+        start = time.perf_counter()
+        try:
+            jobs = self.jobs()
+            if len(jobs) > self.executor.cache_size:
+                logger.warning(f"{len(jobs)} warm-up jobs exceed REPORTS_CACHE_SIZE={self.executor.cache_size}; early results will be evicted")
+            await asyncio.gather(*(run(*job) for job in jobs))
+        except Exception as e:
+            # Building the job list failed (e.g. report data not loaded yet)
+            errors["jobs"] = f"{type(e).__name__}: {e}"
+        duration_ms = round((time.perf_counter() - start) * 1000, 2)
+
+        last_run = {
+            "reason": reason,
+            "started_at": started_at,
+            "finished_at": _now(),
+            "duration_ms": duration_ms,
+            "data_version": version,
+            "warmed": len(timings) - len(errors),
+            "failed": len(errors),
+            "errors": errors,
+            "slowest": sorted(timings.items(), key=lambda item: item[1], reverse=True)[:5],
+        }
+        self._status["runs"] += 1
+        self._status["last_run"] = last_run
+        self._status["state"] = "idle" if self._task else "stopped"
+        if errors:
+            logger.warning(f"Report warm-up ({reason}) finished with {len(errors)} errors in {duration_ms} ms: {errors}")
+        else:
+            logger.info(f"Report warm-up ({reason}) precomputed {last_run['warmed']} reports in {duration_ms} ms")
+        return last_run
+
+    def _next_reason(self) -> Optional[str]:
+        """Why the next run should start now (None = keep waiting)"""
+        if self._pending_reason:
+            reason, self._pending_reason = self._pending_reason, None
+            return reason
+        if self.service.data_version != self._warmed_version:
+            return "data-version"
+        if self.interval and time.monotonic() - self._last_started >= self.interval:
+            return "interval"
+        return None
+
+    async def _run(self) -> None:
+        await self.warm("startup")
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll or None)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            reason = self._next_reason()
+            if reason:
+                await self.warm(reason)
+
+    def start(self) -> None:
+        """Start the scheduler on the running event loop (idempotent)"""
+        if self._task and not self._task.done():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._status["state"] = "idle"
+        self._task = self._loop.create_task(self._run(), name="report-warmer")
+
+    def trigger(self, reason: str = "manual") -> None:
+        """Request a run as soon as possible (safe from any thread)"""
+        self._pending_reason = reason
+        if self._loop and self._wake and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def stop(self) -> None:
+        """Cancel the scheduler (a run in progress is abandoned)"""
+        task, self._task = self._task, None
+        if task:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._status["state"] = "stopped"
+        self._status["next_run_at"] = None
+
+    def get_status(self) -> Dict[str, Any]:
+        """Scheduler state, configuration and the last run's timing"""
+        return {
+            **self._status,
+            "interval_seconds": self.interval,
+            "concurrency": self.concurrency,
+            "warmed_version": self._warmed_version,
+            "current_version": self.service.data_version,
+        }
+
+
+# Global instance warming the shared executor cache
+report_warmer = ReportWarmer(report_executor, reports_service)
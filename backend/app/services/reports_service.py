@@ -3,42 +3,139 @@ Reports service for cohort progress calculations
 Compatible with FastAPI 0.104.0+ and Pydantic 2.4.0+
 """
 
-from typing import List, Optional, Dict, Any
-import json
+from datetime import date
+from typing import List, Optional, Dict, Any, Iterable, Iterator, Tuple
 import os
+import threading
 from ..models.reports import (
     ReportCohortProgress, CourseProgress, ReportCohortProgressResponse, KPIResponse,
     StudentDashboard, TeacherDashboard, CoordinatorDashboard, AdminDashboard,
     UpcomingDeadline, RecentActivity, ChartDataPoint, TrendsData, OverviewStats,
-    StudentProgress
+    StudentProgress, GradeDistribution, GradeHistogramBucket, GradePercentiles
 )
 import logging
+from .dataset_generator import is_generated_dataset, load_records, mock_data_dir
+from .parallel_cohorts import ParallelBuild
+from .report_aggregates import AT_RISK_COMPLETION, ReportAggregates
+from .submission_table import SubmissionTable
 
 logger = logging.getLogger(__name__)
 
 
+def _pick(item: Dict[str, Any], *keys: str, default: Any = None) -> Any:
+    """Return the first present key (drivers may use snake_case or camelCase)"""
+    for key in keys:
+        if key in item:
+            return item[key]
+    return default
+
+
+def _percentiles(sketch: Any) -> Dict[str, Optional[float]]:
+    """p10 / p50 / p90 of a grade sketch, rounded for display"""
+    values = sketch.quantiles((0.1, 0.5, 0.9))
+    return {name: None if value is None else round(value, 2) for name, value in zip(("p10", "p50", "p90"), values)}
+
+
+# Field projections requested from the data driver (only what the reports read)
+REPORT_COURSE_FIELDS = ("id", "name", "section", "owner_id")
+REPORT_STUDENT_FIELDS = ("user_id", "profile.id", "profile.name", "profile.email_address")
+REPORT_SUBMISSION_FIELDS = ("id", "user_id", "course_work_id", "update_time", "late", "assigned_grade", "state")
+REPORT_BUNDLE_FIELDS = {
+    "course": REPORT_COURSE_FIELDS,
+    "students": REPORT_STUDENT_FIELDS,
+    "course_work": ("id",),
+    "student_submissions": REPORT_SUBMISSION_FIELDS,
+}
+
+
 class ReportsService:
     """Service for generating cohort progress reports from mock data"""
     
     def __init__(self):
         self.demo_mode = os.getenv("DEMO_MODE", "mock")
         self.mock_data = self._load_mock_data()
-    
+        self.data_version = 1
+        self._aggregates: Optional[ReportAggregates] = None
+        # Report methods run on worker threads: one index build at a time, no reads mid-delta
+        self._lock = threading.RLock()
+        # (data version, data, build) of the process-pool build in flight
+        self._pending: Optional[Tuple[int, Dict[str, Any], ParallelBuild]] = None
+        # Tables at least this large build their aggregates across the process pool (0 = never)
+        self.parallel_min_rows = int(os.getenv("REPORTS_PARALLEL_MIN_ROWS", "1000000"))
+
+    @property
+    def aggregates(self) -> ReportAggregates:
+        """Aggregate index for the current data version (built on first use)
+
+        Large tables build across the process pool; the service lock is only
+        held to copy the columns and to install the result, never while waiting.
+        """
+        while True:
+            with self._lock:
+                index = self._aggregates
+                if index is not None and index.data_version == self.data_version:
+                    return index
+                version, data = self.data_version, self.mock_data
+                submissions = data["submissions"]
+                if not self.parallel_min_rows or len(submissions) < self.parallel_min_rows:
+                    return self._locked_aggregates()
+                # Concurrent readers of the same version share one build
+                pending = self._pending
+                if pending is None or pending[0] != version or pending[1] is not data:
+                    try:
+                        pending = (version, data, ParallelBuild(submissions))
+                    except Exception as e:
+                        logger.warning(f"Parallel aggregate build failed to start, building inline: {e}")
+                        return self._locked_aggregates()
+                    self._pending = pending
+                build = pending[2]
+
+            try:
+                parts = build.result()
+            except Exception as e:
+                logger.warning(f"Parallel aggregate build failed, building inline: {e}")
+                parts = None
+
+            with self._lock:
+                if self._pending is pending:
+                    self._pending = None
+                index = self._aggregates
+                if index is not None and index.data_version == self.data_version:
+                    return index
+                if parts is None:
+                    return self._locked_aggregates()
+                if self.data_version == version and self.mock_data is data:
+                    self._aggregates = ReportAggregates.build(data, version, parts=parts)
+                    return self._aggregates
+            # The data moved while the workers ran: build again for the new version
+
+    def _locked_aggregates(self) -> ReportAggregates:
+        """Aggregate index for callers already holding the lock (stale indexes rebuild inline)"""
+        with self._lock:
+            if self._aggregates is None or self._aggregates.data_version != self.data_version:
+                self._aggregates = ReportAggregates.build(self.mock_data, self.data_version)
+            return self._aggregates
+
     def _load_mock_data(self) -> Dict[str, Any]:
         """Load mock data for reports generation"""
         try:
+            data_dir = mock_data_dir()
+
             # Load students data
-            students_path = os.path.join(os.path.dirname(__file__), "..", "..", "data", "mock", "students.json")
-            with open(students_path, 'r', encoding='utf-8') as f:
-                students_data = json.load(f)
+            students_data = list(load_records(os.path.join(data_dir, "students.json")))
             
             # Load courses data
-            courses_path = os.path.join(os.path.dirname(__file__), "..", "..", "data", "mock", "courses.json")
-            with open(courses_path, 'r', encoding='utf-8') as f:
-                courses_data = json.load(f)
+            courses_data = list(load_records(os.path.join(data_dir, "courses.json")))
             
-            # Load submissions data (mock)
-            submissions_data = self._generate_mock_submissions(students_data, courses_data)
+            if is_generated_dataset(data_dir):
+                # Generated datasets ship real submissions: stream them into columns
+                submissions_data = SubmissionTable.from_records(
+                    self._normalize_submission(submission, submission["course_id"])
+                    for submission in load_records(os.path.join(data_dir, "submissions.json"))
+                )
+            else:
+                # Load submissions data (mock)
+                submissions_data = SubmissionTable.from_records(self._generate_mock_submissions(students_data, courses_data))
             
             return {
                 "students": students_data,
@@ -47,7 +144,7 @@ class ReportsService:
             }
         except Exception as e:
             logger.error(f"Error loading mock data: {e}")
-            return {"students": [], "courses": [], "submissions": []}
+            return {"students": [], "courses": [], "submissions": SubmissionTable()}
     
     def _generate_mock_submissions(self, students: List[Dict], courses: List[Dict]) -> List[Dict]:
         """Generate mock submissions data for reports"""
@@ -76,6 +173,125 @@ class ReportsService:
         
         return submissions
     
+    async def refresh_from_driver(self, driver) -> bool:
+        """Reload report data from a data driver using concurrent per-course bundles"""
+        try:
+            courses, students, submissions = [], [], SubmissionTable()
+
+            course_ids = [course["id"] async for course in driver.iter_courses(prefetch=True, fields=("id",))]
+            # One concurrent bundle per course instead of sequential reads
+            bundles = await driver.get_course_bundles(course_ids, fields=REPORT_BUNDLE_FIELDS)
+
+            for course_id in course_ids:
+                bundle = bundles.get(course_id)
+                if bundle is None:
+                    continue
+                course = bundle["course"]
+                courses.append({**course, "owner_id": _pick(course, "owner_id", "ownerId", default="")})
+                students.extend(self._normalize_student(student, course_id) for student in bundle["students"])
+                for submission in bundle["student_submissions"]:
+                    submissions.append(self._normalize_submission(submission, course_id))
+
+            with self._lock:
+                self.mock_data = {"students": students, "courses": courses, "submissions": submissions}
+                self.data_version += 1
+            logger.info(f"Loaded report data from driver: {len(courses)} courses, {len(students)} students, {len(submissions)} submissions")
+            return True
+
+        except Exception as e:
+            logger.error(f"Error loading report data from driver: {e}")
+            return False
+
+    def apply_submission_events(self, events: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+        """Apply submission deltas to the report data and the aggregate index
+
+        Each event is {"type": "added" | "updated" | "removed", "course_id": ...,
+        "submission": {...}} with the submission in the driver layout. Added and
+        updated act as upserts by submission ID; removed only needs the ID. The
+        index is updated in place and the data version moves forward without a
+        rebuild.
+        """
+        self.aggregates  # build outside the lock first (large tables use the process pool)
+        with self._lock:
+            index = self._locked_aggregates()
+            table: SubmissionTable = self.mock_data["submissions"]
+            applied = {"added": 0, "updated": 0, "removed": 0, "ignored": 0}
+
+            for event in events:
+                event_type = event.get("type")
+                submission = event.get("submission", {})
+                position = table.position(submission.get("id"))
+
+                if event_type == "removed" and position is not None:
+                    index.apply(table.row(position), None)
+                    table.remove(position)
+                elif event_type in ("added", "updated"):
+                    record = self._normalize_submission(submission, event.get("course_id") or submission.get("course_id"))
+                    if position is None:
+                        index.apply(None, record)
+                        table.append(record)
+                    else:
+                        index.apply(table.row(position), record)
+                        table.update(position, record)
+                else:
+                    applied["ignored"] += 1
+                    continue
+                applied[event_type] += 1
+
+            if applied["added"] or applied["updated"] or applied["removed"]:
+                self.data_version += 1
+                index.data_version = self.data_version
+            return applied
+
+    def check_aggregates(self) -> Dict[str, Any]:
+        """Compare the live aggregate index against a full rebuild"""
+        self.aggregates  # build outside the lock first (large tables use the process pool)
+        with self._lock:
+            index = self._locked_aggregates()
+            mismatches = index.diff(ReportAggregates.build(self.mock_data, self.data_version))
+        if mismatches:
+            logger.warning(f"Report aggregates differ from a full rebuild: {mismatches}")
+        return {
+            "consistent": not mismatches,
+            "mismatches": mismatches,
+            "data_version": self.data_version,
+            "events_applied": index.events_applied,
+        }
+
+    @staticmethod
+    def _normalize_student(student: Dict[str, Any], course_id: str) -> Dict[str, Any]:
+        """Map a driver student to the report data layout"""
+        profile = student.get("profile", {})
+        name = profile.get("name", {})
+        return {
+            "user_id": _pick(student, "user_id", "userId"),
+            "course_id": course_id,
+            "profile": {
+                "id": profile.get("id"),
+                "name": {
+                    "given_name": _pick(name, "given_name", "givenName", default=""),
+                    "family_name": _pick(name, "family_name", "familyName", default=""),
+                    "full_name": _pick(name, "full_name", "fullName", default="")
+                },
+                "email_address": _pick(profile, "email_address", "emailAddress", default="")
+            }
+        }
+
+    @staticmethod
+    def _normalize_submission(submission: Dict[str, Any], course_id: str) -> Dict[str, Any]:
+        """Map a driver submission to the report data layout"""
+        return {
+            "id": submission.get("id"),
+            "user_id": _pick(submission, "user_id", "userId"),
+            "course_id": course_id,
+            "assignment_id": _pick(submission, "course_work_id", "courseWorkId"),
+            "submission_time": _pick(submission, "update_time", "updateTime"),
+            "due_time": None,
+            "is_late": bool(submission.get("late")),
+            "grade": _pick(submission, "assigned_grade", "assignedGrade"),
+            "status": submission.get("state")
+        }
+
     def get_cohort_progress(
         self, 
         cohort_id: Optional[str] = None,
@@ -107,7 +323,6 @@ class ReportsService:
 
             # Generate chart data for Tremor
             chart_data = []
-            trends_data = []
             total_on_time = 0
             total_late = 0
 
@@ -121,21 +336,8 @@ class ReportsService:
                 total_on_time += cohort.on_time_submissions
                 total_late += cohort.late_submissions
 
-            # Mock trends data (in real app, this would be calculated from historical data)
-            trends_data = [
-                TrendsData(
-                    period="Enero 2024",
-                    onTimeSubmissions=6,
-                    lateSubmissions=2,
-                    totalSubmissions=8
-                ),
-                TrendsData(
-                    period="Febrero 2024",
-                    onTimeSubmissions=total_on_time,
-                    lateSubmissions=total_late,
-                    totalSubmissions=total_on_time + total_late
-                )
-            ]
+            # Monthly trends for the listed cohorts, read from the pre-aggregated rollups
+            trends_data = self.get_trends("month", course_ids=[cohort.courses[0].course_id for cohort in cohorts])
 
             # Summary statistics
             summary = {
@@ -169,54 +371,224 @@ class ReportsService:
                 summary={"totalSubmissions": 0, "overallOnTimePercentage": 0, "bestPerformingCohort": "N/A", "worstPerformingCohort": "N/A"}
             )
     
+    def get_trends(
+        self,
+        granularity: str = "month",
+        course_ids: Optional[Iterable[str]] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None
+    ) -> List[TrendsData]:
+        """On-time / late submissions per day, ISO week or month (all courses when course_ids is None)"""
+        return [
+            TrendsData(
+                period=bucket["period"],
+                onTimeSubmissions=bucket["on_time"],
+                lateSubmissions=bucket["late"],
+                totalSubmissions=bucket["total"]
+            )
+            for bucket in self.aggregates.trends.series(granularity, course_ids, start, end)
+        ]
+
+    @staticmethod
+    def _cohort_id(course_id: str) -> str:
+        """Cohort identifier of a course (one cohort per course)"""
+        return f"{course_id}_cohort_001"
+
+    def get_grade_distribution(
+        self,
+        cohort_id: Optional[str] = None,
+        course_id: Optional[str] = None,
+        assignment_id: Optional[str] = None,
+        bins: int = 10
+    ) -> GradeDistribution:
+        """Grade percentiles and histogram from the quantile sketches
+
+        The most specific filter sets the scope: coursework (course_id and
+        assignment_id), course, cohort, or the whole institution.
+        """
+        if assignment_id and not course_id:
+            raise ValueError("assignment_id requires course_id")
+
+        self.aggregates  # build outside the lock first (large tables use the process pool)
+        with self._lock:
+            index = self._locked_aggregates()
+            grades = index.grades
+            grades.refresh(self.mock_data["submissions"])
+
+            if course_id and course_id not in index.courses_by_id and course_id not in grades.sketches:
+                raise ValueError(f"Course {course_id} not found")
+            if assignment_id:
+                scope, scope_id = "coursework", assignment_id
+                sketch = grades.coursework(course_id, assignment_id)
+                children = []
+            elif course_id:
+                scope, scope_id = "course", course_id
+                sketch = grades.course(course_id)
+                children = [
+                    (assignment, assignment, child)
+                    for assignment, child in sorted(grades.sketches.get(course_id, {}).items(), key=lambda item: str(item[0]))
+                ]
+            else:
+                if cohort_id:
+                    scope, scope_id = "cohort", cohort_id
+                    course_ids = [key for key in index.students_by_course if self._cohort_id(key) == cohort_id]
+                    if not course_ids:
+                        raise ValueError(f"Cohort {cohort_id} not found")
+                    sketch = grades.courses(course_ids)
+                else:
+                    scope, scope_id = "institution", None
+                    course_ids = list(dict.fromkeys([*index.students_by_course, *grades.sketches]))
+                    sketch = grades.institution()
+                children = [
+                    (key, index.courses_by_id.get(key, {}).get("name", key), grades.course(key))
+                    for key in course_ids
+                ]
+
+            return GradeDistribution(
+                scope=scope,
+                scope_id=scope_id,
+                count=sketch.count,
+                mean=round(sketch.mean, 2) if sketch.count else None,
+                min=sketch.min if sketch.count else None,
+                max=sketch.max if sketch.count else None,
+                **_percentiles(sketch),
+                is_approximate=not sketch.is_exact,
+                histogram=[
+                    GradeHistogramBucket(lower=round(bucket["lower"], 2), upper=round(bucket["upper"], 2), count=bucket["count"])
+                    for bucket in sketch.histogram(bins)
+                ],
+                breakdown=[
+                    GradePercentiles(
+                        id=str(child_id),
+                        name=str(name),
+                        count=child.count,
+                        mean=round(child.mean, 2) if child.count else None,
+                        **_percentiles(child)
+                    )
+                    for child_id, name, child in children
+                ],
+            )
+
+    def iter_cohort_rows(
+        self,
+        cohort_id: Optional[str] = None,
+        course_id: Optional[str] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Flat cohort progress rows for export (one row per cohort course)"""
+        for cohort in self._iter_cohorts(cohort_id, course_id):
+            for course in cohort.courses:
+                yield {
+                    "cohort_id": cohort.cohort_id,
+                    "cohort_name": cohort.cohort_name,
+                    "course_id": course.course_id,
+                    "course_name": course.course_name,
+                    "total_students": course.total_students,
+                    "total_submissions": course.on_time_submissions + course.late_submissions,
+                    "on_time_submissions": course.on_time_submissions,
+                    "late_submissions": course.late_submissions,
+                    "on_time_percentage": course.on_time_percentage,
+                    "late_percentage": course.late_percentage,
+                }
+
+    def iter_student_rows(self, course_id: Optional[str] = None, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """Per-student progress rows for export, one per student record
+
+        Rows are produced in batches under the service lock, so deltas applied
+        while a long export streams land between batches, never inside a row.
+        """
+        self.aggregates  # build outside the lock first (large tables use the process pool)
+        with self._lock:
+            index = self._locked_aggregates()
+            students = self.mock_data["students"]
+
+        for start in range(0, len(students), batch_size):
+            rows = []
+            with self._lock:
+                for student in students[start:start + batch_size]:
+                    student_course = student.get("course_id")
+                    if course_id and student_course != course_id:
+                        continue
+                    user_id = student.get("user_id")
+                    profile = student.get("profile", {})
+                    name = profile.get("name", {})
+                    rate = index.completion_rate(student_course, user_id)
+                    rows.append({
+                        "user_id": user_id,
+                        "course_id": student_course,
+                        "course_name": index.courses_by_id.get(student_course, {}).get("name"),
+                        "given_name": name.get("given_name", ""),
+                        "family_name": name.get("family_name", ""),
+                        "email": profile.get("email_address", ""),
+                        "submissions": index.pair_counts.get((student_course, user_id), 0),
+                        "expected_assignments": index.expected_by_course.get(student_course, 0),
+                        "completion_rate": round(rate, 2),
+                        "at_risk": rate < AT_RISK_COMPLETION,
+                    })
+            yield from rows
+
+    def iter_submission_rows(self, course_id: Optional[str] = None, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """Submission rows for export, read from the columnar table in batches under the service lock"""
+        with self._lock:
+            submissions: SubmissionTable = self.mock_data["submissions"]
+            course_code = submissions.courses.code_of(course_id) if course_id else None
+        if course_id and course_code is None:
+            return
+
+        start = 0
+        while True:
+            rows = []
+            with self._lock:
+                # Re-read the length: removals shrink the table while the export streams
+                stop = min(start + batch_size, len(submissions))
+                for position in range(start, stop):
+                    if course_code is not None and submissions.course[position] != course_code:
+                        continue
+                    rows.append({"id": submissions.ids[position], **submissions.row(position)})
+            if start >= stop:
+                return
+            start = stop
+            yield from rows
+
     def _generate_cohort_data(
         self, 
         cohort_id: Optional[str] = None,
         course_id: Optional[str] = None
     ) -> List[ReportCohortProgress]:
         """Generate cohort progress data from mock data"""
-        
-        cohorts = []
-        
-        # Group students by course to create cohorts
-        course_groups = {}
-        for student in self.mock_data["students"]:
-            course_id_student = student.get("course_id")
-            if course_id_student not in course_groups:
-                course_groups[course_id_student] = []
-            course_groups[course_id_student].append(student)
-        
-        # Create cohort progress for each course
-        for course_id_key, students in course_groups.items():
+        return list(self._iter_cohorts(cohort_id, course_id))
+
+    def _iter_cohorts(
+        self,
+        cohort_id: Optional[str] = None,
+        course_id: Optional[str] = None
+    ) -> Iterator[ReportCohortProgress]:
+        """One cohort progress model per course, built lazily"""
+        index = self.aggregates
+
+        # One cohort per course, in first-seen order of the students
+        for course_id_key, total_students in index.students_by_course.items():
             if course_id and course_id_key != course_id:
                 continue
             
             # Find course information
-            course_info = None
-            for course in self.mock_data["courses"]:
-                if course.get("id") == course_id_key:
-                    course_info = course
-                    break
+            course_info = index.courses_by_id.get(course_id_key)
             
             if not course_info:
                 continue
             
             # Generate cohort ID and name
-            cohort_id_generated = f"{course_id_key}_cohort_001"
+            cohort_id_generated = self._cohort_id(course_id_key)
             cohort_name = f"Cohorte {course_info.get('name', 'Unknown')} 2024-1"
             
             if cohort_id and cohort_id_generated != cohort_id:
                 continue
             
             # Calculate submissions for this cohort
-            cohort_submissions = [
-                sub for sub in self.mock_data["submissions"]
-                if sub.get("course_id") == course_id_key
-            ]
+            stats = index.course(course_id_key)
             
-            on_time_submissions = len([s for s in cohort_submissions if not s.get("is_late", False)])
-            late_submissions = len([s for s in cohort_submissions if s.get("is_late", False)])
-            total_submissions = len(cohort_submissions)
+            late_submissions = stats["late"]
+            total_submissions = stats["total"]
+            on_time_submissions = total_submissions - late_submissions
             
             # Calculate percentages
             on_time_percentage = (on_time_submissions / total_submissions * 100) if total_submissions > 0 else 0
@@ -226,7 +598,7 @@ class ReportsService:
             course_progress = CourseProgress(
                 course_id=course_id_key,
                 course_name=course_info.get("name", "Unknown Course"),
-                total_students=len(students),
+                total_students=total_students,
                 on_time_submissions=on_time_submissions,
                 late_submissions=late_submissions,
                 on_time_percentage=round(on_time_percentage, 2),
@@ -237,7 +609,7 @@ class ReportsService:
             cohort_progress = ReportCohortProgress(
                 cohort_id=cohort_id_generated,
                 cohort_name=cohort_name,
-                total_students=len(students),
+                total_students=total_students,
                 total_submissions=total_submissions,
                 on_time_submissions=on_time_submissions,
                 late_submissions=late_submissions,
@@ -247,43 +619,31 @@ class ReportsService:
                 is_google_data=(self.demo_mode == "google")
             )
             
-            cohorts.append(cohort_progress)
-        
-        return cohorts
+            yield cohort_progress
     
     def calculate_global_kpis(self) -> KPIResponse:
         """Calculate global KPIs from mock data"""
         try:
-            students = self.mock_data["students"]
-            courses = self.mock_data["courses"]
-            submissions = self.mock_data["submissions"]
+            index = self.aggregates
 
             # Basic counts
-            total_students = len(students)
-            total_courses = len(courses)
-            total_submissions = len(submissions)
+            total_students = len(index.completion_rates)
+            total_courses = index.course_count
+            totals = index.totals
+            total_submissions = totals["total"]
 
             # Submission analysis
-            on_time_submissions = len([s for s in submissions if not s.get("is_late", False)])
-            late_submissions = len([s for s in submissions if s.get("is_late", False)])
+            late_submissions = totals["late"]
+            on_time_submissions = total_submissions - late_submissions
 
             # Calculate percentages
             on_time_percentage = (on_time_submissions / total_submissions * 100) if total_submissions > 0 else 0
 
-            # Calculate completion rates per student
-            completion_rates = []
-            for student in students:
-                student_submissions = [s for s in submissions if s.get("user_id") == student.get("user_id")]
-                # Assume 3 assignments per student per course
-                expected_submissions = 3
-                completion_rate = (len(student_submissions) / expected_submissions * 100) if expected_submissions > 0 else 0
-                completion_rates.append(completion_rate)
-
-            # Average completion rate
-            average_completion_rate = sum(completion_rates) / len(completion_rates) if completion_rates else 0
+            # Average completion rate (per student, precomputed in the index)
+            average_completion_rate = index.average_completion
 
             # Students at risk (completion rate < 50%)
-            students_at_risk = len([rate for rate in completion_rates if rate < 50])
+            students_at_risk = index.at_risk
 
             # Teachers count (assume 1 teacher per course for mock data)
             total_teachers = total_courses
@@ -292,7 +652,7 @@ class ReportsService:
             active_courses = total_courses
 
             # Completed vs pending assignments
-            completed_assignments = len([s for s in submissions if s.get("status") == "TURNED_IN"])
+            completed_assignments = totals["turned_in"]
             pending_assignments = total_submissions - completed_assignments
 
             return KPIResponse(
@@ -335,38 +695,29 @@ class ReportsService:
     def get_student_dashboard(self, student_id: str) -> StudentDashboard:
         """Get student dashboard data from mock data"""
         try:
+            index = self.aggregates
+
             # Find student
-            student = None
-            for s in self.mock_data["students"]:
-                if s.get("user_id") == student_id:
-                    student = s
-                    break
+            student = index.students_by_id.get(student_id)
 
             if not student:
                 raise ValueError(f"Student {student_id} not found")
 
             # Get student's course
-            course = None
-            for c in self.mock_data["courses"]:
-                if c.get("id") == student.get("course_id"):
-                    course = c
-                    break
-
-            # Get student submissions
-            student_submissions = [
-                sub for sub in self.mock_data["submissions"]
-                if sub.get("user_id") == student_id
-            ]
+            course = index.courses_by_id.get(student.get("course_id"))
+
+            # Get student submission counters
+            stats = index.user(student_id)
 
             # Calculate metrics
-            completed_submissions = len([s for s in student_submissions if s.get("status") == "TURNED_IN"])
-            late_submissions = len([s for s in student_submissions if s.get("is_late")])
-            total_expected = 3  # Mock: 3 assignments per course
+            completed_submissions = stats["turned_in"]
+            late_submissions = stats["late"]
+            total_expected = index.expected_by_user.get(student_id, 0)
             pending_submissions = max(0, total_expected - completed_submissions)
 
             # Calculate average grade
-            graded_submissions = [s for s in student_submissions if s.get("grade")]
-            average_grade = sum(s.get("grade", 0) for s in graded_submissions) / len(graded_submissions) if graded_submissions else 0
+            graded = stats["graded"]
+            average_grade = stats["grade_sum"] / graded if graded else 0
 
             # Calculate completion rate
             completion_rate = (completed_submissions / total_expected * 100) if total_expected > 0 else 0
@@ -436,21 +787,23 @@ class ReportsService:
             my_classes = len(teacher_courses)
             total_students = 0
             pending_grading = 0
-            all_grades = []
+            grade_sum = 0.0
+            graded = 0
+            index = self.aggregates
 
             for course in teacher_courses:
                 # Count students in this course
-                course_students = [s for s in self.mock_data["students"] if s.get("course_id") == course.get("id")]
-                total_students += len(course_students)
+                total_students += index.students_by_course.get(course.get("id"), 0)
 
                 # Count pending grading (submissions without grades)
-                course_submissions = [s for s in self.mock_data["submissions"] if s.get("course_id") == course.get("id")]
-                pending_grading += len([s for s in course_submissions if not s.get("grade")])
+                stats = index.course(course.get("id"))
+                pending_grading += stats["total"] - stats["graded"]
 
                 # Collect all grades
-                all_grades.extend([s.get("grade", 0) for s in course_submissions if s.get("grade")])
+                grade_sum += stats["grade_sum"]
+                graded += stats["graded"]
 
-            average_class_grade = sum(all_grades) / len(all_grades) if all_grades else 0
+            average_class_grade = grade_sum / graded if graded else 0
 
             # Mock student progress summary
             student_progress = [
@@ -489,31 +842,25 @@ class ReportsService:
         """Get coordinator dashboard data from mock data"""
         try:
             # Calculate global metrics for coordinator view
-            total_cohorts = len(set(s.get("course_id") for s in self.mock_data["students"]))
-            total_students = len(self.mock_data["students"])
-            total_teachers = len(self.mock_data["courses"])  # Assume 1 teacher per course
+            index = self.aggregates
+            total_cohorts = len(index.students_by_course)
+            total_students = len(index.completion_rates)
+            total_teachers = index.course_count  # Assume 1 teacher per course
 
             # Calculate average progress
-            all_completion_rates = []
-            for student in self.mock_data["students"]:
-                student_submissions = [s for s in self.mock_data["submissions"] if s.get("user_id") == student.get("user_id")]
-                completion_rate = (len(student_submissions) / 3 * 100)  # 3 assignments expected
-                all_completion_rates.append(completion_rate)
-
-            average_cohort_progress = sum(all_completion_rates) / len(all_completion_rates) if all_completion_rates else 0
-            cohorts_at_risk = len([rate for rate in all_completion_rates if rate < 50])
+            average_cohort_progress = index.average_completion
+            cohorts_at_risk = index.at_risk
 
             # Calculate additional metrics
             completion_rate = round(average_cohort_progress, 1)
             punctuality_rate = 85.0  # Mock punctuality rate
-            students_at_risk = len([rate for rate in all_completion_rates if rate < 60])
+            students_at_risk = index.needs_attention
             average_grade = 8.4  # Mock average grade
 
             # Generate student progress data
             student_progress = []
-            for student in self.mock_data["students"]:
-                student_submissions = [s for s in self.mock_data["submissions"] if s.get("user_id") == student.get("user_id")]
-                completion_rate_student = min(100, (len(student_submissions) / 3 * 100))
+            for student, rate in zip(self.mock_data["students"], index.completion_rates):
+                completion_rate_student = min(100, rate)
                 
                 # Get course name
                 course_id = student.get("course_id", "unknown")
@@ -619,11 +966,11 @@ class ReportsService:
             # Calculate overview statistics from mock data
             total_students = len(self.mock_data.get("students", []))
             total_courses = len(self.mock_data.get("courses", []))
-            total_submissions = len(self.mock_data.get("submissions", []))
+            totals = self.aggregates.totals
+            total_submissions = totals["total"]
             
             # Calculate late submissions
-            late_submissions = sum(1 for sub in self.mock_data.get("submissions", []) 
-                                 if sub.get("late", False))
+            late_submissions = totals["late"]
             
             # Calculate completion rate (mock calculation)
             completion_rate = 78.5 if total_students > 0 else 0.0
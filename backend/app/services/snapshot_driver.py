@@ -0,0 +1,186 @@
+"""
+Driver SNAPSHOT: sirve datos desde una base SQLite local sincronizada desde Classroom
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional
+
+from .base import BaseDataDriver
+from .projection import FieldMask, project, project_items
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS courses (
+    pk INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    update_time TEXT,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS students (
+    pk INTEGER PRIMARY KEY,
+    course_id TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    data TEXT NOT NULL,
+    UNIQUE (course_id, user_id)
+);
+CREATE TABLE IF NOT EXISTS coursework (
+    pk INTEGER PRIMARY KEY,
+    course_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    update_time TEXT,
+    data TEXT NOT NULL,
+    UNIQUE (course_id, id)
+);
+CREATE TABLE IF NOT EXISTS submissions (
+    pk INTEGER PRIMARY KEY,
+    course_id TEXT NOT NULL,
+    course_work_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    user_id TEXT,
+    update_time TEXT,
+    data TEXT NOT NULL,
+    UNIQUE (course_id, course_work_id, id)
+);
+CREATE TABLE IF NOT EXISTS user_profiles (
+    id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_students_course ON students (course_id, pk);
+CREATE INDEX IF NOT EXISTS idx_coursework_course ON coursework (course_id, pk);
+CREATE INDEX IF NOT EXISTS idx_submissions_course ON submissions (course_id, pk);
+CREATE INDEX IF NOT EXISTS idx_submissions_coursework ON submissions (course_id, course_work_id, pk);
+CREATE INDEX IF NOT EXISTS idx_submissions_user ON submissions (user_id);
+"""
+
+
+def default_snapshot_path() -> str:
+    """Ruta de la base SQLite (configurable con SNAPSHOT_DB_PATH)"""
+    return os.getenv(
+        'SNAPSHOT_DB_PATH',
+        os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'snapshot.db')
+    )
+
+
+def connect_snapshot(db_path: str) -> sqlite3.Connection:
+    """Abrir conexión con el esquema creado y WAL (lecturas concurrentes a la sincronización)"""
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.executescript(SCHEMA)
+    return conn
+
+
+class SnapshotDataDriver(BaseDataDriver):
+    """Driver SNAPSHOT para lecturas locales desde SQLite"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        super().__init__()
+        self.db_path = db_path or default_snapshot_path()
+        self._conn = connect_snapshot(self.db_path)
+        self._lock = threading.Lock()
+
+    def _query(self, sql: str, params: tuple = ()) -> List[tuple]:
+        """Ejecutar consulta de lectura"""
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _page(self, table: str, items_key: str, where: str, params: tuple, page_size: int, page_token: Optional[str], fields: FieldMask = None) -> Dict[str, Any]:
+        """Paginación por clave (pk) sobre un índice (filtro, pk)"""
+        last_pk = int(page_token) if page_token and page_token.isdigit() else 0
+        rows = self._query(
+            f"SELECT pk, data FROM {table} WHERE {where} AND pk > ? ORDER BY pk LIMIT ?",
+            params + (last_pk, page_size + 1)
+        )
+        total_items = self._query(f"SELECT COUNT(*) FROM {table} WHERE {where}", params)[0][0]
+
+        page_rows = rows[:page_size]
+        next_page_token = str(page_rows[-1][0]) if len(rows) > page_size else None
+        return {
+            items_key: project_items([json.loads(data) for _, data in page_rows], fields),
+            'next_page_token': next_page_token,
+            'total_items': total_items
+        }
+
+    async def get_courses(self, page_size: int = 10, page_token: Optional[str] = None, fields: FieldMask = None) -> Dict[str, Any]:
+        """Obtener lista de cursos desde el snapshot"""
+        return self._page('courses', 'courses', '1 = 1', (), page_size, page_token, fields)
+
+    async def get_course(self, course_id: str, fields: FieldMask = None) -> Dict[str, Any]:
+        """Obtener un curso específico desde el snapshot"""
+        rows = self._query("SELECT data FROM courses WHERE id = ?", (course_id,))
+        return project(json.loads(rows[0][0]), fields) if rows else None
+
+    async def get_students(self, course_id: str, page_size: int = 10, page_token: Optional[str] = None, fields: FieldMask = None) -> Dict[str, Any]:
+        """Obtener estudiantes de un curso desde el snapshot"""
+        return self._page('students', 'students', 'course_id = ?', (course_id,), page_size, page_token, fields)
+
+    async def get_coursework(self, course_id: str, page_size: int = 10, page_token: Optional[str] = None, fields: FieldMask = None) -> Dict[str, Any]:
+        """Obtener trabajos de curso desde el snapshot"""
+        return self._page('coursework', 'course_work', 'course_id = ?', (course_id,), page_size, page_token, fields)
+
+    async def get_submissions(self, course_id: str, coursework_id: str, page_size: int = 10, page_token: Optional[str] = None, fields: FieldMask = None) -> Dict[str, Any]:
+        """Obtener entregas de un trabajo desde el snapshot"""
+        return self._page(
+            'submissions', 'student_submissions', 'course_id = ? AND course_work_id = ?',
+            (course_id, coursework_id), page_size, page_token, fields
+        )
+
+    async def list_course_submissions(self, course_id: str, page_size: int = 10, page_token: Optional[str] = None, fields: FieldMask = None) -> Dict[str, Any]:
+        """Obtener todas las entregas de un curso desde el snapshot"""
+        return self._page('submissions', 'student_submissions', 'course_id = ?', (course_id,), page_size, page_token, fields)
+
+    async def get_submissions_batch(self, course_id: str, coursework_ids: List[str], page_size: int = 100, fields: FieldMask = None) -> Dict[str, List[Dict[str, Any]]]:
+        """Obtener entregas de varios trabajos con una sola consulta"""
+        results = {coursework_id: [] for coursework_id in coursework_ids}
+        if not coursework_ids:
+            return results
+
+        placeholders = ','.join('?' for _ in coursework_ids)
+        rows = self._query(
+            f"SELECT course_work_id, data FROM submissions WHERE course_id = ? AND course_work_id IN ({placeholders}) ORDER BY pk",
+            (course_id, *coursework_ids)
+        )
+        for coursework_id, data in rows:
+            results[coursework_id].append(project(json.loads(data), fields))
+        return results
+
+    async def get_user_profile(self, user_id: str, fields: FieldMask = None) -> Dict[str, Any]:
+        """Obtener perfil de usuario desde el snapshot"""
+        rows = self._query("SELECT data FROM user_profiles WHERE id = ?", (user_id,))
+        return project(json.loads(rows[0][0]), fields) if rows else None
+
+    def get_sync_state(self) -> Dict[str, str]:
+        """Estado de la última sincronización"""
+        return dict(self._query("SELECT key, value FROM sync_state"))
+
+    def get_data_version(self) -> Optional[str]:
+        """Versión registrada por la última sincronización"""
+        rows = self._query("SELECT value FROM sync_state WHERE key = 'data_version'")
+        return f"snapshot:{rows[0][0] if rows else 0}"
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Tamaño del snapshot y estado de sincronización"""
+        counts = {
+            table: self._query(f"SELECT COUNT(*) FROM {table}")[0][0]
+            for table in ('courses', 'students', 'coursework', 'submissions', 'user_profiles')
+        }
+        return {'snapshot': {'db_path': self.db_path, 'rows': counts, 'sync_state': self.get_sync_state()}}
+
+    async def close(self) -> None:
+        """Cerrar la conexión SQLite"""
+        with self._lock:
+            self._conn.close()
+
+
+# LECCIÓN APRENDIDA: Snapshot local en SQLite
+# - Lecturas locales sin depender de la latencia ni la cuota de Classroom
+# - Índices (filtro, pk) y paginación por clave en lugar de OFFSET
+# - WAL para leer mientras la sincronización escribe
@@ -0,0 +1,408 @@
+"""
+Sincronización del snapshot SQLite desde un driver de origen (Google o MOCK)
+
+Uso offline desde los fixtures:
+    python -m app.services.snapshot_sync --source mock --db data/snapshot.db
+    python -m app.services.snapshot_sync --source mock --mode incremental
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from .base import BaseDataDriver, DataDriverFactory
+from .snapshot_driver import connect_snapshot, default_snapshot_path
+
+logger = logging.getLogger(__name__)
+
+
+def _field(item: Dict[str, Any], snake: str, camel: str) -> Any:
+    """Leer campo en snake_case (MOCK) o camelCase (Google)"""
+    return item.get(snake, item.get(camel))
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    """Parsear timestamp RFC 3339 (con o sin fracción de segundos)"""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+class SnapshotSync:
+    """Sincroniza un snapshot SQLite desde cualquier BaseDataDriver"""
+
+    def __init__(self, source: BaseDataDriver, db_path: Optional[str] = None, max_concurrency: int = 8):
+        self.source = source
+        self.db_path = db_path or default_snapshot_path()
+        self.max_concurrency = max_concurrency
+
+    async def full_sync(self) -> Dict[str, Any]:
+        """Reemplazar el contenido del snapshot con una copia completa del origen"""
+        start = time.perf_counter()
+        conn = await asyncio.to_thread(connect_snapshot, self.db_path)
+        counts = {'courses': 0, 'students': 0, 'coursework': 0, 'submissions': 0, 'user_profiles': 0}
+        user_ids = set()
+
+        try:
+            # Una única transacción: los lectores ven el snapshot anterior hasta el commit
+            await asyncio.to_thread(self._clear, conn)
+
+            async for course in self.source.iter_courses(prefetch=True):
+                course_id = course['id']
+                owner_id = _field(course, 'owner_id', 'ownerId')
+                if owner_id:
+                    user_ids.add(owner_id)
+
+                students = [s async for s in self.source.iter_students(course_id, prefetch=True)]
+                user_ids.update(_field(s, 'user_id', 'userId') for s in students)
+                coursework = [cw async for cw in self.source.iter_coursework(course_id, prefetch=True)]
+                submissions = [s async for s in self.source.iter_submissions(course_id, prefetch=True)]
+
+                # Escrituras SQLite fuera del event loop
+                await asyncio.to_thread(self._insert_course, conn, course, students, coursework, submissions)
+                counts['courses'] += 1
+                counts['students'] += len(students)
+                counts['coursework'] += len(coursework)
+                counts['submissions'] += len(submissions)
+
+            profiles = await self._fetch_profiles(user_ids)
+            counts['user_profiles'] = len(profiles)
+            await asyncio.to_thread(self._finish_full, conn, profiles)
+        except Exception:
+            await asyncio.to_thread(conn.rollback)
+            raise
+        finally:
+            await asyncio.to_thread(conn.close)
+
+        duration_ms = round((time.perf_counter() - start) * 1000, 2)
+        logger.info(f"Snapshot full sync completed in {duration_ms} ms: {counts}")
+        return {'mode': 'full', 'rows': counts, 'duration_ms': duration_ms}
+
+    @staticmethod
+    def _clear(conn) -> None:
+        """Abrir la transacción de la sincronización completa y vaciar el snapshot"""
+        conn.execute('BEGIN')
+        for table in ('courses', 'students', 'coursework', 'submissions', 'user_profiles'):
+            conn.execute(f'DELETE FROM {table}')
+        conn.execute("DELETE FROM sync_state WHERE key LIKE 'watermark:%'")
+
+    @classmethod
+    def _insert_course(cls, conn, course: Dict[str, Any], students: list, coursework: list, submissions: list) -> None:
+        """Insertar un curso con su roster, trabajos y entregas (sincronización completa)"""
+        course_id = course['id']
+        conn.execute(
+            "INSERT INTO courses (id, update_time, data) VALUES (?, ?, ?)",
+            (course_id, _field(course, 'update_time', 'updateTime'), json.dumps(course))
+        )
+        conn.executemany(
+            "INSERT INTO students (course_id, user_id, data) VALUES (?, ?, ?)",
+            [(course_id, _field(s, 'user_id', 'userId'), json.dumps(s)) for s in students]
+        )
+        conn.executemany(
+            "INSERT INTO coursework (course_id, id, update_time, data) VALUES (?, ?, ?, ?)",
+            [(course_id, cw['id'], _field(cw, 'update_time', 'updateTime'), json.dumps(cw)) for cw in coursework]
+        )
+        conn.executemany(
+            "INSERT INTO submissions (course_id, course_work_id, id, user_id, update_time, data) VALUES (?, ?, ?, ?, ?, ?)",
+            [cls._submission_row(course_id, s) for s in submissions]
+        )
+        update_times = [t for t in (_parse_time(_field(s, 'update_time', 'updateTime')) for s in submissions) if t]
+        if update_times:
+            cls._set_state(conn, f'watermark:{course_id}', max(update_times).isoformat())
+
+    @classmethod
+    def _finish_full(cls, conn, profiles: list) -> None:
+        """Guardar perfiles, registrar la versión y confirmar la sincronización completa"""
+        conn.executemany(
+            "INSERT INTO user_profiles (id, data) VALUES (?, ?)",
+            [(profile['id'], json.dumps(profile)) for profile in profiles]
+        )
+        cls._bump_version(conn, 'last_full_sync')
+        conn.commit()
+
+    async def incremental_sync(self) -> Dict[str, Any]:
+        """Aplicar sólo los cambios desde la última sincronización (marca de agua por curso)
+
+        Las entregas se recorren completas en cada curso: las que ya no están en el
+        origen (y los trabajos y cursos eliminados) se borran del snapshot.
+        """
+        start = time.perf_counter()
+        conn = await asyncio.to_thread(connect_snapshot, self.db_path)
+        if await asyncio.to_thread(self._state, conn, 'data_version') is None:
+            await asyncio.to_thread(conn.close)
+            return await self.full_sync()
+
+        touched = {'courses': 0, 'students': 0, 'coursework': 0, 'submissions': 0, 'user_profiles': 0}
+        scanned_submissions = 0
+        changed_courses = []
+        seen_courses = set()
+
+        try:
+            await asyncio.to_thread(conn.execute, 'BEGIN')
+            async for course in self.source.iter_courses(prefetch=True):
+                course_id = course['id']
+                seen_courses.add(course_id)
+                students = [s async for s in self.source.iter_students(course_id, prefetch=True)]
+                coursework = [cw async for cw in self.source.iter_coursework(course_id, prefetch=True)]
+
+                # Entregas: sólo las modificadas después de la marca de agua del curso
+                watermark = await asyncio.to_thread(self._watermark, conn, course_id)
+                new_watermark = watermark
+                changed = []
+                seen_submissions = set()
+                async for submission in self.source.iter_submissions(course_id, prefetch=True):
+                    scanned_submissions += 1
+                    seen_submissions.add((_field(submission, 'course_work_id', 'courseWorkId'), submission['id']))
+                    updated_at = _parse_time(_field(submission, 'update_time', 'updateTime'))
+                    if watermark is None or updated_at is None or updated_at >= watermark:
+                        changed.append(self._submission_row(course_id, submission))
+                        if updated_at is not None and (new_watermark is None or updated_at > new_watermark):
+                            new_watermark = updated_at
+
+                course_touched = await asyncio.to_thread(
+                    self._apply_course, conn, course, students, coursework, changed, seen_submissions, new_watermark
+                )
+                for table, count in course_touched.items():
+                    touched[table] += count
+                if any(course_touched.values()):
+                    changed_courses.append(course_id)
+
+            # Cursos que ya no existen en el origen
+            removed = await asyncio.to_thread(self._remove_courses, conn, seen_courses)
+            for course_id, course_removed in removed.items():
+                for table, count in course_removed.items():
+                    touched[table] += count
+                changed_courses.append(course_id)
+
+            # Perfiles de estudiantes nuevos
+            missing_profiles = await asyncio.to_thread(self._missing_profiles, conn)
+            profiles = await self._fetch_profiles(missing_profiles)
+            touched['user_profiles'] = await asyncio.to_thread(self._finish_incremental, conn, profiles, touched)
+        except Exception:
+            await asyncio.to_thread(conn.rollback)
+            raise
+        finally:
+            await asyncio.to_thread(conn.close)
+
+        duration_ms = round((time.perf_counter() - start) * 1000, 2)
+        logger.info(f"Snapshot incremental sync completed in {duration_ms} ms: {touched}")
+        return {
+            'mode': 'incremental',
+            'rows_touched': touched,
+            'submissions_scanned': scanned_submissions,
+            'changed_courses': changed_courses,
+            'duration_ms': duration_ms
+        }
+
+    @staticmethod
+    def _state(conn, key: str) -> Optional[str]:
+        """Leer un valor de sync_state"""
+        row = conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    @classmethod
+    def _watermark(cls, conn, course_id: str) -> Optional[datetime]:
+        """Marca de agua del curso (o la mayor update_time ya guardada)"""
+        value = cls._state(conn, f'watermark:{course_id}')
+        return _parse_time(value) if value else cls._max_update_time(conn, course_id)
+
+    @classmethod
+    def _apply_course(
+        cls, conn, course: Dict[str, Any], students: list, coursework: list, changed: list, seen_submissions: set, watermark: Optional[datetime]
+    ) -> Dict[str, int]:
+        """Aplicar los cambios de un curso y borrar lo que ya no está en el origen (filas tocadas por tabla)"""
+        course_id = course['id']
+        course_touched = {}
+        course_touched['courses'] = cls._upsert(
+            conn,
+            "INSERT INTO courses (id, update_time, data) VALUES (?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET update_time = excluded.update_time, data = excluded.data "
+            "WHERE courses.data != excluded.data",
+            [(course_id, _field(course, 'update_time', 'updateTime'), json.dumps(course))]
+        )
+        course_touched['students'] = cls._replace_roster(conn, course_id, students)
+
+        before = conn.total_changes
+        conn.executemany(
+            "INSERT INTO coursework (course_id, id, update_time, data) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(course_id, id) DO UPDATE SET update_time = excluded.update_time, data = excluded.data "
+            "WHERE coursework.data != excluded.data",
+            [(course_id, cw['id'], _field(cw, 'update_time', 'updateTime'), json.dumps(cw)) for cw in coursework]
+        )
+        current = {cw['id'] for cw in coursework}
+        existing = {row[0] for row in conn.execute("SELECT id FROM coursework WHERE course_id = ?", (course_id,))}
+        conn.executemany(
+            "DELETE FROM coursework WHERE course_id = ? AND id = ?",
+            [(course_id, coursework_id) for coursework_id in existing - current]
+        )
+        course_touched['coursework'] = conn.total_changes - before
+
+        before = conn.total_changes
+        conn.executemany(
+            "INSERT INTO submissions (course_id, course_work_id, id, user_id, update_time, data) VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(course_id, course_work_id, id) DO UPDATE SET user_id = excluded.user_id, "
+            "update_time = excluded.update_time, data = excluded.data "
+            "WHERE submissions.data != excluded.data",
+            changed
+        )
+        existing = set(conn.execute("SELECT course_work_id, id FROM submissions WHERE course_id = ?", (course_id,)))
+        conn.executemany(
+            "DELETE FROM submissions WHERE course_id = ? AND course_work_id = ? AND id = ?",
+            [(course_id, coursework_id, submission_id) for coursework_id, submission_id in existing - seen_submissions]
+        )
+        course_touched['submissions'] = conn.total_changes - before
+
+        if watermark is not None:
+            cls._set_state(conn, f'watermark:{course_id}', watermark.isoformat())
+        return course_touched
+
+    @staticmethod
+    def _remove_courses(conn, seen_courses: set) -> Dict[str, Dict[str, int]]:
+        """Borrar los cursos que el origen ya no lista, con sus filas dependientes"""
+        removed = {}
+        existing = {row[0] for row in conn.execute("SELECT id FROM courses")}
+        for course_id in sorted(existing - seen_courses):
+            counts = {}
+            for table, key in (('courses', 'id'), ('students', 'course_id'), ('coursework', 'course_id'), ('submissions', 'course_id')):
+                counts[table] = conn.execute(f"DELETE FROM {table} WHERE {key} = ?", (course_id,)).rowcount
+            conn.execute("DELETE FROM sync_state WHERE key = ?", (f'watermark:{course_id}',))
+            removed[course_id] = counts
+        return removed
+
+    @staticmethod
+    def _missing_profiles(conn) -> set:
+        """Estudiantes sin perfil guardado"""
+        return {
+            row[0] for row in conn.execute(
+                "SELECT DISTINCT s.user_id FROM students s LEFT JOIN user_profiles p ON p.id = s.user_id WHERE p.id IS NULL"
+            )
+        }
+
+    @classmethod
+    def _finish_incremental(cls, conn, profiles: list, touched: Dict[str, int]) -> int:
+        """Guardar perfiles nuevos, registrar la sincronización y confirmar (perfiles tocados)"""
+        profiles_touched = cls._upsert(
+            conn,
+            "INSERT OR REPLACE INTO user_profiles (id, data) VALUES (?, ?)",
+            [(profile['id'], json.dumps(profile)) for profile in profiles]
+        )
+        if profiles_touched or any(touched.values()):
+            cls._bump_version(conn, 'last_incremental_sync')
+        else:
+            cls._set_state(conn, 'last_incremental_sync', str(time.time()))
+        conn.commit()
+        return profiles_touched
+
+    @staticmethod
+    def _upsert(conn, sql: str, rows: list) -> int:
+        """Ejecutar upsert y devolver la cantidad de filas realmente modificadas"""
+        if not rows:
+            return 0
+        before = conn.total_changes
+        conn.executemany(sql, rows)
+        return conn.total_changes - before
+
+    @staticmethod
+    def _replace_roster(conn, course_id: str, students: list) -> int:
+        """Sincronizar el roster de un curso (altas, cambios y bajas)"""
+        before = conn.total_changes
+        conn.executemany(
+            "INSERT INTO students (course_id, user_id, data) VALUES (?, ?, ?) "
+            "ON CONFLICT(course_id, user_id) DO UPDATE SET data = excluded.data WHERE students.data != excluded.data",
+            [(course_id, _field(s, 'user_id', 'userId'), json.dumps(s)) for s in students]
+        )
+        current = {_field(s, 'user_id', 'userId') for s in students}
+        existing = {row[0] for row in conn.execute("SELECT user_id FROM students WHERE course_id = ?", (course_id,))}
+        conn.executemany(
+            "DELETE FROM students WHERE course_id = ? AND user_id = ?",
+            [(course_id, user_id) for user_id in existing - current]
+        )
+        return conn.total_changes - before
+
+    @staticmethod
+    def _max_update_time(conn, course_id: str) -> Optional[datetime]:
+        """Marca de agua inicial a partir de las entregas ya guardadas"""
+        times = [
+            _parse_time(row[0])
+            for row in conn.execute("SELECT update_time FROM submissions WHERE course_id = ? AND update_time IS NOT NULL", (course_id,))
+        ]
+        return max(times) if times else None
+
+    @staticmethod
+    def _set_state(conn, key: str, value: str) -> None:
+        """Guardar un valor en sync_state"""
+        conn.execute(
+            "INSERT INTO sync_state (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, value)
+        )
+
+    @staticmethod
+    def _submission_row(course_id: str, submission: Dict[str, Any]) -> tuple:
+        """Fila de la tabla submissions"""
+        return (
+            course_id,
+            _field(submission, 'course_work_id', 'courseWorkId'),
+            submission['id'],
+            _field(submission, 'user_id', 'userId'),
+            _field(submission, 'update_time', 'updateTime'),
+            json.dumps(submission)
+        )
+
+    async def _fetch_profiles(self, user_ids: set) -> list:
+        """Obtener perfiles de usuario con concurrencia acotada"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def fetch(user_id):
+            async with semaphore:
+                return await self.source.get_user_profile(user_id)
+
+        profiles = await asyncio.gather(*(fetch(user_id) for user_id in sorted(u for u in user_ids if u)))
+        return [profile for profile in profiles if profile]
+
+    @classmethod
+    def _bump_version(cls, conn, timestamp_key: str) -> None:
+        """Registrar la sincronización e incrementar la versión de datos"""
+        row = conn.execute("SELECT value FROM sync_state WHERE key = 'data_version'").fetchone()
+        version = int(row[0]) + 1 if row else 1
+        cls._set_state(conn, 'data_version', str(version))
+        cls._set_state(conn, timestamp_key, str(time.time()))
+
+
+async def run_snapshot_sync(source_type: Optional[str] = None, db_path: Optional[str] = None, mode: str = 'incremental') -> Dict[str, Any]:
+    """Sincronizar el snapshot desde el driver configurado en SNAPSHOT_SOURCE"""
+    source = DataDriverFactory.create_driver(source_type or os.getenv('SNAPSHOT_SOURCE', 'google'), wrap=False)
+    try:
+        sync = SnapshotSync(source, db_path)
+        return await (sync.full_sync() if mode == 'full' else sync.incremental_sync())
+    finally:
+        await source.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sincronizar snapshot SQLite desde un driver de datos")
+    parser.add_argument('--source', default=None, help="Driver de origen (mock o google)")
+    parser.add_argument('--db', default=None, help="Ruta de la base SQLite")
+    parser.add_argument('--mode', default='incremental', choices=['full', 'incremental'], help="Tipo de sincronización")
+    args = parser.parse_args()
+
+    result = asyncio.run(run_snapshot_sync(args.source, args.db, args.mode))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
+
+
+# LECCIÓN APRENDIDA: Sincronización separada de la lectura
+# - El snapshot se construye offline desde los fixtures MOCK
+# - Una transacción por sincronización (lectores nunca ven datos a medias)
+# - Versión de datos registrada en sync_state
+# - Modo incremental con marca de agua por curso sobre update_time (upserts)
+# - Borrado de entregas, trabajos y cursos que ya no están en el origen
+# - Escrituras SQLite en un hilo para no bloquear el event loop
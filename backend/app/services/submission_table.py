@@ -0,0 +1,258 @@
+"""
+Columnar submission storage for report aggregation
+Submissions are kept as typed arrays (NumPy when available) with dictionary-encoded string IDs
+"""
+
+import math
+from array import array
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional: pure-Python aggregation over the same arrays
+    np = None
+
+
+# Submission states as small integer codes (index = code)
+STATES = ("NEW", "CREATED", "TURNED_IN", "RETURNED", "RECLAIMED_BY_STUDENT", "SUBMISSION_STATE_UNSPECIFIED")
+STATE_CODES = {state: code for code, state in enumerate(STATES)}
+UNKNOWN_STATE = STATE_CODES["SUBMISSION_STATE_UNSPECIFIED"]
+TURNED_IN = STATE_CODES["TURNED_IN"]
+
+NAN = float("nan")
+
+
+class StringDictionary:
+    """Dictionary encoding: each distinct string is stored once and referenced by an int code"""
+
+    def __init__(self):
+        self.values: List[Optional[str]] = []
+        self.codes: Dict[Optional[str], int] = {}
+
+    def encode(self, value: Optional[str]) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def code_of(self, value: Optional[str]) -> Optional[int]:
+        return self.codes.get(value)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+def _parse_time(value: Optional[str]) -> float:
+    """RFC 3339 timestamp to epoch seconds (NaN when missing)"""
+    if not value:
+        return NAN
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return NAN
+
+
+def _format_time(seconds: float) -> Optional[str]:
+    if math.isnan(seconds):
+        return None
+    return datetime.fromtimestamp(seconds, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class SubmissionTable:
+    """Submissions in the report layout, stored column by column
+
+    Columns: course, user and assignment codes (int32), late flag and state code
+    (int8), grade and submission time (float64, NaN when missing). Iterating yields
+    report-layout dicts, so callers that still need rows keep working.
+    """
+
+    def __init__(self):
+        self.courses = StringDictionary()
+        self.users = StringDictionary()
+        self.assignments = StringDictionary()
+
+        self.course = array("i")
+        self.user = array("i")
+        self.assignment = array("i")
+        self.late = array("b")
+        self.state = array("b")
+        self.grade = array("d")
+        self.submitted_at = array("d")
+
+        # Submission IDs by row, for in-place updates and removals
+        self.ids: List[Optional[str]] = []
+        self.positions: Dict[str, int] = {}
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]]) -> "SubmissionTable":
+        """Build a table from report-layout submission dicts (consumed as a stream)"""
+        table = cls()
+        for record in records:
+            table.append(record)
+        return table
+
+    def _encode(self, record: Dict[str, Any]) -> Tuple:
+        """Column values for one report-layout submission (same order as _columns)"""
+        grade = record.get("grade")
+        return (
+            self.courses.encode(record.get("course_id")),
+            self.users.encode(record.get("user_id")),
+            self.assignments.encode(record.get("assignment_id")),
+            1 if record.get("is_late") else 0,
+            STATE_CODES.get(record.get("status"), UNKNOWN_STATE),
+            NAN if grade is None else float(grade),
+            _parse_time(record.get("submission_time")),
+        )
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """Append one report-layout submission"""
+        submission_id = record.get("id")
+        if submission_id is not None:
+            self.positions[submission_id] = len(self)
+        self.ids.append(submission_id)
+        for column, value in zip(self._columns().values(), self._encode(record)):
+            column.append(value)
+
+    def position(self, submission_id: Optional[str]) -> Optional[int]:
+        """Row index of a submission ID (None when absent)"""
+        return self.positions.get(submission_id)
+
+    def update(self, index: int, record: Dict[str, Any]) -> None:
+        """Overwrite one row in place"""
+        for column, value in zip(self._columns().values(), self._encode(record)):
+            column[index] = value
+
+    def remove(self, index: int) -> None:
+        """Remove one row in O(1) by moving the last row into its slot (row order is not kept)"""
+        last = len(self) - 1
+        removed_id = self.ids[index]
+        if self.positions.get(removed_id) == index:
+            del self.positions[removed_id]
+        if index != last:
+            moved_id = self.ids[index] = self.ids[last]
+            if self.positions.get(moved_id) == last:
+                self.positions[moved_id] = index
+            for column in self._columns().values():
+                column[index] = column[last]
+        self.ids.pop()
+        for column in self._columns().values():
+            column.pop()
+
+    def __len__(self) -> int:
+        return len(self.course)
+
+    def row(self, index: int) -> Dict[str, Any]:
+        """Rebuild one submission in the report layout"""
+        grade = self.grade[index]
+        return {
+            "user_id": self.users.values[self.user[index]],
+            "course_id": self.courses.values[self.course[index]],
+            "assignment_id": self.assignments.values[self.assignment[index]],
+            "submission_time": _format_time(self.submitted_at[index]),
+            "is_late": bool(self.late[index]),
+            "grade": None if math.isnan(grade) else grade,
+            "status": STATES[self.state[index]],
+        }
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for index in range(len(self)):
+            yield self.row(index)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the numeric columns"""
+        return sum(column.itemsize * len(column) for column in self._columns().values())
+
+    def _columns(self) -> Dict[str, array]:
+        return {
+            "course": self.course,
+            "user": self.user,
+            "assignment": self.assignment,
+            "late": self.late,
+            "state": self.state,
+            "grade": self.grade,
+            "submitted_at": self.submitted_at,
+        }
+
+    def numpy_columns(self) -> Dict[str, Any]:
+        """Zero-copy NumPy views over the columns (requires NumPy)"""
+        return {name: np.frombuffer(column, dtype=column.typecode) for name, column in self._columns().items()}
+
+    def aggregate(self, key: str) -> Dict[str, Dict[str, float]]:
+        """Per-group counters for key 'course' or 'user'
+
+        Returns {id: {total, late, turned_in, graded, grade_sum}}. A grade counts as
+        graded when it is present and non-zero (the reports treat 0 as ungraded).
+        """
+        dictionary = self.courses if key == "course" else self.users
+        if np is not None:
+            counters = self._aggregate_numpy(key, len(dictionary))
+        else:
+            counters = self._aggregate_python(key, len(dictionary))
+
+        return {
+            dictionary.values[code]: {name: values[code] for name, values in counters.items()}
+            for code in range(len(dictionary))
+        }
+
+    def _aggregate_numpy(self, key: str, groups: int) -> Dict[str, List[float]]:
+        columns = self.numpy_columns()
+        codes = columns[key]
+        grade = columns["grade"]
+        graded = ~np.isnan(grade) & (grade != 0)
+        return {
+            "total": np.bincount(codes, minlength=groups).tolist(),
+            "late": np.bincount(codes, weights=columns["late"], minlength=groups).astype(int).tolist(),
+            "turned_in": np.bincount(codes, weights=columns["state"] == TURNED_IN, minlength=groups).astype(int).tolist(),
+            "graded": np.bincount(codes, weights=graded, minlength=groups).astype(int).tolist(),
+            "grade_sum": np.bincount(codes, weights=np.where(graded, grade, 0.0), minlength=groups).tolist(),
+        }
+
+    def _aggregate_python(self, key: str, groups: int) -> Dict[str, List[float]]:
+        total = [0] * groups
+        late = [0] * groups
+        turned_in = [0] * groups
+        graded = [0] * groups
+        grade_sum = [0.0] * groups
+        for code, is_late, state, grade in zip(self._columns()[key], self.late, self.state, self.grade):
+            total[code] += 1
+            late[code] += is_late
+            if state == TURNED_IN:
+                turned_in[code] += 1
+            # NaN != NaN: missing grades fail the first check
+            if grade == grade and grade != 0:
+                graded[code] += 1
+                grade_sum[code] += grade
+        return {"total": total, "late": late, "turned_in": turned_in, "graded": graded, "grade_sum": grade_sum}
+
+    def totals(self) -> Dict[str, int]:
+        """Table-wide counters"""
+        if np is not None:
+            columns = self.numpy_columns()
+            return {
+                "total": len(self),
+                "late": int(columns["late"].sum()),
+                "turned_in": int((columns["state"] == TURNED_IN).sum()),
+            }
+        return {
+            "total": len(self),
+            "late": sum(self.late),
+            "turned_in": sum(1 for state in self.state if state == TURNED_IN),
+        }
+
+    def count_pairs(self, first: str = "course", second: str = "user") -> Dict[Tuple[str, str], int]:
+        """Submission count per pair of ID columns ('course', 'user' or 'assignment')"""
+        dictionaries = {"course": self.courses, "user": self.users, "assignment": self.assignments}
+        left, right = dictionaries[first], dictionaries[second]
+        if np is not None and len(self):
+            columns = self.numpy_columns()
+            width = len(right)
+            keys, counts = np.unique(columns[first].astype(np.int64) * width + columns[second], return_counts=True)
+            pairs = zip((keys // width).tolist(), (keys % width).tolist(), counts.tolist())
+        else:
+            columns = self._columns()
+            pairs = ((a, b, count) for (a, b), count in Counter(zip(columns[first], columns[second])).items())
+        return {(left.values[a], right.values[b]): count for a, b, count in pairs}
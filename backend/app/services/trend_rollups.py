@@ -0,0 +1,172 @@
+"""
+Time-bucketed trend rollups for report submissions
+On-time and late counters per course and day / ISO week / month, kept up to date incrementally
+"""
+
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .submission_table import SubmissionTable, _parse_time
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional: pure-Python bucketing over the same arrays
+    np = None
+
+GRANULARITIES = ("day", "week", "month")
+SECONDS_PER_DAY = 86400
+EPOCH = date(1970, 1, 1)
+MONTH_NAMES = (
+    "Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio",
+    "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre",
+)
+
+# Counters for one bucket: [on_time, late]
+Counters = List[int]
+
+
+def day_number(value: date) -> int:
+    """Days since 1970-01-01"""
+    return (value - EPOCH).days
+
+
+def bucket_of(granularity: str, day: int) -> int:
+    """Bucket number of a day: the day itself, its ISO week's Monday, or year * 12 + month"""
+    if granularity == "day":
+        return day
+    if granularity == "week":
+        # 1970-01-01 was a Thursday (weekday 3)
+        return day - (day + 3) % 7
+    if granularity == "month":
+        value = EPOCH + timedelta(days=day)
+        return value.year * 12 + value.month - 1
+    raise ValueError(f"Unknown granularity: {granularity}")
+
+
+def bucket_label(granularity: str, bucket: int) -> str:
+    """Display label: 2024-01-15, 2024-W03 or Enero 2024"""
+    if granularity == "month":
+        return f"{MONTH_NAMES[bucket % 12]} {bucket // 12}"
+    value = EPOCH + timedelta(days=bucket)
+    if granularity == "week":
+        year, week, _ = value.isocalendar()
+        return f"{year}-W{week:02d}"
+    return value.isoformat()
+
+
+def _day_counts(table: SubmissionTable) -> Dict[Tuple[str, int], Tuple[int, int]]:
+    """(course_id, day) -> (on_time, late) over submissions that have a timestamp"""
+    if np is not None and len(table):
+        columns = table.numpy_columns()
+        timestamps = columns["submitted_at"]
+        present = ~np.isnan(timestamps)
+        if not present.any():
+            return {}
+        days = np.floor(timestamps[present] / SECONDS_PER_DAY).astype(np.int64)
+        first_day = int(days.min())
+        span = int(days.max()) - first_day + 1
+        keys, inverse = np.unique(columns["course"][present].astype(np.int64) * span + (days - first_day), return_inverse=True)
+        totals = np.bincount(inverse, minlength=len(keys)).tolist()
+        late = np.bincount(inverse, weights=columns["late"][present], minlength=len(keys)).astype(int).tolist()
+        return {
+            (table.courses.values[key // span], key % span + first_day): (total - late_count, late_count)
+            for key, total, late_count in zip(keys.tolist(), totals, late)
+        }
+
+    counts: Dict[Tuple[int, int], Counters] = {}
+    for course, is_late, timestamp in zip(table.course, table.late, table.submitted_at):
+        # NaN != NaN: no timestamp, no bucket
+        if timestamp != timestamp:
+            continue
+        counters = counts.setdefault((course, int(timestamp // SECONDS_PER_DAY)), [0, 0])
+        counters[is_late] += 1
+    return {(table.courses.values[course], day): tuple(counters) for (course, day), counters in counts.items()}
+
+
+class TrendRollups:
+    """Pre-aggregated [on_time, late] counters by granularity, course and bucket
+
+    The course key None holds the totals over every course. Submissions without a
+    submission time are not bucketed. Queries cost O(buckets), never O(submissions).
+    """
+
+    def __init__(self):
+        self.counters: Dict[str, Dict[Optional[str], Dict[int, Counters]]] = {
+            granularity: {} for granularity in GRANULARITIES
+        }
+
+    @classmethod
+    def build(cls, table: SubmissionTable) -> "TrendRollups":
+        """Build from the submission table: one pass for day buckets, weeks and months derived from days"""
+        rollups = cls()
+        for (course_id, day), (on_time, late) in _day_counts(table).items():
+            rollups._add(course_id, day, on_time, late)
+        return rollups
+
+    @classmethod
+    def from_counters(cls, counters: Dict[str, Dict[Optional[str], Dict[int, Counters]]]) -> "TrendRollups":
+        """Wrap prebuilt counters"""
+        rollups = cls()
+        rollups.counters = counters
+        return rollups
+
+    def _add(self, course_id: Optional[str], day: int, on_time: int, late: int) -> None:
+        """Add (or subtract, with negative counts) to every bucket containing the day"""
+        for granularity in GRANULARITIES:
+            bucket = bucket_of(granularity, day)
+            by_course = self.counters[granularity]
+            for key in (course_id, None):
+                buckets = by_course.setdefault(key, {})
+                counters = buckets.setdefault(bucket, [0, 0])
+                counters[0] += on_time
+                counters[1] += late
+                # Drop emptied buckets so the rollups match a fresh build
+                if not counters[0] and not counters[1]:
+                    del buckets[bucket]
+                    if not buckets:
+                        del by_course[key]
+
+    def apply(self, record: Dict[str, Any], sign: int) -> None:
+        """Add (sign=1) or remove (sign=-1) one report-layout submission"""
+        timestamp = _parse_time(record.get("submission_time"))
+        if timestamp != timestamp:
+            return
+        late = sign if record.get("is_late") else 0
+        self._add(record.get("course_id"), int(timestamp // SECONDS_PER_DAY), sign - late, late)
+
+    def series(
+        self,
+        granularity: str = "month",
+        course_ids: Optional[Iterable[str]] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+    ) -> List[Dict[str, Any]]:
+        """Buckets in order with {period, bucket, on_time, late, total}
+
+        course_ids=None reads the all-courses totals; start and end are inclusive dates.
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity: {granularity}")
+        first = bucket_of(granularity, day_number(start)) if start else None
+        last = bucket_of(granularity, day_number(end)) if end else None
+
+        merged: Dict[int, Counters] = {}
+        by_course = self.counters[granularity]
+        for course_id in ([None] if course_ids is None else course_ids):
+            for bucket, (on_time, late) in by_course.get(course_id, {}).items():
+                if (first is not None and bucket < first) or (last is not None and bucket > last):
+                    continue
+                counters = merged.setdefault(bucket, [0, 0])
+                counters[0] += on_time
+                counters[1] += late
+
+        return [
+            {
+                "period": bucket_label(granularity, bucket),
+                "bucket": bucket,
+                "on_time": on_time,
+                "late": late,
+                "total": on_time + late,
+            }
+            for bucket, (on_time, late) in sorted(merged.items())
+        ]
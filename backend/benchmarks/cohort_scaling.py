@@ -0,0 +1,109 @@
+"""
+Benchmark: report aggregate build, serial vs process pool partitioned by course
+
+Usage (from backend/):
+    python -m benchmarks.cohort_scaling --courses 1200 --rows 2000000
+"""
+
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict
+
+from app.services.parallel_cohorts import ParallelBuild, _context, shutdown_process_pool
+from app.services.report_aggregates import ReportAggregates
+from app.services.reports_service import ReportsService
+from app.services.submission_table import STATES, SubmissionTable
+
+
+def build_data(courses: int, students: int, assignments: int, rows: int, seed: int) -> Dict[str, Any]:
+    """Synthetic report data; the submission table is filled column by column (no per-record dicts)"""
+    rng = random.Random(seed)
+    table = SubmissionTable()
+    course_list, student_list = [], []
+    for course in range(courses):
+        course_id = f"course-{course:05d}"
+        table.courses.encode(course_id)
+        course_list.append({"id": course_id, "name": f"Curso {course}", "owner_id": f"teacher-{course % 50}"})
+        for student in range(students):
+            user_id = f"user-{course:05d}-{student:03d}"
+            table.users.encode(user_id)
+            student_list.append({"user_id": user_id, "course_id": course_id, "profile": {"name": {"full_name": user_id}}})
+        for assignment in range(assignments):
+            table.assignments.encode(f"assignment-{course:05d}-{assignment:02d}")
+
+    course = [rng.randrange(courses) for _ in range(rows)]
+    table.course.extend(course)
+    table.user.extend(code * students + rng.randrange(students) for code in course)
+    table.assignment.extend(code * assignments + rng.randrange(assignments) for code in course)
+    table.late.extend(rng.random() < 0.2 for _ in range(rows))
+    table.state.extend(rng.randrange(len(STATES)) for _ in range(rows))
+    table.grade.extend(rng.choice((float("nan"), rng.uniform(1, 100))) for _ in range(rows))
+    table.submitted_at.extend(1_700_000_000 + rng.randrange(90 * 86400) for _ in range(rows))
+    table.ids.extend(None for _ in range(rows))
+    return {"students": student_list, "courses": course_list, "submissions": table}
+
+
+def best_of(repeat: int, func, *args):
+    """Best wall time over several runs, with the last result"""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def parallel_build(data: Dict[str, Any], pool: ProcessPoolExecutor, workers: int) -> ReportAggregates:
+    parts = ParallelBuild(data["submissions"], pool, workers).result()
+    return ReportAggregates.build(data, 1, parts=parts)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--courses", type=int, default=1200)
+    parser.add_argument("--students", type=int, default=30, help="students per course")
+    parser.add_argument("--assignments", type=int, default=10, help="assignments per course")
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"Building {args.rows:,} submissions across {args.courses:,} courses...")
+    data = build_data(args.courses, args.students, args.assignments, args.rows, args.seed)
+
+    serial, expected = best_of(args.repeat, ReportAggregates.build, data, 1)
+    print(f"{'workers':>8} {'seconds':>9} {'speedup':>8}")
+    print(f"{'serial':>8} {serial:9.3f} {1.0:8.2f}")
+
+    workers = 1
+    while workers <= args.max_workers:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=_context()) as pool:
+            # Warm the pool so worker start-up is not timed
+            list(pool.map(abs, range(workers)))
+            elapsed, index = best_of(args.repeat, parallel_build, data, pool, workers)
+        mismatches = index.diff(expected)
+        assert not mismatches, mismatches
+        print(f"{workers:>8} {elapsed:9.3f} {serial / elapsed:8.2f}")
+        workers *= 2
+
+    # End to end through the shipping cohort report path: cold index (pool build), then cached
+    service = ReportsService()
+    service.mock_data = data
+    service.data_version += 1
+    service.parallel_min_rows = 1
+    os.environ.setdefault("REPORTS_PROCESS_WORKERS", str(args.max_workers))
+    try:
+        for label in ("cold", "cached"):
+            start = time.perf_counter()
+            cohorts = list(service._iter_cohorts())
+            print(f"_iter_cohorts ({label}): {len(cohorts):,} ReportCohortProgress objects in {time.perf_counter() - start:.3f} s")
+    finally:
+        shutdown_process_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,894 @@
+"""
+Tests for data driver layer
+Compatible with pytest 7.4.0+ and FastAPI 0.104.0+
+"""
+
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+
+import httplib2
+import pytest
+from fastapi.testclient import TestClient
+from googleapiclient.errors import HttpError
+
+from app.main import app
+from app.services.base import DataDriverFactory
+from app.services.caching_driver import CachingDataDriver
+from app.services.coalescing_driver import CoalescingDataDriver
+from app.services.dataset_generator import DEFAULT_MOCK_DATA_DIR, DatasetGenerator, load_records
+from app.services.driver_registry import DriverRegistry
+from app.services.google_auth import GoogleCredentialManager
+from app.services.mock_driver import MockDataDriver
+from app.services.projection import google_fields_mask, project
+from app.services.rate_limiter import AdaptiveRateLimiter, RetryPolicy
+from app.services.snapshot_driver import SnapshotDataDriver
+from app.services.snapshot_sync import SnapshotSync
+
+client = TestClient(app)
+
+
+class TestDriverRegistry:
+    """Test cases for DriverRegistry"""
+
+    def test_driver_is_built_once_and_reused(self):
+        """Test that the registry shares a single driver instance"""
+        registry = DriverRegistry()
+        first = registry.get_driver("mock")
+        second = registry.get_driver("mock")
+
+        assert first is second
+        assert isinstance(first, MockDataDriver)
+
+        stats = registry.get_stats()["drivers"]["mock"]
+        assert stats["builds"] == 1
+        assert stats["reuses"] == 1
+        assert stats["last_build_time_ms"] >= 0
+
+    def test_reload_and_shutdown(self):
+        """Test explicit reload and clean shutdown"""
+        registry = DriverRegistry()
+        first = registry.get_driver("mock")
+        reloaded = asyncio.run(registry.reload("mock"))
+
+        assert reloaded is not first
+        assert registry.get_driver("mock") is reloaded
+        assert registry.get_stats()["drivers"]["mock"]["builds"] == 2
+
+        asyncio.run(registry.shutdown())
+        assert registry.get_stats()["active_drivers"] == []
+
+    def test_unknown_driver_type(self):
+        """Test that unsupported driver types are rejected"""
+        registry = DriverRegistry()
+        with pytest.raises(ValueError):
+            registry.get_driver("unknown")
+
+    def test_driver_stats_endpoint(self):
+        """Test driver stats endpoint"""
+        with TestClient(app) as lifespan_client:
+            response = lifespan_client.get("/api/v1/driver/stats")
+            assert response.status_code == 200
+
+            data = response.json()
+            assert data["started"] is True
+            assert "drivers" in data
+
+
+class TestMockDataDriver:
+    """Test cases for MockDataDriver indexes"""
+
+    def test_indexed_lookups(self):
+        """Test lookups served from the load-time indexes"""
+        driver = MockDataDriver()
+
+        course = asyncio.run(driver.get_course("course_1"))
+        assert course["id"] == "course_1"
+        assert asyncio.run(driver.get_course("missing")) is None
+
+        profile = asyncio.run(driver.get_user_profile("teacher_1"))
+        assert profile["id"] == "teacher_1"
+
+        result = asyncio.run(driver.get_submissions("course_1", "coursework_1", page_size=100))
+        expected = [
+            s for s in driver.submissions
+            if s["course_id"] == "course_1" and s["course_work_id"] == "coursework_1"
+        ]
+        assert result["student_submissions"] == expected
+        assert result["total_items"] == len(expected)
+
+    def test_paginated_slices(self):
+        """Test pages are slices of the pre-grouped lists"""
+        driver = MockDataDriver()
+        total = len([s for s in driver.students if s["course_id"] == "course_1"])
+
+        first = asyncio.run(driver.get_students("course_1", page_size=1))
+        assert len(first["students"]) == 1
+        assert first["total_items"] == total
+        if total > 1:
+            assert first["next_page_token"] == "1"
+            second = asyncio.run(driver.get_students("course_1", page_size=1, page_token="1"))
+            assert second["students"][0]["user_id"] != first["students"][0]["user_id"]
+
+    def test_student_pages_are_copies(self):
+        """Test that mutating a returned student does not alter the index"""
+        driver = MockDataDriver()
+        page = asyncio.run(driver.get_students("course_1", page_size=1))
+        page["students"][0]["courseName"] = "mutated"
+
+        again = asyncio.run(driver.get_students("course_1", page_size=1))
+        assert "courseName" not in again["students"][0]
+
+
+class _SlowRequest:
+    """Fake Classroom request that blocks like request.execute()"""
+
+    def __init__(self, delay: float = 0.2):
+        self.delay = delay
+        self.transports = []
+
+    def execute(self, http=None):
+        time.sleep(self.delay)
+        self.transports.append(http)
+        return {"ok": True}
+
+
+@pytest.fixture
+def google_driver(monkeypatch, tmp_path):
+    """GoogleDataDriver without credentials (authentication fails offline)"""
+    from app.services.google_driver import GoogleDataDriver
+
+    monkeypatch.setenv("TOKENS_FILE", str(tmp_path / "tokens.json"))
+    monkeypatch.setenv("GOOGLE_CREDENTIALS_FILE", str(tmp_path / "credentials.json"))
+    monkeypatch.setenv("GOOGLE_DRIVER_MAX_WORKERS", "4")
+    driver = GoogleDataDriver()
+    yield driver
+    asyncio.run(driver.close())
+
+
+class TestGoogleDataDriverExecution:
+    """Test cases for the executor-backed Google driver"""
+
+    def test_calls_overlap_off_event_loop(self, google_driver):
+        """Test concurrent calls run in parallel in the bounded pool"""
+        request = _SlowRequest(delay=0.2)
+
+        async def run_concurrently():
+            start = time.perf_counter()
+            await asyncio.gather(*(google_driver._execute(request) for _ in range(4)))
+            return time.perf_counter() - start
+
+        elapsed = asyncio.run(run_concurrently())
+        assert google_driver.max_workers == 4
+        assert elapsed < 0.6
+
+        # Cada hilo usa su propio transporte HTTP
+        assert len(set(id(http) for http in request.transports)) > 1
+
+    def test_follows_credential_manager(self, google_driver, monkeypatch, tmp_path):
+        """Test new credentials from the manager replace the driver's service and transports"""
+        from app.services import google_driver as google_driver_module
+
+        manager = GoogleCredentialManager()
+        monkeypatch.setattr(google_driver_module, "credential_manager", manager)
+        with pytest.raises(Exception):
+            google_driver._require_service()
+
+        manager.set_credentials(_fake_credentials())
+        service = google_driver._require_service()
+        assert service is manager.get_service()
+        assert google_driver.credentials is manager.current_credentials
+        first_http = google_driver._get_http()
+        assert google_driver._get_http() is first_http
+
+        manager.set_credentials(_fake_credentials("token-2"))
+        assert google_driver._require_service() is not service
+        assert google_driver._get_http() is not first_http
+        assert google_driver._get_http().credentials.token == "token-2"
+
+
+class TestSubmissionFanOut:
+    """Test cases for batched submission fetches"""
+
+    def test_submissions_batch_groups_by_coursework(self):
+        """Test the batch fetch returns every submission grouped by coursework"""
+        driver = MockDataDriver()
+        coursework_ids = [cw["id"] for cw in driver.coursework if cw["course_id"] == "course_1"]
+        result = asyncio.run(driver.get_submissions_batch("course_1", coursework_ids, page_size=1))
+
+        assert set(result.keys()) == set(coursework_ids)
+        for coursework_id, submissions in result.items():
+            assert all(s["course_work_id"] == coursework_id for s in submissions)
+        assert sum(len(v) for v in result.values()) == len(
+            [s for s in driver.submissions if s["course_id"] == "course_1"]
+        )
+
+    def test_student_progress_endpoint(self):
+        """Test student progress uses the batched submissions"""
+        response = client.get("/api/v1/students/student_1/progress")
+        assert response.status_code == 200
+
+        data = response.json()
+        assert data["totalAssignments"] > 0
+        assert data["completedAssignments"] >= 1
+        assert data["averageGrade"] > 0
+
+
+class TestPaginatedIterators:
+    """Test cases for the auto-paginating driver iterators"""
+
+    @pytest.mark.parametrize("prefetch", [False, True])
+    def test_iterators_follow_page_tokens(self, prefetch):
+        """Test iterators walk every page regardless of page size"""
+        driver = MockDataDriver()
+
+        async def collect():
+            courses = [c async for c in driver.iter_courses(page_size=1, prefetch=prefetch)]
+            students = [s async for s in driver.iter_students("course_1", page_size=1, prefetch=prefetch)]
+            submissions = [s async for s in driver.iter_submissions("course_1", page_size=1, prefetch=prefetch)]
+            return courses, students, submissions
+
+        courses, students, submissions = asyncio.run(collect())
+        assert [c["id"] for c in courses] == [c["id"] for c in driver.courses]
+        assert len(students) == len([s for s in driver.students if s["course_id"] == "course_1"])
+        assert len(submissions) == len([s for s in driver.submissions if s["course_id"] == "course_1"])
+
+    def test_iterator_stops_early(self):
+        """Test that breaking out of an iterator does not fetch everything"""
+        driver = MockDataDriver()
+
+        async def first_course():
+            iterator = driver.iter_courses(page_size=1, prefetch=True)
+            async for course in iterator:
+                await iterator.aclose()
+                return course
+
+        assert asyncio.run(first_course())["id"] == driver.courses[0]["id"]
+
+
+class _CountingDriver(MockDataDriver):
+    """Mock driver that counts upstream calls"""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    async def get_courses(self, page_size=10, page_token=None, fields=None):
+        self.calls += 1
+        return await super().get_courses(page_size=page_size, page_token=page_token, fields=fields)
+
+    async def get_students(self, course_id, page_size=10, page_token=None, fields=None):
+        self.calls += 1
+        return await super().get_students(course_id, page_size=page_size, page_token=page_token, fields=fields)
+
+
+class TestCachingDataDriver:
+    """Test cases for CachingDataDriver"""
+
+    def test_hits_and_misses(self):
+        """Test read-through behaviour and counters"""
+        inner = _CountingDriver()
+        driver = CachingDataDriver(inner)
+
+        async def run():
+            await driver.get_courses(page_size=5)
+            await driver.get_courses(page_size=5)
+            await driver.get_students("course_1")
+
+        asyncio.run(run())
+        assert inner.calls == 2
+        cache = driver.get_stats()["cache"]
+        assert cache["hits"] == 1
+        assert cache["misses"] == 2
+
+    def test_ttl_expiration(self):
+        """Test entries expire after their method TTL"""
+        inner = _CountingDriver()
+        driver = CachingDataDriver(inner, ttls={"get_courses": 0})
+
+        asyncio.run(driver.get_courses())
+        asyncio.run(driver.get_courses())
+        assert inner.calls == 2
+        assert driver.get_stats()["cache"]["expirations"] == 1
+
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted first"""
+        inner = _CountingDriver()
+        driver = CachingDataDriver(inner, max_entries=2)
+
+        async def run():
+            await driver.get_students("course_1")
+            await driver.get_students("course_2")
+            await driver.get_students("course_1")  # course_1 pasa a ser el más reciente
+            await driver.get_courses()              # desaloja course_2
+            await driver.get_students("course_1")
+
+        asyncio.run(run())
+        assert inner.calls == 3
+        assert driver.get_stats()["cache"]["evictions"] == 1
+
+    def test_invalidate_course_and_user(self):
+        """Test explicit invalidation by course and user"""
+        inner = _CountingDriver()
+        driver = CachingDataDriver(inner)
+
+        asyncio.run(driver.get_students("course_1"))
+        asyncio.run(driver.get_user_profile("teacher_1"))
+        assert driver.invalidate_course("course_1") == 1
+        assert driver.invalidate_user("teacher_1") == 1
+
+        asyncio.run(driver.get_students("course_1"))
+        assert inner.calls == 2
+
+    def test_cached_pages_are_copies(self):
+        """Test callers cannot mutate cached pages"""
+        driver = CachingDataDriver(MockDataDriver())
+        page = asyncio.run(driver.get_students("course_1"))
+        page["students"][0]["courseName"] = "mutated"
+
+        again = asyncio.run(driver.get_students("course_1"))
+        assert "courseName" not in again["students"][0]
+
+    def test_factory_wraps_driver(self, monkeypatch):
+        """Test DataDriverFactory enables the cache through configuration"""
+        monkeypatch.setenv("DRIVER_CACHE", "true")
+        driver = DataDriverFactory.create_driver("mock")
+        assert isinstance(driver, CachingDataDriver)
+        assert driver.driver_type == driver.inner.driver_type
+
+
+
+class _SlowCountingDriver(_CountingDriver):
+    """Counting driver whose course listing takes a while to answer"""
+
+    async def get_courses(self, page_size=10, page_token=None, fields=None):
+        await asyncio.sleep(0.05)
+        return await super().get_courses(page_size=page_size, page_token=page_token, fields=fields)
+
+
+class TestCoalescingDataDriver:
+    """Test cases for single-flight request coalescing"""
+
+    def test_concurrent_identical_calls_share_one_upstream_call(self):
+        """Test N concurrent identical calls hit the inner driver once"""
+        inner = _SlowCountingDriver()
+        driver = CoalescingDataDriver(inner)
+
+        async def run():
+            return await asyncio.gather(*(driver.get_courses(page_size=5) for _ in range(10)))
+
+        pages = asyncio.run(run())
+        assert inner.calls == 1
+        assert all(page == pages[0] for page in pages)
+
+        stats = driver.get_stats()["coalescing"]
+        assert stats["calls"] == 10
+        assert stats["upstream_calls"] == 1
+        assert stats["coalescing_ratio"] == 0.9
+        assert stats["in_flight"] == 0
+
+    def test_different_arguments_are_not_coalesced(self):
+        """Test calls with different arguments run separately"""
+        inner = _SlowCountingDriver()
+        driver = CoalescingDataDriver(inner)
+
+        async def run():
+            await asyncio.gather(driver.get_courses(page_size=5), driver.get_courses(page_size=10))
+
+        asyncio.run(run())
+        assert inner.calls == 2
+
+    def test_sequential_calls_are_not_cached(self):
+        """Test completed calls are released (coalescing is not caching)"""
+        inner = _CountingDriver()
+        driver = CoalescingDataDriver(inner)
+
+        asyncio.run(driver.get_students("course_1"))
+        asyncio.run(driver.get_students("course_1"))
+        assert inner.calls == 2
+
+    def test_results_are_copies(self):
+        """Test one caller cannot mutate another caller's result"""
+        driver = CoalescingDataDriver(MockDataDriver())
+
+        async def run():
+            return await asyncio.gather(driver.get_students("course_1"), driver.get_students("course_1"))
+
+        first, second = asyncio.run(run())
+        first["students"][0]["courseName"] = "mutated"
+        assert "courseName" not in second["students"][0]
+
+    def test_factory_composes_cache_over_coalescing(self, monkeypatch):
+        """Test the factory builds cache(coalesce(source))"""
+        monkeypatch.setenv("DRIVER_CACHE", "true")
+        monkeypatch.setenv("DRIVER_COALESCE", "true")
+        driver = DataDriverFactory.create_driver("mock")
+        assert isinstance(driver, CachingDataDriver)
+        assert isinstance(driver.inner, CoalescingDataDriver)
+        assert "coalescing" in driver.get_stats()
+
+
+
+class TestFieldProjection:
+    """Test cases for partial-response field masks"""
+
+    def test_google_fields_mask(self):
+        """Test snake_case paths become a Classroom fields mask"""
+        mask = google_fields_mask(("user_id", "profile.name.full_name"), "students")
+        assert mask == "students(profile/name/fullName,userId),nextPageToken"
+        assert google_fields_mask(("assigned_grade",)) == "assignedGrade"
+        assert google_fields_mask(None, "courses") is None
+
+    def test_project_snake_and_camel_case(self):
+        """Test projection works on mock (snake) and Google (camel) resources"""
+        fields = ("user_id", "profile.name.full_name")
+        mock_student = {"user_id": "s1", "course_id": "c1", "profile": {"id": "s1", "name": {"full_name": "Ana", "given_name": "A"}}}
+        google_student = {"userId": "s1", "courseId": "c1", "profile": {"id": "s1", "name": {"fullName": "Ana"}}}
+
+        assert project(mock_student, fields) == {"user_id": "s1", "profile": {"name": {"full_name": "Ana"}}}
+        assert project(google_student, fields) == {"userId": "s1", "profile": {"name": {"fullName": "Ana"}}}
+
+    def test_mock_driver_projects_pages(self):
+        """Test MockDataDriver returns only the requested fields"""
+        driver = MockDataDriver()
+        page = asyncio.run(driver.list_course_submissions("course_1", fields=("user_id", "state")))
+        assert page["student_submissions"]
+        assert all(set(s) <= {"user_id", "state"} for s in page["student_submissions"])
+
+    def test_google_driver_sends_fields_parameter(self, google_driver):
+        """Test GoogleDataDriver passes the mask to Classroom"""
+        from googleapiclient.discovery import build
+
+        google_driver.service = build("classroom", "v1", developerKey="test", static_discovery=True, cache_discovery=False)
+        uris = []
+
+        async def fake_execute(request):
+            uris.append(request.uri)
+            return {"courses": []}
+
+        google_driver._execute = fake_execute
+        asyncio.run(google_driver.get_courses(fields=("id", "name")))
+        assert "fields=courses%28id%2Cname%29%2CnextPageToken" in uris[0]
+
+    def test_cache_key_includes_fields(self):
+        """Test different projections are cached separately"""
+        inner = _CountingDriver()
+        driver = CachingDataDriver(inner)
+
+        async def run():
+            full = await driver.get_courses()
+            narrow = await driver.get_courses(fields=("id",))
+            return full, narrow
+
+        full, narrow = asyncio.run(run())
+        assert inner.calls == 2
+        assert "name" in full["courses"][0]
+        assert set(narrow["courses"][0]) == {"id"}
+
+
+
+class _LatencyDriver(MockDataDriver):
+    """Mock driver where every call takes a fixed latency"""
+
+    def __init__(self, delay: float = 0.05):
+        super().__init__()
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def _wait(self):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+
+    async def get_course(self, course_id, fields=None):
+        await self._wait()
+        return await super().get_course(course_id, fields=fields)
+
+    async def get_students(self, course_id, page_size=10, page_token=None, fields=None):
+        await self._wait()
+        return await super().get_students(course_id, page_size=page_size, page_token=page_token, fields=fields)
+
+    async def get_coursework(self, course_id, page_size=10, page_token=None, fields=None):
+        await self._wait()
+        return await super().get_coursework(course_id, page_size=page_size, page_token=page_token, fields=fields)
+
+    async def list_course_submissions(self, course_id, page_size=10, page_token=None, fields=None):
+        await self._wait()
+        return await super().list_course_submissions(course_id, page_size=page_size, page_token=page_token, fields=fields)
+
+
+class TestCourseBundles:
+    """Test cases for concurrent course bundle prefetch"""
+
+    def test_bundle_joins_course_data(self):
+        """Test the bundle contains the course and its related resources"""
+        bundle = asyncio.run(MockDataDriver().get_course_bundle("course_1"))
+        assert bundle["course"]["id"] == "course_1"
+        assert bundle["students"]
+        assert all(cw["course_id"] == "course_1" for cw in bundle["course_work"])
+        assert all(s["course_id"] == "course_1" for s in bundle["student_submissions"])
+
+    def test_bundle_reads_run_concurrently(self):
+        """Test wall-clock time is the slowest read, not the sum"""
+        driver = _LatencyDriver(delay=0.1)
+        start = time.perf_counter()
+        asyncio.run(driver.get_course_bundle("course_1"))
+        assert time.perf_counter() - start < 0.3
+        assert driver.max_in_flight == 4
+
+    def test_multi_course_bundles_respect_concurrency_limit(self):
+        """Test N bundles are fetched in parallel with a global bound"""
+        driver = _LatencyDriver(delay=0.02)
+        bundles = asyncio.run(driver.get_course_bundles(["course_1", "course_2", "missing"], max_concurrency=3))
+        assert set(bundles) == {"course_1", "course_2"}
+        assert driver.max_in_flight <= 3
+
+    def test_bundle_endpoint(self):
+        """Test GET /courses/{id}/bundle"""
+        response = client.get("/api/v1/courses/course_1/bundle")
+        assert response.status_code == 200
+        assert response.json()["course"]["id"] == "course_1"
+
+        assert client.get("/api/v1/courses/missing/bundle").status_code == 404
+
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    """SQLite snapshot built offline from the mock fixtures"""
+    db_path = str(tmp_path / "snapshot.db")
+    asyncio.run(SnapshotSync(MockDataDriver(), db_path).full_sync())
+    return db_path
+
+
+class TestSnapshotDataDriver:
+    """Test cases for the SQLite snapshot driver"""
+
+    def test_full_sync_counts(self, tmp_path):
+        """Test a full sync copies every mock fixture row"""
+        mock = MockDataDriver()
+        result = asyncio.run(SnapshotSync(mock, str(tmp_path / "s.db")).full_sync())
+
+        assert result["mode"] == "full"
+        assert result["rows"]["courses"] == len(mock.courses)
+        assert result["rows"]["students"] == len(mock.students)
+        assert result["rows"]["coursework"] == len(mock.coursework)
+        assert result["rows"]["submissions"] == len(mock.submissions)
+        assert result["rows"]["user_profiles"] > 0
+
+    def test_reads_match_mock_driver(self, snapshot_path):
+        """Test snapshot reads return the same data as the source"""
+        mock = MockDataDriver()
+        snapshot = SnapshotDataDriver(snapshot_path)
+
+        async def collect(driver):
+            courses = [c async for c in driver.iter_courses(page_size=1)]
+            students = [s async for s in driver.iter_students("course_1", page_size=1)]
+            submissions = [s async for s in driver.iter_submissions("course_1", page_size=1)]
+            course = await driver.get_course("course_1")
+            profile = await driver.get_user_profile("teacher_1")
+            return courses, students, submissions, course, profile
+
+        try:
+            assert asyncio.run(collect(snapshot)) == asyncio.run(collect(mock))
+            assert snapshot.get_sync_state()["data_version"] == "1"
+        finally:
+            asyncio.run(snapshot.close())
+
+
+class _ChangingMockDriver(MockDataDriver):
+    """Mock driver whose submissions can be edited between syncs"""
+
+    def touch_submission(self, submission_id, update_time, **changes):
+        for submission in self.submissions:
+            if submission["id"] == submission_id:
+                submission.update(changes, update_time=update_time)
+                return submission
+
+
+class TestIncrementalSync:
+    """Test cases for incremental snapshot sync"""
+
+    def test_incremental_applies_only_changes(self, tmp_path):
+        """Test only submissions past the watermark are upserted"""
+        db_path = str(tmp_path / "snapshot.db")
+        source = _ChangingMockDriver()
+        sync = SnapshotSync(source, db_path)
+        asyncio.run(sync.full_sync())
+
+        unchanged = asyncio.run(sync.incremental_sync())
+        assert unchanged["mode"] == "incremental"
+        assert sum(unchanged["rows_touched"].values()) == 0
+        assert unchanged["submissions_scanned"] == len(source.submissions)
+        assert unchanged["changed_courses"] == []
+
+        submission = source.touch_submission("submission_1", "2030-01-01T00:00:00.500Z", assigned_grade=99.0)
+        changed = asyncio.run(sync.incremental_sync())
+        assert changed["rows_touched"]["submissions"] == 1
+        assert changed["changed_courses"] == [submission["course_id"]]
+        assert changed["duration_ms"] >= 0
+
+        snapshot = SnapshotDataDriver(db_path)
+        try:
+            page = asyncio.run(snapshot.get_submissions(submission["course_id"], submission["course_work_id"], page_size=100))
+            stored = [s for s in page["student_submissions"] if s["id"] == "submission_1"][0]
+            assert stored["assigned_grade"] == 99.0
+            assert snapshot.get_sync_state()["data_version"] == "2"
+        finally:
+            asyncio.run(snapshot.close())
+
+    def test_incremental_deletes_rows_missing_at_source(self, tmp_path):
+        """Test submissions, coursework and courses gone from the source are removed"""
+        db_path = str(tmp_path / "snapshot.db")
+        source = _ChangingMockDriver()
+        sync = SnapshotSync(source, db_path)
+        asyncio.run(sync.full_sync())
+
+        removed_submission = source.submissions[0]
+        source.submissions = source.submissions[1:]
+        removed_course = source.courses[-1]["id"]
+        source.courses = source.courses[:-1]
+        source._build_indexes()
+
+        result = asyncio.run(sync.incremental_sync())
+        assert result["rows_touched"]["submissions"] >= 1
+        assert removed_submission["course_id"] in result["changed_courses"]
+        assert removed_course in result["changed_courses"]
+
+        snapshot = SnapshotDataDriver(db_path)
+        try:
+            ids = {row[0] for row in snapshot._query("SELECT id FROM submissions")}
+            assert removed_submission["id"] not in ids
+            assert ids == {s["id"] for s in source.submissions if s["course_id"] != removed_course}
+            assert snapshot._query("SELECT COUNT(*) FROM courses WHERE id = ?", (removed_course,))[0][0] == 0
+            for table in ("students", "coursework", "submissions"):
+                assert snapshot._query(f"SELECT COUNT(*) FROM {table} WHERE course_id = ?", (removed_course,))[0][0] == 0
+        finally:
+            asyncio.run(snapshot.close())
+
+        assert sum(asyncio.run(sync.incremental_sync())["rows_touched"].values()) == 0
+
+    def test_writes_run_off_the_event_loop(self, tmp_path, monkeypatch):
+        """Test SQLite writes happen in worker threads, not on the loop thread"""
+        import threading
+
+        sync = SnapshotSync(_ChangingMockDriver(), str(tmp_path / "snapshot.db"))
+        threads = []
+        for name in ("_insert_course", "_apply_course"):
+            original = getattr(SnapshotSync, name)
+
+            def record(*args, _original=original):
+                threads.append(threading.get_ident())
+                return _original(*args)
+
+            monkeypatch.setattr(SnapshotSync, name, staticmethod(record))
+
+        async def run():
+            await sync.full_sync()
+            await sync.incremental_sync()
+            return threading.get_ident()
+
+        loop_thread = asyncio.run(run())
+        assert threads and loop_thread not in threads
+
+    def test_incremental_without_snapshot_runs_full(self, tmp_path):
+        """Test the first incremental sync falls back to a full sync"""
+        result = asyncio.run(SnapshotSync(MockDataDriver(), str(tmp_path / "new.db")).incremental_sync())
+        assert result["mode"] == "full"
+
+
+class _FlakyRequest:
+    """Fake Classroom request failing with the given statuses before succeeding"""
+
+    def __init__(self, statuses):
+        self.statuses = list(statuses)
+        self.calls = 0
+
+    def execute(self, http=None):
+        self.calls += 1
+        if self.statuses:
+            status = self.statuses.pop(0)
+            raise HttpError(httplib2.Response({"status": status}), b"quota")
+        return {"ok": True}
+
+
+class TestRateLimitingAndRetries:
+    """Test cases for the adaptive rate limiter and retry policy"""
+
+    def test_token_bucket_throttles_bursts(self):
+        """Test callers past the burst wait for new tokens"""
+        limiter = AdaptiveRateLimiter(rate=50, burst=1)
+
+        async def run():
+            start = time.perf_counter()
+            await asyncio.gather(*(limiter.acquire() for _ in range(6)))
+            return time.perf_counter() - start
+
+        elapsed = asyncio.run(run())
+        stats = limiter.get_stats()
+        assert elapsed >= 0.09
+        assert stats["acquired"] == 6
+        assert stats["waited"] == 5
+        assert stats["max_queue_depth"] == 5
+        assert stats["queue_depth"] == 0
+
+    def test_rate_adapts_to_throttling(self):
+        """Test AIMD: halve on throttle, recover on success"""
+        limiter = AdaptiveRateLimiter(rate=10, burst=10)
+        limiter.on_throttle()
+        assert limiter.rate == 5
+        for _ in range(100):
+            limiter.on_success()
+        assert limiter.rate == 10
+
+    def test_retries_transient_errors(self, google_driver):
+        """Test 429/5xx are retried with backoff and then succeed"""
+        google_driver.rate_limiter = AdaptiveRateLimiter(rate=100, burst=100)
+        google_driver.retry_policy = RetryPolicy(max_retries=3, base_delay=0.001, max_delay=0.01)
+        request = _FlakyRequest([429, 503])
+
+        assert asyncio.run(google_driver._execute(request)) == {"ok": True}
+        assert request.calls == 3
+        assert google_driver.retry_policy.retries == 2
+        assert google_driver.rate_limiter.get_stats()["throttled"] == 1
+
+    def test_does_not_retry_client_errors(self, google_driver):
+        """Test non-transient errors are raised immediately"""
+        google_driver.retry_policy = RetryPolicy(max_retries=3, base_delay=0.001)
+        request = _FlakyRequest([404])
+
+        with pytest.raises(HttpError):
+            asyncio.run(google_driver._execute(request))
+        assert request.calls == 1
+
+
+def _fake_credentials(token: str = "token-1"):
+    """OAuth credentials valid for one hour (no network needed)"""
+    from google.oauth2.credentials import Credentials
+
+    return Credentials(
+        token=token,
+        refresh_token="refresh",
+        client_id="client",
+        client_secret="secret",
+        token_uri="https://oauth2.googleapis.com/token",
+        expiry=datetime.utcnow() + timedelta(hours=1),
+    )
+
+
+class TestGoogleCredentialManager:
+    """Test cases for the process-wide credential manager"""
+
+    def test_token_file_written_atomically_only_on_change(self, monkeypatch, tmp_path):
+        """Test tokens are persisted once per change without temp leftovers"""
+        tokens_file = tmp_path / "tokens.json"
+        monkeypatch.setenv("TOKENS_FILE", str(tokens_file))
+        manager = GoogleCredentialManager()
+
+        creds = _fake_credentials()
+        manager.set_credentials(creds)
+        manager.set_credentials(creds)
+        assert manager.get_stats()["token_writes"] == 1
+        assert os.listdir(tmp_path) == ["tokens.json"]
+
+        manager.set_credentials(_fake_credentials("token-2"))
+        assert manager.get_stats()["token_writes"] == 2
+        assert "token-2" in tokens_file.read_text()
+
+    def test_credentials_loaded_once_and_service_reused(self, monkeypatch, tmp_path):
+        """Test the token file is read once and the service is built once"""
+        tokens_file = tmp_path / "tokens.json"
+        tokens_file.write_text(_fake_credentials().to_json())
+        monkeypatch.setenv("TOKENS_FILE", str(tokens_file))
+        manager = GoogleCredentialManager()
+
+        assert manager.get_credentials() is manager.get_credentials()
+        service = manager.get_service()
+        assert service is not None
+        assert manager.get_service() is service
+
+        stats = manager.get_stats()
+        assert stats["token_loads"] == 1
+        assert stats["service_builds"] == 1
+        assert stats["token_writes"] == 0
+        assert stats["auth_time_ms"] >= 0
+
+    def test_lifespan_refreshes_only_for_google_driver(self, monkeypatch):
+        """Test the app starts the refresh thread only when DATA_DRIVER=google"""
+        from app.services.google_auth import credential_manager
+
+        monkeypatch.setenv("DATA_DRIVER", "mock")
+        with TestClient(app):
+            assert credential_manager.get_stats()["background_refresh"] is False
+
+    def test_failed_refresh_backs_off_without_holding_the_lock(self, monkeypatch, tmp_path):
+        """Test other threads get the credentials while the refresh loop backs off"""
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+
+        monkeypatch.setenv("TOKENS_FILE", str(tmp_path / "tokens.json"))
+        manager = GoogleCredentialManager()
+        # Still valid, but already inside the refresh margin
+        manager.refresh_margin = 3600
+        creds = _fake_credentials()
+        creds.expiry = datetime.utcnow() + timedelta(minutes=10)
+        manager._credentials = creds
+        attempts = []
+        failed = threading.Event()
+
+        def failing_refresh(request):
+            attempts.append(time.monotonic())
+            failed.set()
+            raise RuntimeError("token endpoint down")
+
+        monkeypatch.setattr(creds, "refresh", failing_refresh)
+        manager.start_background_refresh()
+        try:
+            assert failed.wait(5)
+            time.sleep(0.2)
+            with ThreadPoolExecutor(max_workers=1) as threads:
+                start = time.perf_counter()
+                assert threads.submit(manager.get_credentials).result(timeout=2) is creds
+                assert time.perf_counter() - start < 0.5
+            # One attempt per backoff period, not a busy loop
+            assert len(attempts) == 1
+            assert manager.get_stats()["refresh_failures"] == 1
+        finally:
+            manager.stop_background_refresh()
+        assert manager.get_stats()["background_refresh"] is False
+
+    def test_background_refresh_lifecycle(self):
+        """Test the refresh thread starts and stops cleanly"""
+        manager = GoogleCredentialManager()
+        manager.start_background_refresh()
+        assert manager.get_stats()["background_refresh"] is True
+        manager.stop_background_refresh()
+        assert manager.get_stats()["background_refresh"] is False
+
+
+@pytest.fixture
+def generated_dir(tmp_path):
+    """Small generated dataset written to disk"""
+    out_dir = tmp_path / "generated"
+    DatasetGenerator(courses=4, students=200, submissions=2000, seed=7).write(str(out_dir))
+    return out_dir
+
+
+class TestDatasetGenerator:
+    """Test cases for the seeded synthetic dataset generator"""
+
+    def test_same_seed_same_dataset(self, tmp_path, generated_dir):
+        """Test generation is deterministic for a given seed"""
+        DatasetGenerator(courses=4, students=200, submissions=2000, seed=7).write(str(tmp_path / "again"))
+        for name in ("courses.json", "students.json", "coursework.json", "submissions.json"):
+            assert (generated_dir / name).read_bytes() == (tmp_path / "again" / name).read_bytes()
+
+    def test_scale_and_rates(self, generated_dir):
+        """Test record counts and late/grade distributions are realistic"""
+        submissions = list(load_records(str(generated_dir / "submissions.json")))
+        assert 1800 <= len(submissions) <= 2200
+
+        turned_in = [s for s in submissions if s["state"] != "CREATED"]
+        late_rate = sum(s["late"] for s in turned_in) / len(turned_in)
+        assert 0.05 < late_rate < 0.2
+        grades = [s["assigned_grade"] for s in submissions if s["assigned_grade"] is not None]
+        assert grades and all(0 <= grade <= 100 for grade in grades)
+
+    def test_load_records_reads_both_layouts(self, generated_dir):
+        """Test streamed (one per line) and hand-written (indented) fixtures load"""
+        assert len(list(load_records(str(generated_dir / "courses.json")))) == 4
+        assert len(list(load_records(os.path.join(DEFAULT_MOCK_DATA_DIR, "courses.json")))) == 2
+
+    def test_mock_driver_and_reports_load_generated_set(self, monkeypatch, generated_dir):
+        """Test MOCK_DATA_DIR points the mock driver and reports at the generated set"""
+        from app.services.reports_service import ReportsService
+
+        monkeypatch.setenv("MOCK_DATA_DIR", str(generated_dir))
+        driver = MockDataDriver()
+        assert len(driver.courses) == 4
+        assert asyncio.run(driver.get_students("course_1"))["total_items"] == 50
+
+        service = ReportsService()
+        assert len(service.mock_data["submissions"]) == len(driver.submissions)
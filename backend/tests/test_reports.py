@@ -3,6 +3,12 @@ Tests for reports functionality
 Compatible with pytest 7.4.0+ and FastAPI 0.104.0+
 """
 
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import patch, MagicMock
@@ -10,7 +16,20 @@ import json
 
 from app.main import app
 from app.models.reports import ReportCohortProgress, CourseProgress, ReportCohortProgressResponse
-from app.services.reports_service import ReportsService
+from app.services.reports_service import ReportsService, reports_service
+from app.services.driver_registry import driver_registry
+from app.services import submission_table
+from app.services import grade_sketches
+from app.services.grade_sketches import GradeSketches, KLLSketch
+from app.services.report_aggregates import ReportAggregates, submission_parts
+from app.services import parallel_cohorts
+from app.services.parallel_cohorts import ParallelBuild, partition_courses
+from app.services.report_executor import ReportExecutor, report_executor
+from app.services.report_export import stream_csv, stream_ndjson
+from app.services.report_warmer import ReportWarmer
+from app.services.trend_rollups import TrendRollups, bucket_label, bucket_of, day_number
+from app.services.submission_table import SubmissionTable
+from app.middleware.conditional_get import ConditionalGetMiddleware
 from app.middleware.role_auth import RoleAuthMiddleware
 
 client = TestClient(app)
@@ -79,6 +98,25 @@ class TestReportsService:
         assert "total_submissions" in health
 
 
+    def test_refresh_from_driver(self):
+        """Test loading report data from a driver course submission stream"""
+        from app.services.mock_driver import MockDataDriver
+
+        service = ReportsService()
+        driver = MockDataDriver()
+        version = service.data_version
+
+        assert asyncio.run(service.refresh_from_driver(driver)) is True
+        assert service.data_version == version + 1
+        assert len(service.mock_data["courses"]) == len(driver.courses)
+        assert len(service.mock_data["students"]) == len(driver.students)
+        assert len(service.mock_data["submissions"]) == len(driver.submissions)
+
+        kpis = service.calculate_global_kpis()
+        assert kpis.totalSubmissions == len(driver.submissions)
+        assert kpis.lateSubmissions == len([s for s in driver.submissions if s.get("late")])
+
+
 class TestRoleAuthMiddleware:
     """Test cases for RoleAuthMiddleware"""
     
@@ -135,6 +173,203 @@ class TestRoleAuthMiddleware:
         assert "STUDENTS_SEARCH" not in student_perms
 
 
+
+def _report_submissions():
+    """Report-layout submissions covering late, ungraded and zero grades"""
+    return [
+        {"user_id": "u1", "course_id": "c1", "assignment_id": "a1", "submission_time": "2024-03-01T10:00:00Z", "is_late": False, "grade": 90.0, "status": "RETURNED"},
+        {"user_id": "u1", "course_id": "c1", "assignment_id": "a2", "submission_time": "2024-03-08T10:00:00Z", "is_late": True, "grade": None, "status": "TURNED_IN"},
+        {"user_id": "u2", "course_id": "c1", "assignment_id": "a1", "submission_time": None, "is_late": False, "grade": 0, "status": "CREATED"},
+        {"user_id": "u3", "course_id": "c2", "assignment_id": "a3", "submission_time": "2024-03-02T10:00:00Z", "is_late": True, "grade": 70.0, "status": "TURNED_IN"},
+    ]
+
+
+class TestSubmissionTable:
+    """Test cases for the columnar submission table"""
+
+    def test_rows_round_trip(self):
+        """Test iteration rebuilds the report layout"""
+        records = _report_submissions()
+        table = SubmissionTable.from_records(records)
+        assert len(table) == 4
+        assert list(table) == records
+        assert table.nbytes == 4 * (4 * 3 + 1 * 2 + 8 * 2)
+
+    def test_aggregate_by_course_and_user(self):
+        """Test per-group counters"""
+        table = SubmissionTable.from_records(_report_submissions())
+        by_course = table.aggregate("course")
+        assert by_course["c1"] == {"total": 3, "late": 1, "turned_in": 1, "graded": 1, "grade_sum": 90.0}
+        assert by_course["c2"]["late"] == 1
+
+        by_user = table.aggregate("user")
+        assert by_user["u1"]["total"] == 2
+        assert table.totals() == {"total": 4, "late": 2, "turned_in": 2}
+
+    def test_python_and_numpy_paths_agree(self, monkeypatch):
+        """Test the NumPy aggregation matches the pure-Python fallback"""
+        if submission_table.np is None:
+            pytest.skip("NumPy not installed")
+        table = SubmissionTable.from_records(_report_submissions() * 50)
+        with_numpy = (table.aggregate("course"), table.aggregate("user"), table.totals())
+
+        monkeypatch.setattr(submission_table, "np", None)
+        assert (table.aggregate("course"), table.aggregate("user"), table.totals()) == with_numpy
+
+    def test_service_keeps_submissions_columnar(self):
+        """Test ReportsService stores submissions in a SubmissionTable"""
+        service = ReportsService()
+        assert isinstance(service.mock_data["submissions"], SubmissionTable)
+
+    def test_count_pairs(self):
+        """Test counts per (course, user) and per (course, assignment)"""
+        table = SubmissionTable.from_records(_report_submissions())
+        assert table.count_pairs() == {("c1", "u1"): 2, ("c1", "u2"): 1, ("c2", "u3"): 1}
+        assert table.count_pairs("course", "assignment") == {("c1", "a1"): 2, ("c1", "a2"): 1, ("c2", "a3"): 1}
+
+    def test_update_and_remove_rows(self):
+        """Test in-place updates and O(1) removal by submission ID"""
+        records = [{**record, "id": f"s{i}"} for i, record in enumerate(_report_submissions())]
+        table = SubmissionTable.from_records(records)
+
+        table.update(table.position("s1"), {**records[1], "grade": 75.0})
+        assert table.row(table.position("s1"))["grade"] == 75.0
+
+        table.remove(table.position("s0"))
+        assert len(table) == 3
+        assert table.position("s0") is None
+        assert table.row(table.position("s3"))["user_id"] == "u3"
+        assert sorted(row["assignment_id"] for row in table) == ["a1", "a2", "a3"]
+
+
+def _report_data():
+    """Report data built around _report_submissions"""
+    student = lambda user_id, course_id: {"user_id": user_id, "course_id": course_id, "profile": {"name": {"full_name": user_id}}}
+    return {
+        "students": [student("u1", "c1"), student("u2", "c1"), student("u3", "c2"), student("u4", "c2")],
+        "courses": [{"id": "c1", "name": "Uno", "owner_id": "t1"}, {"id": "c2", "name": "Dos", "owner_id": "t2"}],
+        "submissions": SubmissionTable.from_records(_report_submissions()),
+    }
+
+
+class TestReportAggregates:
+    """Test cases for the report aggregate index"""
+
+    def test_build_counters(self):
+        """Test the index holds course, student and completion counters"""
+        index = ReportAggregates.build(_report_data(), data_version=1)
+        assert index.students_by_course == {"c1": 2, "c2": 2}
+        assert index.course("c1")["late"] == 1
+        assert index.course("missing")["total"] == 0
+        assert index.expected_by_course == {"c1": 2, "c2": 1}
+        assert index.completion_rates == [100.0, 50.0, 100.0, 0]
+        assert index.average_completion == 62.5
+        assert (index.at_risk, index.needs_attention) == (1, 2)
+
+    def test_built_once_per_data_version(self):
+        """Test ReportsService reuses the index until the data version changes"""
+        service = ReportsService()
+        service.mock_data = _report_data()
+        service.data_version += 1
+
+        with patch.object(ReportAggregates, "build", wraps=ReportAggregates.build) as build:
+            service.calculate_global_kpis()
+            service.get_coordinator_dashboard("c")
+            service.get_cohort_progress()
+            assert build.call_count == 1
+
+            service.data_version += 1
+            service.get_overview_stats()
+            assert build.call_count == 2
+
+    def test_dashboards_read_the_index(self):
+        """Test dashboard numbers come from the index"""
+        service = ReportsService()
+        service.mock_data = _report_data()
+        service.data_version += 1
+
+        kpis = service.calculate_global_kpis()
+        assert kpis.averageCompletionRate == 62.5
+        assert kpis.studentsAtRisk == 1
+
+        student = service.get_student_dashboard("u1")
+        assert student.pendingSubmissions == 1
+        assert student.completionRate == 50.0
+
+        teacher = service.get_teacher_dashboard("t1")
+        assert teacher.totalStudents == 2
+        assert teacher.pendingGrading == 2
+
+    def _service_with_events(self):
+        service = ReportsService()
+        data = _report_data()
+        data["submissions"] = SubmissionTable.from_records(
+            {**record, "id": f"s{i}"} for i, record in enumerate(_report_submissions())
+        )
+        service.mock_data = data
+        service.data_version += 1
+        return service
+
+    def test_events_update_counters_without_rebuild(self):
+        """Test delta events update counters and risk classification in place"""
+        service = self._service_with_events()
+        index = service.aggregates
+        assert index.at_risk == 1
+
+        version = service.data_version
+        with patch.object(ReportAggregates, "build", wraps=ReportAggregates.build) as build:
+            applied = service.apply_submission_events([
+                {"type": "added", "course_id": "c2", "submission": {"id": "s9", "user_id": "u4", "course_work_id": "a3", "late": True, "assigned_grade": 60, "state": "TURNED_IN"}},
+                {"type": "updated", "course_id": "c1", "submission": {"id": "s1", "user_id": "u1", "course_work_id": "a2", "late": False, "assigned_grade": 80, "state": "RETURNED"}},
+                {"type": "removed", "submission": {"id": "s2"}},
+                {"type": "removed", "submission": {"id": "unknown"}},
+            ])
+            assert service.aggregates is index
+            assert build.call_count == 0
+
+        assert applied == {"added": 1, "updated": 1, "removed": 1, "ignored": 1}
+        assert service.data_version == version + 1
+        assert index.course("c2")["late"] == 2
+        assert index.course("c1") == {"total": 2, "late": 0, "turned_in": 0, "graded": 2, "grade_sum": 170.0}
+        # u2 lost its only submission; u4 now completed c2's single assignment
+        assert index.completion_rates == [100.0, 0, 100.0, 100.0]
+        assert (index.at_risk, index.needs_attention) == (1, 1)
+        assert service.check_aggregates()["consistent"]
+
+    def test_events_match_full_rebuild(self):
+        """Test a random stream of events stays consistent with a full rebuild"""
+        import random
+
+        service = self._service_with_events()
+        rng = random.Random(7)
+        ids = ["s0", "s1", "s2", "s3"]
+        for step in range(300):
+            event_type = rng.choice(["added", "updated", "removed"]) if ids else "added"
+            if event_type == "added":
+                submission_id = f"n{step}"
+                ids.append(submission_id)
+            else:
+                submission_id = rng.choice(ids)
+            if event_type == "removed":
+                ids.remove(submission_id)
+            service.apply_submission_events([{
+                "type": event_type,
+                "course_id": rng.choice(["c1", "c2"]),
+                "submission": {
+                    "id": submission_id,
+                    "user_id": rng.choice(["u1", "u2", "u3", "u4"]),
+                    "course_work_id": rng.choice(["a1", "a2", "a3", "a4"]),
+                    "late": rng.random() < 0.3,
+                    "assigned_grade": rng.choice([None, 0, 55.5, 90]),
+                    "state": rng.choice(["TURNED_IN", "RETURNED", "CREATED"]),
+                },
+            }])
+
+        check = service.check_aggregates()
+        assert check == {"consistent": True, "mismatches": [], "data_version": service.data_version, "events_applied": 300}
+        assert len(service.mock_data["submissions"]) == len(ids)
+
+
 class TestReportsAPI:
     """Test cases for Reports API endpoints"""
     
@@ -231,6 +466,498 @@ class TestReportsAPI:
         assert "is_mock_data" in data
 
 
+class TestTrendRollups:
+    """Test cases for time-bucketed trend rollups"""
+
+    def test_bucket_labels(self):
+        """Test day, ISO week and month buckets"""
+        day = day_number(date(2024, 12, 31))
+        assert bucket_label("day", bucket_of("day", day)) == "2024-12-31"
+        # ISO week 1 of 2025 starts on Monday 2024-12-30
+        assert bucket_label("week", bucket_of("week", day)) == "2025-W01"
+        assert bucket_of("week", day) == day_number(date(2024, 12, 30))
+        assert bucket_label("month", bucket_of("month", day)) == "Diciembre 2024"
+        with pytest.raises(ValueError):
+            bucket_of("year", day)
+
+    def test_series_by_course_and_range(self):
+        """Test bucketed counters, course filters and inclusive date ranges"""
+        rollups = TrendRollups.build(SubmissionTable.from_records(_report_submissions()))
+        daily = rollups.series("day")
+        assert [(b["period"], b["on_time"], b["late"]) for b in daily] == [
+            ("2024-03-01", 1, 0), ("2024-03-02", 0, 1), ("2024-03-08", 0, 1),
+        ]
+        assert rollups.series("month") == [
+            {"period": "Marzo 2024", "bucket": 2024 * 12 + 2, "on_time": 1, "late": 2, "total": 3},
+        ]
+        assert [b["period"] for b in rollups.series("week", course_ids=["c1"])] == ["2024-W09", "2024-W10"]
+        assert [b["period"] for b in rollups.series("day", start=date(2024, 3, 2), end=date(2024, 3, 7))] == ["2024-03-02"]
+        assert rollups.series("day", course_ids=[]) == []
+
+    def test_events_move_trend_buckets(self):
+        """Test delta events update the rollups in place"""
+        service = ReportsService()
+        data = _report_data()
+        data["submissions"] = SubmissionTable.from_records(
+            {**record, "id": f"s{i}"} for i, record in enumerate(_report_submissions())
+        )
+        service.mock_data = data
+        service.data_version += 1
+        assert [t.period for t in service.get_trends()] == ["Marzo 2024"]
+
+        service.apply_submission_events([
+            {"type": "updated", "course_id": "c1", "submission": {"id": "s0", "user_id": "u1", "course_work_id": "a1", "update_time": "2024-04-02T09:00:00Z", "late": True, "state": "TURNED_IN"}},
+        ])
+        trends = service.get_trends()
+        assert [(t.period, t.onTimeSubmissions, t.lateSubmissions) for t in trends] == [("Marzo 2024", 0, 2), ("Abril 2024", 0, 1)]
+        assert service.check_aggregates()["consistent"]
+
+    def test_trends_endpoint(self):
+        """Test the trends endpoint and granularity validation"""
+        response = client.get("/api/v1/reports/trends?granularity=week")
+        assert response.status_code == 200
+        assert all({"period", "onTimeSubmissions", "lateSubmissions", "totalSubmissions"} <= set(item) for item in response.json())
+        assert client.get("/api/v1/reports/trends?granularity=year").status_code == 400
+
+
+class TestGradeSketches:
+    """Test cases for the grade quantile sketches"""
+
+    def test_exact_until_compaction(self):
+        """Test small sketches answer exact nearest-rank percentiles and histograms"""
+        sketch = KLLSketch(k=50)
+        sketch.extend(float(value) for value in range(1, 11))
+        assert sketch.is_exact
+        assert sketch.quantiles((0.1, 0.5, 0.9)) == [1.0, 5.0, 9.0]
+        assert (sketch.min, sketch.max, sketch.mean) == (1.0, 10.0, 5.5)
+        assert [bucket["count"] for bucket in sketch.histogram(3)] == [3, 3, 4]
+        assert KLLSketch(k=50).quantile(0.5) is None
+
+    def test_rank_error_and_merge(self):
+        """Test percentiles of merged sketches stay within the rank error bound"""
+        import bisect
+        import random
+
+        rng = random.Random(3)
+        values = [rng.uniform(0, 100) for _ in range(20000)]
+        left, right = KLLSketch(k=100), KLLSketch(k=100)
+        for value in values[:10000]:
+            left.update(value)
+        right.extend(values[10000:])
+        merged = left.copy().merge(right)
+
+        assert merged.count == 20000 and not merged.is_exact
+        assert sum(weight for _, weight in merged.weighted()) == 20000
+        assert len(merged.weighted()) < 1000
+        ordered = sorted(values)
+        for fraction, value in zip((0.1, 0.5, 0.9), merged.quantiles((0.1, 0.5, 0.9))):
+            assert abs(bisect.bisect(ordered, value) / len(ordered) - fraction) < 0.03
+
+    def test_python_and_numpy_grouping_agree(self, monkeypatch):
+        """Test coursework grouping matches between NumPy and the Python loop"""
+        if grade_sketches.np is None:
+            pytest.skip("NumPy not installed")
+        table = SubmissionTable.from_records(_report_submissions() * 3)
+        with_numpy = grade_sketches._group_grades(table)
+        monkeypatch.setattr(grade_sketches, "np", None)
+        assert grade_sketches._group_grades(table) == with_numpy == {("c1", "a1"): [90.0] * 3, ("c2", "a3"): [70.0] * 3}
+
+    def test_service_distribution_follows_events(self):
+        """Test the distribution scopes and that removed grades are rebuilt out of the sketches"""
+        service = TestReportAggregates()._service_with_events()
+        institution = service.get_grade_distribution()
+        assert (institution.scope, institution.count, institution.p50) == ("institution", 2, 70.0)
+        assert [(item.id, item.count) for item in institution.breakdown] == [("c1", 1), ("c2", 1)]
+
+        service.apply_submission_events([
+            {"type": "added", "course_id": "c2", "submission": {"id": "s9", "user_id": "u4", "course_work_id": "a3", "assigned_grade": 50, "state": "RETURNED"}},
+            {"type": "removed", "submission": {"id": "s0"}},
+        ])
+        assert service.aggregates.grades.stale == {("c1", "a1")}
+        institution = service.get_grade_distribution()
+        assert (institution.count, institution.min, institution.max) == (2, 50.0, 70.0)
+        assert service.get_grade_distribution(course_id="c1").count == 0
+
+        cohort = service.get_grade_distribution(cohort_id="c2_cohort_001", bins=2)
+        assert (cohort.scope, cohort.count, cohort.mean) == ("cohort", 2, 60.0)
+        assert [bucket.count for bucket in cohort.histogram] == [1, 1]
+        coursework = service.get_grade_distribution(course_id="c2", assignment_id="a3")
+        assert (coursework.scope, coursework.p10, coursework.p90) == ("coursework", 50.0, 70.0)
+
+        with pytest.raises(ValueError):
+            service.get_grade_distribution(assignment_id="a3")
+        with pytest.raises(ValueError):
+            service.get_grade_distribution(cohort_id="missing")
+
+    def test_grade_distribution_endpoint(self):
+        """Test the grade distribution endpoint and its validation"""
+        response = client.get("/api/v1/reports/grade-distribution?bins=4")
+        assert response.status_code == 200
+        data = response.json()
+        assert {"p10", "p50", "p90", "histogram", "breakdown"} <= set(data)
+        assert sum(bucket["count"] for bucket in data["histogram"]) == data["count"]
+        assert client.get("/api/v1/reports/grade-distribution?course_id=missing").status_code == 404
+        assert client.get("/api/v1/reports/grade-distribution?assignment_id=a1").status_code == 400
+
+
+class TestReportExecutor:
+    """Test cases for the report execution layer"""
+
+    def test_runs_off_the_event_loop_and_caches_per_version(self):
+        """Test computations run on pool threads and cached answers return inline"""
+        version = [1]
+        executor = ReportExecutor(lambda: version[0], max_workers=2, timeout=5)
+        calls = []
+
+        def compute(value):
+            calls.append(threading.current_thread().name)
+            return value * 2
+
+        async def scenario():
+            first = await executor.run(compute, 21)
+            second = await executor.run(compute, 21)
+            version[0] += 1
+            third = await executor.run(compute, 21)
+            return first, second, third
+
+        try:
+            assert asyncio.run(scenario()) == (42, 42, 42)
+        finally:
+            executor.shutdown()
+        assert len(calls) == 2
+        assert all(name.startswith("reports") for name in calls)
+        assert executor.get_stats()["inline_hits"] == 1
+
+    def test_timeout(self):
+        """Test slow computations raise TimeoutError without blocking the loop"""
+        executor = ReportExecutor(lambda: 1, max_workers=1, timeout=0.05)
+
+        async def scenario():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0.005)
+
+            task = asyncio.create_task(ticker())
+            try:
+                with pytest.raises(TimeoutError):
+                    await executor.run(time.sleep, 0.3)
+            finally:
+                task.cancel()
+            return ticks
+
+        try:
+            assert asyncio.run(scenario()) > 3
+        finally:
+            executor.shutdown()
+        assert executor.get_stats()["timeouts"] == 1
+
+    def test_process_pool(self):
+        """Test picklable functions run on the process pool"""
+        executor = ReportExecutor(lambda: 1, process_workers=1, timeout=30)
+        try:
+            assert asyncio.run(executor.run_in_process(pow, 2, 10)) == 1024
+        finally:
+            executor.shutdown()
+
+    def test_endpoint_timeout_returns_504(self):
+        """Test report endpoints map a timeout to 504"""
+        with patch.object(report_executor, "run", side_effect=TimeoutError("slow")):
+            response = client.get("/api/v1/reports/kpis")
+        assert response.status_code == 504
+        assert "executor" in client.get("/api/v1/reports/health").json()
+
+
+class TestParallelCohorts:
+    """Test cases for aggregate builds partitioned by course across a process pool"""
+
+    def test_partition_courses(self):
+        """Test row ranges cover every row once and never split a course"""
+        assert partition_courses([5, 5, 5, 5], 2) == [(0, 10), (10, 20)]
+        assert partition_courses([100, 1, 1, 1], 2) == [(0, 100), (100, 103)]
+        assert partition_courses([3, 0, 3], 2) == [(0, 3), (3, 6)]
+        assert partition_courses([1, 1], 8) == [(0, 1), (1, 2)]
+        assert partition_courses([0, 0], 4) == [(0, 0)]
+
+    def test_matches_serial_build(self):
+        """Test merged partitions equal a serial build and the mapped file is removed"""
+        data = _report_data()
+        data["submissions"] = SubmissionTable.from_records(_report_submissions() * 5)
+        with ProcessPoolExecutor(max_workers=2, mp_context=parallel_cohorts._context()) as pool:
+            build = ParallelBuild(data["submissions"], pool, partitions=3)
+            parts = build.result()
+        assert build.result() is parts
+        assert not os.path.exists(build._mapped.path)
+
+        serial = submission_parts(data["submissions"])
+        assert parts["course_stats"] == serial["course_stats"]
+        assert ReportAggregates.build(data, 0, parts=parts).diff(ReportAggregates.build(data, 0)) == []
+        assert {course: {assignment: sketch.weighted() for assignment, sketch in by_assignment.items()} for course, by_assignment in parts["grades"].items()} == \
+            {course: {assignment: sketch.weighted() for assignment, sketch in by_assignment.items()} for course, by_assignment in serial["grades"].items()}
+
+    def test_service_uses_pool_over_threshold(self):
+        """Test large tables build in parallel outside the lock, small ones inline"""
+        service = ReportsService()
+        service.mock_data = _report_data()
+        service.data_version += 1
+        expected = ReportAggregates.build(service.mock_data, 0)
+
+        class InlineBuild:
+            def __init__(self, table):
+                self.table = table
+
+            def result(self):
+                # The service lock is free while the workers run (RLock: probe from another thread)
+                def probe():
+                    if service._lock.acquire(blocking=False):
+                        service._lock.release()
+                        return True
+                    return False
+
+                with ThreadPoolExecutor(max_workers=1) as threads:
+                    assert threads.submit(probe).result()
+                return submission_parts(self.table)
+
+        service.parallel_min_rows = 1
+        with patch("app.services.reports_service.ParallelBuild", wraps=InlineBuild) as parallel:
+            assert service.aggregates.diff(expected) == []
+            assert parallel.call_count == 1
+            assert service._pending is None
+
+            service.parallel_min_rows = 0
+            service.data_version += 1
+            assert service.aggregates.diff(expected) == []
+            assert parallel.call_count == 1
+
+
+class TestReportExport:
+    """Test cases for streaming CSV / NDJSON exports"""
+
+    coordinator = {"X-User-Email": "coord.ecommerce@instituto.edu"}
+    admin = {"X-User-Email": "admin@instituto.edu"}
+
+    def test_header_streams_before_rows_are_computed(self):
+        """Test the CSV header is produced without pulling any row"""
+        def rows():
+            raise AssertionError("rows pulled before the header was sent")
+            yield {}
+
+        chunks = stream_csv(rows(), ("a", "b"), rows_per_chunk=2)
+        assert next(chunks) == "a,b\n"
+
+    def test_chunking(self):
+        """Test rows are grouped into chunks and NDJSON flushes the first row alone"""
+        rows = [{"a": index, "b": None} for index in range(5)]
+        assert list(stream_csv(iter(rows), ("a", "b"), rows_per_chunk=2)) == ["a,b\n", "0,\n1,\n", "2,\n3,\n", "4,\n"]
+        chunks = list(stream_ndjson(iter(rows), ("a",), rows_per_chunk=2))
+        assert chunks == ['{"a": 0}\n', '{"a": 1}\n{"a": 2}\n', '{"a": 3}\n{"a": 4}\n']
+
+    def test_service_rows(self):
+        """Test student and submission rows cover every record and honor the course filter"""
+        service = ReportsService()
+        service.mock_data = _report_data()
+        service.data_version += 1
+
+        students = list(service.iter_student_rows(batch_size=3))
+        assert [row["completion_rate"] for row in students] == [100.0, 50.0, 100.0, 0]
+        assert [row["at_risk"] for row in students] == [False, False, False, True]
+        assert len(list(service.iter_student_rows("c2"))) == 2
+
+        submissions = list(service.iter_submission_rows(batch_size=3))
+        assert len(submissions) == 4
+        assert {row["course_id"] for row in service.iter_submission_rows("c1", batch_size=1)} == {"c1"}
+        assert list(service.iter_submission_rows("missing")) == []
+        assert [row["course_id"] for row in service.iter_cohort_rows()] == ["c1", "c2"]
+
+    def test_export_endpoint(self):
+        """Test the export endpoint streams CSV and NDJSON for the default whitelist roles"""
+        assert client.get("/api/v1/reports/export/students", headers={"X-User-Email": "student1@instituto.edu"}).status_code == 403
+        assert client.get("/api/v1/reports/export/students", headers={"X-User-Email": "teacher1@instituto.edu"}).status_code == 403
+        assert client.get("/api/v1/reports/export/cohort-progress", headers=self.admin).status_code == 200
+
+        response = client.get("/api/v1/reports/export/students", headers=self.coordinator)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        assert 'filename="students.csv"' in response.headers["content-disposition"]
+        lines = response.text.splitlines()
+        assert lines[0].startswith("user_id,course_id")
+        assert len(lines) == len(reports_service.mock_data["students"]) + 1
+
+        response = client.get("/api/v1/reports/export/submissions?format=ndjson", headers=self.coordinator)
+        assert response.status_code == 200
+        records = [json.loads(line) for line in response.text.splitlines()]
+        assert len(records) == len(reports_service.mock_data["submissions"])
+
+        assert client.get("/api/v1/reports/export/grades", headers=self.coordinator).status_code == 404
+        assert client.get("/api/v1/reports/export/students?format=xlsx", headers=self.coordinator).status_code == 400
+
+
+class TestReportWarmer:
+    """Test cases for the background report warmer"""
+
+    def test_warm_fills_the_executor_cache(self):
+        """Test a run precomputes every dashboard so requests return inline"""
+        service = ReportsService()
+        executor = ReportExecutor(lambda: service.data_version, max_workers=2, timeout=30)
+        warmer = ReportWarmer(executor, service, interval=0, concurrency=2)
+        names = [name for name, _, _ in warmer.jobs()]
+        assert {"kpis", "overview", "cohort-progress", "admin"} <= set(names)
+        assert any(name.startswith("coordinator:") for name in names)
+        assert any(name.startswith("teacher:") for name in names)
+
+        try:
+            last_run = asyncio.run(warmer.warm("test"))
+            assert (last_run["reason"], last_run["warmed"], last_run["failed"]) == ("test", len(names), 0)
+            asyncio.run(executor.run(service.get_cohort_progress, None, None, 10, None))
+        finally:
+            executor.shutdown()
+        assert executor.get_stats()["inline_hits"] == 1
+        assert warmer.get_status()["runs"] == 1
+
+    def test_concurrency_is_bounded_and_errors_recorded(self):
+        """Test at most `concurrency` jobs run at once and failures do not stop the run"""
+        class RecordingExecutor:
+            cache_size = 256
+            active = peak = 0
+
+            async def run(self, func, *args):
+                self.active += 1
+                self.peak = max(self.peak, self.active)
+                await asyncio.sleep(0.01)
+                self.active -= 1
+                if func.__name__ == "get_admin_dashboard":
+                    raise ValueError("boom")
+
+        executor = RecordingExecutor()
+        warmer = ReportWarmer(executor, ReportsService(), interval=0, concurrency=2)
+        last_run = asyncio.run(warmer.warm())
+        assert executor.peak == 2
+        assert last_run["failed"] == 1 and "admin" in last_run["errors"]
+
+    def test_scheduler_runs_on_startup_version_change_and_trigger(self):
+        """Test the scheduler loop reacts to data versions and explicit triggers"""
+        service = ReportsService()
+        reasons = []
+
+        class Executor:
+            cache_size = 256
+
+            async def run(self, func, *args):
+                return None
+
+        warmer = ReportWarmer(Executor(), service, interval=0, concurrency=4, poll=0.01)
+        original = warmer.warm
+
+        async def record(reason="manual"):
+            reasons.append(reason)
+            return await original(reason)
+
+        warmer.warm = record
+
+        async def scenario():
+            warmer.start()
+            await asyncio.sleep(0.05)
+            service.data_version += 1
+            await asyncio.sleep(0.05)
+            warmer.trigger("sync")
+            await asyncio.sleep(0.05)
+            status = warmer.get_status()
+            await warmer.stop()
+            return status
+
+        status = asyncio.run(scenario())
+        assert reasons == ["startup", "data-version", "sync"]
+        assert status["state"] == "idle" and status["last_run"]["reason"] == "sync"
+        assert warmer.get_status()["state"] == "stopped"
+
+    def test_status_in_reports_health(self):
+        """Test the reports health endpoint exposes the warmer status"""
+        warmer_status = client.get("/api/v1/reports/health").json()["warmer"]
+        assert {"state", "runs", "last_run", "interval_seconds", "concurrency"} <= set(warmer_status)
+
+
+class TestConditionalGet:
+    """Test cases for ETag / If-None-Match handling on read endpoints"""
+
+    headers = {"X-User-Email": "admin@instituto.edu"}
+
+    def test_unchanged_poll_returns_304(self):
+        """Test a matching If-None-Match gets an empty 304"""
+        response = client.get("/api/v1/reports/kpis", headers=self.headers)
+        assert response.status_code == 200
+        etag = response.headers["ETag"]
+        assert etag.startswith('"') and etag.endswith('"')
+        assert "must-revalidate" in response.headers["Cache-Control"]
+
+        with patch.object(reports_service, "calculate_global_kpis") as kpis:
+            cached = client.get("/api/v1/reports/kpis", headers={**self.headers, "If-None-Match": f'"other", W/{etag}'})
+            kpis.assert_not_called()
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert cached.headers["ETag"] == etag
+
+    def test_etag_depends_on_scope_and_version(self):
+        """Test user, query and data version change the ETag"""
+        first = client.get("/api/v1/reports/overview?pageSize=2&course_id=x", headers=self.headers).headers["ETag"]
+        reordered = client.get("/api/v1/reports/overview?course_id=x&pageSize=2", headers=self.headers).headers["ETag"]
+        other_query = client.get("/api/v1/reports/overview?pageSize=3&course_id=x", headers=self.headers).headers["ETag"]
+        assert first == reordered
+        assert first != other_query
+
+        other_user = client.get("/api/v1/reports/overview", headers={"X-User-Email": "coord.ecommerce@instituto.edu"})
+        assert other_user.headers["ETag"] != client.get("/api/v1/reports/overview", headers=self.headers).headers["ETag"]
+
+        overview = reports_service.get_overview_stats()
+        changed = overview.model_copy(update={"totalStudents": overview.totalStudents + 1})
+        with patch.object(reports_service, "data_version", reports_service.data_version + 1), \
+                patch.object(reports_service, "get_overview_stats", return_value=changed):
+            response = client.get("/api/v1/reports/overview?pageSize=2&course_id=x", headers={**self.headers, "If-None-Match": first})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != first
+
+    def test_workers_agree_on_etag(self):
+        """Test a worker with another local data version tags the same data identically"""
+        first = client.get("/api/v1/reports/kpis", headers=self.headers).headers["ETag"]
+
+        # Another process: different in-memory version counter, same data
+        with patch.object(reports_service, "data_version", reports_service.data_version + 100):
+            response = client.get("/api/v1/reports/kpis", headers={**self.headers, "If-None-Match": first})
+        assert response.status_code == 304
+        assert response.headers["ETag"] == first
+
+    def test_polls_do_not_count_driver_reuses(self):
+        """Test conditional GETs read the driver without the counting accessor"""
+        driver_registry.get_driver()
+        reuses = lambda: driver_registry.get_stats()["drivers"][os.getenv("DATA_DRIVER", "mock")]["reuses"]
+        before = reuses()
+        with patch.object(driver_registry, "get_driver", side_effect=AssertionError("counted")):
+            middleware_version = ConditionalGetMiddleware.data_version("/api/v1/courses")
+        assert middleware_version is not None
+        assert reuses() == before
+
+    def test_live_driver_data_is_not_cached(self):
+        """Test unversioned driver data gets no ETag and no-cache"""
+        driver = driver_registry.get_driver()
+        assert client.get("/api/v1/courses").headers.get("ETag")
+
+        with patch.object(type(driver), "get_data_version", return_value=None):
+            response = client.get("/api/v1/courses")
+        assert response.status_code == 200
+        assert "ETag" not in response.headers
+        assert response.headers["Cache-Control"] == "no-cache"
+
+    def test_health_and_errors_are_not_tagged(self):
+        """Test excluded paths and error responses carry no ETag"""
+        assert "ETag" not in client.get("/api/v1/health").headers
+        assert "ETag" not in client.get("/api/v1/reports/health").headers
+        missing = client.get("/api/v1/students/nobody/dashboard")
+        assert missing.status_code == 404
+        assert "ETag" not in missing.headers
+
+
 class TestReportsModels:
     """Test cases for Reports models"""
     